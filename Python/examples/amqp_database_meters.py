@@ -29,10 +29,15 @@ The functions in this module allow you to:
 
 import datetime # We output the current date/time for debugging.
 import json     # This script makes heavy use of JSON parsing.
+import sys      # We write to stderr.
 
 import mysql.connector # Third party library; "pip install mysql-connector-python".
 import pika            # Third party library; "pip install pika".
 
+# All the shared Enphase® functions are in these packages.
+from enphase_api.local.meter_stream_codec import MeterStreamCodec
+from enphase_api.local.models import MeterReport
+
 
 # SQL statements.
 ADD_METER_READING = (
@@ -47,6 +52,20 @@ ADD_METER_READING_RESULT = (
     'INSERT INTO `MeterReading_Result` (p, q, s, v, i, pf, f) VALUES (%s, %s, %s, %s, %s, %s, %s)'
 )
 
+# The columns of the alternative (denormalised) schema in database_meters_wide.sql; each meter type
+# and phase has 7 consecutive columns.
+WIDE_METER_READING_COLUMNS = [
+    f'{meter_type}_Phase_{phase}_{field}'
+    for meter_type in ('Production', 'NetConsumption', 'TotalConsumption')
+    for phase in ('A', 'B', 'C')
+    for field in ('p', 'q', 's', 'v', 'i', 'pf', 'f')
+]
+
+ADD_WIDE_METER_READING = (
+    'INSERT INTO `MeterReading_Wide` (Timestamp, ' + ', '.join(WIDE_METER_READING_COLUMNS) + ') '
+    'VALUES (FROM_UNIXTIME(%s)' + ', %s' * len(WIDE_METER_READING_COLUMNS) + ')'
+)
+
 # Maps each type of inserted meter reading record ID to the relevant place in our SQL parameters.
 OFFSET_MAPPING = {
     'production': 0,
@@ -54,24 +73,59 @@ OFFSET_MAPPING = {
     'total-consumption': 2,
 }
 
-def add_results_to_database(database_connection, database_cursor_meter_reading, database_cursor_meter_reading_result, timestamp, json_object):
+# The errors that mean a message can never be added to the database (such as a malformed reading),
+# so it is rejected rather than returned to the queue (where it would be redelivered forever).
+PERMANENT_ERRORS = (ValueError, KeyError, TypeError, mysql.connector.errors.DataError)
+
+def check_auto_increment(database_cursor, single_writer=False):
+    """
+    Checks that the database allocates the IDs of a multi-row INSERT consecutively (the IDs of a
+    batch's results are resolved from the first inserted ID).
+
+    Args:
+        database_cursor (MySQLCursor):
+            The cursor of the database connection.
+        single_writer (bool, optional):
+            True if this is the only process adding meter readings to the database (so no other
+            INSERT can take IDs from the middle of a batch). Defaults to False.
+
+    Raises:
+        mysql.connector.errors.NotSupportedError:
+            If the IDs of a multi-row INSERT may not be consecutive.
+
+    Returns:
+        None
+    """
+
+    # Get how the database allocates AUTO_INCREMENT IDs.
+    database_cursor.execute('SELECT @@auto_increment_increment, @@innodb_autoinc_lock_mode')
+    auto_increment_increment, innodb_autoinc_lock_mode = database_cursor.fetchall()[0]
+
+    # Are the IDs spaced out (such as in a multi-source replication setup)?
+    if auto_increment_increment != 1:
+        raise mysql.connector.errors.NotSupportedError(f'The database has an auto_increment_increment of {auto_increment_increment} (the meter reading results require 1).')
+
+    # Can another connection's INSERT take IDs from the middle of a batch ("interleaved" lock mode)?
+    if innodb_autoinc_lock_mode == 2 and not single_writer:
+        raise mysql.connector.errors.NotSupportedError('The database has an innodb_autoinc_lock_mode of 2 so the IDs of a batch of meter reading results may not be consecutive (set "database_single_writer" to true in the credentials if this is the only process adding meter readings).')
+
+def add_results_to_database(database_connection, database_cursor, readings):
     """
-    Adds meter readings and their results for each phase to the database.
+    Adds a batch of meter readings and their results for each phase to the database.
 
-    This function takes the following arguments and adds meter readings along with their results
-    for each phase to the database:
+    The results of every reading in the batch are written with one multi-row INSERT, their IDs
+    are then resolved from the first inserted ID and the readings are written with a second
+    multi-row INSERT before a single commit.
 
     Args:
         database_connection (MySQLConnection):
             The database connection.
-        database_cursor_meter_reading (MySQLCursorPrepared):
-            The cursor for inserting meter readings.
-        database_cursor_meter_reading_result (MySQLCursorPrepared):
-            The cursor for inserting meter reading results.
-        timestamp (datetime.datetime):
-            The timestamp for the meter readings.
-        json_object (list):
-            A JSON object containing meter readings and their results.
+        database_cursor (MySQLCursor):
+            The cursor for inserting meter readings and their results (this must not be a
+            prepared cursor, as those cannot rewrite executemany() into a multi-row INSERT).
+        readings (list):
+            A list of (timestamp, json_object) tuples, each JSON object containing meter
+            readings and their results.
 
     Raises:
         ValueError:
@@ -81,51 +135,133 @@ def add_results_to_database(database_connection, database_cursor_meter_reading,
         None
     """
 
-    # Initialise to empty by default so they convert to a database NULL if not later set.
-    result_ids = [None] * 9
-
-    # Take each of the meter types.
-    for meter_readings in json_object:
-
-        # Get the parameter index offset for this meters' meter type.
-        meter_type_offset = OFFSET_MAPPING.get(meter_readings['reportType'])
-        if meter_type_offset is None:
-            raise ValueError(f'Unexpected meter reading report type "{meter_readings["reportType"]}" in JSON.')
-
-        # Take each of the phase readings.
-        for phase_index, phase_result in enumerate(meter_readings['lines']):
-
-            # Too many phases?
-            if phase_index > 2:
-                raise ValueError(f'Unexpected phase #{phase_index} in JSON.')
-
-            # Map each of the JSON values to our database columns.
-            meter_reading_result = (
-                phase_result['actPower'],
-                phase_result['reactPwr'],
-                phase_result['apprntPwr'],
-                phase_result['rmsVoltage'],
-                phase_result['rmsCurrent'],
-                phase_result['pwrFactor'],
-                phase_result['freqHz']
-            )
+    # The results for all the readings in this batch.
+    meter_reading_results = []
+
+    # Each reading's timestamp and the position of each of its results within the batch.
+    meter_reading_result_positions = []
+
+    # Take each of the readings.
+    for timestamp, json_object in readings:
+
+        # Initialise to empty by default so they convert to a database NULL if not later set.
+        result_positions = [None] * 9
+
+        # Take each of the meter types.
+        for meter_report in MeterReport.from_json_list(json_object):
+
+            # Get the parameter index offset for this meters' meter type.
+            meter_type_offset = OFFSET_MAPPING.get(meter_report.report_type)
+            if meter_type_offset is None:
+                raise ValueError(f'Unexpected meter reading report type "{meter_report.report_type}" in JSON.')
+
+            # Take each of the phase readings.
+            for phase_index, phase_result in enumerate(meter_report.lines):
+
+                # Too many phases?
+                if phase_index > 2:
+                    raise ValueError(f'Unexpected phase #{phase_index} in JSON.')
+
+                # Remember where in the batch this phase result will be inserted.
+                result_positions[(meter_type_offset*3)+phase_index] = len(meter_reading_results)
+
+                # The phase result is already in the order of our database columns.
+                meter_reading_results.append(phase_result)
+
+        meter_reading_result_positions.append((timestamp, result_positions))
+
+    # Were there any results to add?
+    if meter_reading_results:
+        try:
+            # Add to the database all the meter reading results (as a single multi-row INSERT).
+            database_cursor.executemany(ADD_METER_READING_RESULT, meter_reading_results)
+        except mysql.connector.errors.DataError:
+            print(readings, flush=True)
+            raise
+
+        # A multi-row INSERT reports the ID of its first row and InnoDB allocates the IDs of a
+        # single multi-row INSERT consecutively (this is checked by check_auto_increment()).
+        first_result_id = database_cursor.lastrowid
+    else:
+        first_result_id = None
+
+    # Add the meters' readings (resolving each result's ID from its position in the batch).
+    database_cursor.executemany(
+        ADD_METER_READING,
+        [
+            (timestamp,) + tuple(None if position is None else first_result_id + position for position in result_positions)
+            for timestamp, result_positions in meter_reading_result_positions
+        ]
+    )
+
+    # Make sure the whole batch is committed to the database at once.
+    database_connection.commit()
+
+def add_wide_results_to_database(database_connection, database_cursor, readings):
+    """
+    Adds a batch of meter readings to a database that uses the alternative (denormalised) schema.
+
+    Each reading is a single wide row (see database_meters_wide.sql) so the whole batch is written
+    with one multi-row INSERT before a single commit.
+
+    Args:
+        database_connection (MySQLConnection):
+            The database connection.
+        database_cursor (MySQLCursor):
+            The cursor for inserting meter readings (this must not be a prepared cursor, as those
+            cannot rewrite executemany() into a multi-row INSERT).
+        readings (list):
+            A list of (timestamp, json_object) tuples, each JSON object containing meter
+            readings and their results.
+
+    Raises:
+        ValueError:
+            If an unexpected meter reading report type or phase is encountered in the JSON.
+
+    Returns:
+        None
+    """
+
+    # The rows for all the readings in this batch.
+    meter_reading_rows = []
 
-            try:
-                # Add to the database the meter reading(s).
-                # Using a dictionary instead of a tuple prevented query preparation,
-                # possibly due to a MySQL Connector bug.
-                database_cursor_meter_reading_result.execute(ADD_METER_READING_RESULT, meter_reading_result)
-            except mysql.connector.errors.DataError:
-                print(json_object, flush=True)
-                raise
+    # Take each of the readings.
+    for timestamp, json_object in readings:
 
-            # Get the result ID for this phase insert.
-            result_ids[(meter_type_offset*3)+phase_index] = database_cursor_meter_reading_result.lastrowid
+        # Initialise to empty by default so they convert to a database NULL if not later set.
+        meter_reading_row = [None] * len(WIDE_METER_READING_COLUMNS)
 
-    # Add the meters' readings.
-    database_cursor_meter_reading.execute(ADD_METER_READING, (timestamp,) + tuple(result_ids))
+        # Take each of the meter types.
+        for meter_report in MeterReport.from_json_list(json_object):
 
-    # Make sure data is committed to the database.
+            # Get the parameter index offset for this meters' meter type.
+            meter_type_offset = OFFSET_MAPPING.get(meter_report.report_type)
+            if meter_type_offset is None:
+                raise ValueError(f'Unexpected meter reading report type "{meter_report.report_type}" in JSON.')
+
+            # Take each of the phase readings.
+            for phase_index, phase_result in enumerate(meter_report.lines):
+
+                # Too many phases?
+                if phase_index > 2:
+                    raise ValueError(f'Unexpected phase #{phase_index} in JSON.')
+
+                # The first of this meter type and phase's 7 columns.
+                column = ((meter_type_offset*3)+phase_index) * 7
+
+                # The phase result is already in the order of our database columns.
+                meter_reading_row[column:column+7] = phase_result
+
+        meter_reading_rows.append((timestamp,) + tuple(meter_reading_row))
+
+    try:
+        # Add to the database all the meter readings (as a single multi-row INSERT).
+        database_cursor.executemany(ADD_WIDE_METER_READING, meter_reading_rows)
+    except mysql.connector.errors.DataError:
+        print(readings, flush=True)
+        raise
+
+    # Make sure the whole batch is committed to the database at once.
     database_connection.commit()
 
 def main():
@@ -179,8 +315,16 @@ def main():
             # Get reference to the virtual connection within AMQP.
             amqp_channel = amqp_connection.channel()
 
+            # Rejected messages are optionally routed to a dead letter exchange (this only applies
+            # when the queue is first declared).
+            amqp_dead_letter_exchange = credentials.get('amqp_dead_letter_exchange')
+
             # Declare a queue (if it does not already exist).
-            amqp_result = amqp_channel.queue_declare(queue='Enphase_Database', durable=True)
+            amqp_result = amqp_channel.queue_declare(
+                queue='Enphase_Database',
+                durable=True,
+                arguments={'x-dead-letter-exchange': amqp_dead_letter_exchange} if amqp_dead_letter_exchange else None
+            )
 
             # Bind the queue to the exchange (if it is not already bound).
             amqp_channel.queue_bind(
@@ -203,9 +347,100 @@ def main():
                 database=database_database
             ) as database_connection:
 
-                # Get references to 2 database cursors (that will PREPARE duplicate SQL statements).
-                database_cursor_meter_reading = database_connection.cursor(prepared=True)
-                database_cursor_meter_reading_result = database_connection.cursor(prepared=True)
+                # Get a reference to a database cursor.
+                database_cursor = database_connection.cursor()
+
+                # Messages are written to the database in batches (of up to this many messages or
+                # after this many seconds).
+                database_batch_size = credentials.get('database_batch_size', 10)
+                database_batch_interval = credentials.get('database_batch_interval', 10)
+
+                # The database either uses the schema in database_meters.sql ("normalised") or the schema in
+                # database_meters_wide.sql ("wide").
+                database_schema = credentials.get('database_schema', 'normalised')
+
+                if database_schema == 'normalised':
+                    # This schema relies on the IDs of a batch's results being consecutive.
+                    check_auto_increment(database_cursor, credentials.get('database_single_writer', False))
+                    add_results = add_results_to_database
+                elif database_schema == 'wide':
+                    add_results = add_wide_results_to_database
+                else:
+                    raise ValueError(f'Unexpected database schema "{database_schema}" in credentials.')
+
+                # The broker sends up to a batch of unacknowledged messages at once (so a backlog
+                # is drained a whole batch per round trip).
+                amqp_channel.basic_qos(prefetch_count=database_batch_size)
+
+                # The readings not yet written to the database (and the delivery tag of each one).
+                readings = []
+                delivery_tags = []
+
+                def add_readings_individually():
+                    """
+                    Adds each of the readings in a batch that failed permanently to the database on
+                    its own, so only the messages that can never be added are rejected.
+                    """
+
+                    for reading, delivery_tag in zip(readings, delivery_tags):
+                        try:
+                            add_results(
+                                database_connection=database_connection,
+                                database_cursor=database_cursor,
+                                readings=[reading]
+                            )
+                        except PERMANENT_ERRORS as exception:
+                            # Undo any partial reading and reject its message (without requeuing it).
+                            database_connection.rollback()
+                            amqp_channel.basic_nack(delivery_tag=delivery_tag, requeue=False)
+
+                            # Log this error.
+                            print(f'{datetime.datetime.now()} - Rejected a message that cannot be added to the database:\n {exception!r}', file=sys.stderr, flush=True)
+                            continue
+                        except Exception:
+                            # Undo any partial reading and return this and the remaining messages to the queue.
+                            database_connection.rollback()
+                            amqp_channel.basic_nack(delivery_tag=delivery_tags[-1], multiple=True, requeue=True)
+
+                            # Re-raise.
+                            raise
+
+                        amqp_channel.basic_ack(delivery_tag=delivery_tag)
+
+                def add_batch_to_database():
+                    """
+                    Adds any readings waiting in the batch to the database and then acknowledges
+                    their messages (so the broker redelivers them if they are never committed).
+                    """
+
+                    # Is there anything in the batch?
+                    if readings:
+                        try:
+                            # Add this batch of messages to the database (as one transaction).
+                            add_results(
+                                database_connection=database_connection,
+                                database_cursor=database_cursor,
+                                readings=readings
+                            )
+                        except PERMANENT_ERRORS:
+                            # Undo any partial batch and find which of the messages cannot be added.
+                            database_connection.rollback()
+                            add_readings_individually()
+                        except Exception:
+                            # Undo any partial batch and return the messages to the queue (the
+                            # database may be temporarily unavailable).
+                            database_connection.rollback()
+                            amqp_channel.basic_nack(delivery_tag=delivery_tags[-1], multiple=True, requeue=True)
+
+                            # Re-raise.
+                            raise
+                        else:
+                            # The batch has been committed so acknowledge every message in it at once.
+                            amqp_channel.basic_ack(delivery_tag=delivery_tags[-1], multiple=True)
+
+                        # Start a new batch.
+                        readings.clear()
+                        delivery_tags.clear()
 
                 def amqp_callback(channel, method, properties, body):
                     """
@@ -218,23 +453,42 @@ def main():
                         body (bytes): The message body (payload).
                     """
 
-                    # Convert the string back to JSON.
-                    json_object = json.loads(body)
+                    # Decode the message (based on how it was encoded).
+                    try:
+                        json_object = MeterStreamCodec.decode(body, properties.content_type)
+                        reading = (json_object['timestamp'], json_object['readings'])
+                    except (ValueError, KeyError, TypeError) as exception:
+                        # Reject this message (it would fail the same way if it were redelivered).
+                        channel.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+
+                        # Log this error.
+                        print(f'{datetime.datetime.now()} - Rejected a message that cannot be decoded:\n {exception!r}', file=sys.stderr, flush=True)
+                        return
+
+                    # Add this message to the batch.
+                    readings.append(reading)
+                    delivery_tags.append(method.delivery_tag)
+
+                    # Is the batch full?
+                    if len(readings) >= database_batch_size:
+                        add_batch_to_database()
+
+                def amqp_timer():
+                    """
+                    Timer callback that adds any partial batch to the database and then re-arms.
+                    """
+
+                    add_batch_to_database()
+                    amqp_connection.call_later(database_batch_interval, amqp_timer)
 
-                    # Add this message to the database.
-                    add_results_to_database(
-                        database_connection=database_connection,
-                        database_cursor_meter_reading=database_cursor_meter_reading,
-                        database_cursor_meter_reading_result=database_cursor_meter_reading_result,
-                        timestamp=json_object['timestamp'],
-                        json_object=json_object['readings']
-                    )
+                # Make sure a partial batch is not left waiting when messages are infrequent.
+                amqp_connection.call_later(database_batch_interval, amqp_timer)
 
-                # Create a consumer.
+                # Create a consumer (messages are only acknowledged once they are in the database).
                 amqp_channel.basic_consume(
                     queue=amqp_result.method.queue,
                     on_message_callback=amqp_callback,
-                    auto_ack=True,
+                    auto_ack=False,
                     exclusive=True,
                     consumer_tag='AMQP_Database_Meters'
                 )
@@ -242,8 +496,13 @@ def main():
                 # Notify the user.
                 print(f'{datetime.datetime.now()} - Waiting for messages. To exit press CTRL+C', flush=True)
 
-                # Start consuming.
-                amqp_channel.start_consuming()
+                try:
+                    # Start consuming.
+                    amqp_channel.start_consuming()
+                except KeyboardInterrupt:
+                    # Add any partial batch of messages to the database before shutting down.
+                    add_batch_to_database()
+                    raise
     except KeyboardInterrupt:
         # Notify the user.
         print(f'{datetime.datetime.now()} - Shutting down.', flush=True)
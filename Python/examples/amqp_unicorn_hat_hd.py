@@ -36,6 +36,9 @@ import colorsys
 # We timestamp any errors.
 import datetime
 
+# We cache the frames of recently drawn text and animations.
+import functools
+
 # We count forwards then backwards.
 import itertools
 
@@ -48,12 +51,19 @@ import os
 # We write to stderr.
 import sys
 
+# AMQP messages are consumed (and the weather is refreshed) in their own threads.
+import threading
+
 # We use the sleep function to pause between screen draws.
 import time
 
 # Third party library; "pip install pika"
 import pika
 
+# We slice each frame out of the image as a NumPy array ("pip install numpy" if getting import
+# errors).
+import numpy as np
+
 # Unicorn HAT HD uses pillow to generate images to then draw on the LEDs of the Unicorn HAT HD
 # ("pip install pillow" if getting import errors).
 from PIL import Image, ImageDraw, ImageFont
@@ -68,20 +78,53 @@ import requests.exceptions
 # "pip install urllib3" if getting import errors.
 import urllib3
 
+# All the shared Enphase® functions are in these packages.
+from enphase_api.local.meter_stream_codec import MeterStreamCodec
+
 
 class UnicornHATHelper:
     """
     A utility class for drawing scrolling text and animations on a Unicorn HAT HD display.
     """
 
+    # The number of most recently drawn texts and animations that have their frames cached.
+    TEXT_CACHE_SIZE = 32
+    ANIMATION_CACHE_SIZE = 16
+
     @staticmethod
-    def draw_scrolling_text(unicornhathd, screen_width, screen_height, line, color, font, speed=0.04, end_time=time.time() + 60):
+    def draw_frame(unicornhathd, frame):
         """
-        Draw scrolling text on the Unicorn HAT HD using a specified font.
+        Draw a whole frame into the Unicorn HAT HD buffer (this does not show it).
 
         Args:
             unicornhathd (UnicornHAT HD):
                 An instance of the Unicorn HAT HD library.
+            frame (numpy.ndarray):
+                The (x, y, RGB) pixels of the frame.
+
+        Returns:
+            None
+        """
+
+        # The Unicorn HAT HD library stores its buffer in the same (x, y, RGB) layout so the whole
+        # frame can be copied in one go.
+        buffer = getattr(unicornhathd, '_buf', None)
+        if buffer is not None and buffer.shape == frame.shape:
+            buffer[:] = frame
+            return
+
+        # Other implementations (such as the simulator) have each pixel set.
+        for x_pixel, y_pixel in np.ndindex(frame.shape[:2]):
+            red, green, blue = [int(n) for n in frame[x_pixel, y_pixel]]
+            unicornhathd.set_pixel(x_pixel, y_pixel, red, green, blue)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+    def get_scrolling_text_frames(screen_width, screen_height, line, color, font):
+        """
+        Get the frames of text scrolling forwards then backwards (the most recent are cached).
+
+        Args:
             screen_width (int):
                 Width of the screen in pixels.
             screen_height (int):
@@ -92,20 +135,9 @@ class UnicornHATHelper:
                 The RGB color tuple (red, green, blue) for the text.
             font (PIL ImageFont):
                 The font to use for rendering the text.
-            speed (float, optional):
-                The time delay between scrolling frames in seconds. Default is 0.04.
-            end_time (float, optional):
-                The timestamp indicating when to stop scrolling.
-                Default is current time + 60 seconds.
 
         Returns:
-            None
-
-        Note:
-            This method draws scrolling text on the Unicorn HAT HD using the specified font.
-            The text scrolls horizontally left to right multiple times until the end_time is
-            reached or the method is manually interrupted. The text color, font, and speed
-            of scrolling can be customized.
+            tuple: The (x, y, RGB) frames (each a view of the same rendered text).
         """
 
         # Calculate the width and height of the text when rendered by the font.
@@ -122,28 +154,95 @@ class UnicornHATHelper:
         # (we set the text colour based off system production energy we're generating).
         draw.text(xy=(0, -font_upper), text=line, fill=color, font=font)
 
-        # We want to scroll left to right multiple times (at least once).
-        while True:
+        # Convert the image to an array once (with the x axis first so each frame is just a view).
+        columns = np.asarray(image).swapaxes(0, 1)
+
+        # For each pixel we are scrolling forwards then backwards, each frame is the screen's worth
+        # of columns from the scrolling offset (the screen's x axis is reversed).
+        return tuple(
+            columns[scroll_x_offset:scroll_x_offset + screen_width][::-1]
+            for scroll_x_offset in itertools.chain(range(font_width - screen_width), range(font_width - screen_width, 0, -1))
+        )
 
-            # For each pixel we are scrolling forwards then backwards.
-            for scroll_x_offset in itertools.chain(range(font_width - screen_width), range(font_width - screen_width, 0, -1)):
+    @staticmethod
+    @functools.lru_cache(maxsize=ANIMATION_CACHE_SIZE)
+    def get_animation_frames(screen_width, screen_height, filename):
+        """
+        Get the frames of an animation image (the most recent are cached).
 
-                # Take each of the pixels on the x axis.
-                for x_pixel in range(screen_width):
+        Args:
+            screen_width (int):
+                Width of the screen in pixels.
+            screen_height (int):
+                Height of the screen in pixels.
+            filename (str):
+                The name of the image file (without the extension) to use for animation frames.
+
+        Returns:
+            tuple: The (x, y, RGB) frames (each a view of the same image).
+        """
+
+        # Open the requested image (and ignore any transparency values).
+        with Image.open(f'resources/icons/{filename}.png') as image:
+            # Convert the image to an array once (its rows are the screen's x axis so each frame is
+            # just a view).
+            pixels = np.asarray(image.convert('RGB'))
+
+        # Get the image width and height.
+        image_height, image_width, _ = pixels.shape
+
+        # Take each of the frame x positions in the image then each of the frame y positions.
+        return tuple(
+            pixels[frame_y * screen_height:(frame_y * screen_height) + screen_width, frame_x * screen_width:(frame_x * screen_width) + screen_height]
+            for frame_x in range(int(image_width / screen_width))
+            for frame_y in range(int(image_height / screen_height))
+        )
+
+    @staticmethod
+    def draw_scrolling_text(unicornhathd, screen_width, screen_height, line, color, font, speed=0.04, end_time=time.time() + 60):
+        """
+        Draw scrolling text on the Unicorn HAT HD using a specified font.
+
+        Args:
+            unicornhathd (UnicornHAT HD):
+                An instance of the Unicorn HAT HD library.
+            screen_width (int):
+                Width of the screen in pixels.
+            screen_height (int):
+                Height of the screen in pixels.
+            line (str):
+                The text to display.
+            color (tuple):
+                The RGB color tuple (red, green, blue) for the text.
+            font (PIL ImageFont):
+                The font to use for rendering the text.
+            speed (float, optional):
+                The time delay between scrolling frames in seconds. Default is 0.04.
+            end_time (float, optional):
+                The timestamp indicating when to stop scrolling.
+                Default is current time + 60 seconds.
+
+        Returns:
+            None
+
+        Note:
+            This method draws scrolling text on the Unicorn HAT HD using the specified font.
+            The text scrolls horizontally left to right multiple times until the end_time is
+            reached or the method is manually interrupted. The text color, font, and speed
+            of scrolling can be customized.
+        """
 
-                    # Take each of the pixels on the y axis for this position on the x axis.
-                    for y_pixel in range(screen_height):
+        # Get the (cached) frames of the text scrolling forwards then backwards.
+        frames = UnicornHATHelper.get_scrolling_text_frames(screen_width, screen_height, line, color, font)
 
-                        # Get what the pixel should be according to the Pillow in memory image
-                        # followed by the x axis scrolling offset.
-                        pixel = image.getpixel((x_pixel + scroll_x_offset, y_pixel))
+        # We want to scroll left to right multiple times (at least once).
+        while True:
 
-                        # Get the Red, Green, Blue values for this pixel.
-                        red, green, blue = [int(n) for n in pixel]
+            # Take each of the scrolling frames.
+            for frame in frames:
 
-                        # Tell the Unicorn HAT HD to set the LED pixel buffer to be set to the
-                        # same as the Pillow in memory image pixel.
-                        unicornhathd.set_pixel((screen_width - 1) - x_pixel, y_pixel, red, green, blue)
+                # Draw the frame into the Unicorn HAT HD buffer.
+                UnicornHATHelper.draw_frame(unicornhathd, frame)
 
                 # The screen has been re-drawn in the buffer so now set the Unicorn HAT HD to
                 # reflect the buffer (so the user won't watch it re-drawing).
@@ -186,40 +285,23 @@ class UnicornHATHelper:
             It updates the Unicorn HAT HD display with each frame, creating a scrolling animation.
         """
 
-        # Open the requested image (and ignore any transparency values).
-        image = Image.open(f'resources/icons/{filename}.png').convert('RGB')
+        # Get the (cached) frames of the animation.
+        frames = UnicornHATHelper.get_animation_frames(screen_width, screen_height, filename)
 
         # The images are left-to-right.
         unicornhathd.rotation(unicornhathd.get_rotation() + 90)
 
-        # Get the image width and height.
-        image_width, image_height = image.size
-
-        # Take each of the frame x positions in the image.
-        for frame_x in range(int(image_width / screen_width)):
-            # Take each of the frame y positions in the image.
-            for frame_y in range(int(image_height / screen_height)):
-                # Take each of the screen's x axis pixels.
-                for x_pixel in range(screen_width):
-                    # Take each of the screen's y axis pixels for this position on the x axis.
-                    for y_pixel in range(screen_height):
-                        # Get what the pixel should be according to the Pillow in memory image
-                        # followed by the x axis frame offset.
-                        pixel = image.getpixel(((frame_x * screen_width) + y_pixel, (frame_y * screen_height) + x_pixel))
-
-                        # Get the Red, Green, Blue values for this pixel.
-                        red, green, blue = [int(n) for n in pixel]
-
-                        # Tell the Unicorn HAT HD to set the LED pixel buffer to be set to the
-                        # same as the Pillow in memory image pixel.
-                        unicornhathd.set_pixel(x_pixel, y_pixel, red, green, blue)
+        # Take each of the frames.
+        for frame in frames:
+            # Draw the frame into the Unicorn HAT HD buffer.
+            UnicornHATHelper.draw_frame(unicornhathd, frame)
 
-                # The screen has been re-drawn in the buffer so now set the Unicorn HAT HD to
-                # reflect the buffer (so the user will not watch it re-drawing).
-                unicornhathd.show()
+            # The screen has been re-drawn in the buffer so now set the Unicorn HAT HD to
+            # reflect the buffer (so the user will not watch it re-drawing).
+            unicornhathd.show()
 
-                # Pause before attempting to draw the next scrolling frame.
-                time.sleep(speed)
+            # Pause before attempting to draw the next scrolling frame.
+            time.sleep(speed)
 
         # Restore rotation.
         unicornhathd.rotation(unicornhathd.get_rotation() - 90)
@@ -229,38 +311,42 @@ class ScreenWeather:
     A class for displaying weather information on a Unicorn HAT HD.
     """
 
-    def __init__(self, unicornhathd, screen_width, screen_height, latitude, longitude):
+    def __init__(self, unicornhathd, screen_width, screen_height, latitude, longitude, time_to_live=900, retry_interval=60):
         self.unicornhathd = unicornhathd
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.latitude = latitude
         self.longitude = longitude
 
+        # How many seconds the weather is fresh for, and how long to wait after a failed refresh.
+        self.time_to_live = time_to_live
+        self.retry_interval = retry_interval
+
         self.weather_last_updated = None
+        self.weather_last_attempted = None
         self.weather_filename = None
 
+        # The thread refreshing the weather (if a refresh is in progress).
+        self.refresh_thread = None
+
     def draw_screen(self):
         """
         Draw the weather animation on the Unicorn HAT HD display.
 
+        The weather is refreshed in the background when it is older than its time to live; until
+        then the previous (stale) weather is drawn, so drawing never waits on the network.
+
         Returns:
-            None
+            bool: True if the weather was drawn, False if it has not been loaded yet.
         """
 
-        # If the weather has not been loaded yet, or it was loaded over 15 minutes ago.
-        if not self.weather_last_updated or self.weather_last_updated + 900 < time.time():
-            # Get the latest weather.
-            weather_code, wind_speed, is_day = self.get_weather_details()
+        # If the weather has not been loaded yet, or it is older than its time to live.
+        if not self.weather_last_updated or self.weather_last_updated + self.time_to_live < time.time():
+            self.refresh_weather()
 
-            # Set the weather_last_updated date/time.
-            self.weather_last_updated = time.time()
-
-            # We convert the weather_code, wind_speed and is_day into a PNG filename.
-            self.weather_filename = self.get_weather_filename(
-                weather_code=weather_code,
-                wind_speed=wind_speed,
-                is_day=is_day
-            )
+        # Has the weather not been loaded yet?
+        if not self.weather_filename:
+            return False
 
         # Draw the weather animation.
         UnicornHATHelper.draw_animation(
@@ -270,6 +356,69 @@ class ScreenWeather:
             filename=self.weather_filename
         )
 
+        return True
+
+    def refresh_weather(self):
+        """
+        Start refreshing the weather in the background (unless a refresh is already in progress or
+        the last attempt failed too recently).
+
+        Returns:
+            None
+        """
+
+        # Is the weather already being refreshed?
+        if self.refresh_thread and self.refresh_thread.is_alive():
+            return
+
+        # Did the last attempt fail too recently?
+        if self.weather_last_attempted and self.weather_last_attempted + self.retry_interval > time.time():
+            return
+
+        # Set the weather_last_attempted date/time.
+        self.weather_last_attempted = time.time()
+
+        # Refresh the weather in the background.
+        self.refresh_thread = threading.Thread(target=self.update_weather, name='ScreenWeather', daemon=True)
+        self.refresh_thread.start()
+
+    def update_weather(self):
+        """
+        Get the latest weather (this is run in the background by refresh_weather).
+
+        Returns:
+            None
+        """
+
+        # A weather request may fail (the previous weather is kept).
+        try:
+            # Get the latest weather.
+            weather_code, wind_speed, is_day = self.get_weather_details()
+        # Sometimes unable to connect
+        except requests.exceptions.ConnectionError as exception:
+            # Log this error.
+            print(f'{datetime.datetime.now()} - Weather API connection error:\n {exception}', file=sys.stderr)
+            return
+        # This happens generally if there are wider issues on the network.
+        except requests.exceptions.ReadTimeout:
+            # Log this non-critial often transient error.
+            print(f'{datetime.datetime.now()} - Weather API request timed out.', file=sys.stderr)
+            return
+        except requests.exceptions.JSONDecodeError as exception:
+            # Log this non-critial often transient error.
+            print(f'{datetime.datetime.now()} - Weather API returned bad JSON:\n {exception}', file=sys.stderr)
+            return
+
+        # We convert the weather_code, wind_speed and is_day into a PNG filename.
+        self.weather_filename = self.get_weather_filename(
+            weather_code=weather_code,
+            wind_speed=wind_speed,
+            is_day=is_day
+        )
+
+        # Set the weather_last_updated date/time.
+        self.weather_last_updated = time.time()
+
     def get_weather_details(self, timezone='Europe%2FLondon'):
         """
         Retrieve weather details from an API.
@@ -541,6 +690,130 @@ class ScreenChart:
         # Restore rotation.
         self.unicornhathd.rotation(self.unicornhathd.get_rotation() - 90)
 
+class MeterStreamConsumer:
+    """
+    A class to consume the meter readings from AMQP in a background thread.
+
+    Only the most recent reading is kept (the display only ever shows the latest one); it is
+    replaced with a single assignment so the display can read it without waiting or locking.
+    """
+
+    def __init__(self, parameters, reconnect_delay=5):
+        """
+        Initialize the consumer (and start its thread).
+
+        Args:
+            parameters (pika.ConnectionParameters):
+                The AMQP connection parameters.
+            reconnect_delay (float, optional):
+                Seconds to wait before reconnecting if the connection is lost. Defaults to 5.
+        """
+
+        self.parameters = parameters
+        self.reconnect_delay = reconnect_delay
+
+        # The most recent (timestamp, production power, consumption power) reading (if any).
+        self.latest = None
+
+        # Start the consumer thread.
+        self.thread = threading.Thread(target=self._run, name='MeterStreamConsumer', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        """
+        The consumer thread; connects (and reconnects) to the broker and consumes the readings.
+        """
+
+        while True:
+            try:
+                # Connect to the AMQP broker (the connection is only used by this thread).
+                with pika.BlockingConnection(parameters=self.parameters) as amqp_connection:
+
+                    # Get reference to the virtual connection within AMQP.
+                    amqp_channel = amqp_connection.channel()
+
+                    # Declare a queue (if it does not already exist) that only holds the latest reading.
+                    amqp_result = amqp_channel.queue_declare(
+                        queue='Enphase_Unicorn_HAT_HD',
+                        durable=False,
+                        exclusive=True,
+                        auto_delete=True,
+                        arguments={'x-max-length': 1}
+                    )
+
+                    # Bind the queue to the exchange (if it is not already bound).
+                    amqp_channel.queue_bind(
+                        queue=amqp_result.method.queue,
+                        exchange='Enphase',
+                        routing_key='MeterStream'
+                    )
+
+                    # Create a consumer (the broker pushes each reading as it arrives).
+                    amqp_channel.basic_consume(
+                        queue=amqp_result.method.queue,
+                        on_message_callback=self._on_message,
+                        auto_ack=True,
+                        exclusive=True,
+                        consumer_tag='AMQP_Unicorn_HAT_HD'
+                    )
+
+                    # Start consuming.
+                    amqp_channel.start_consuming()
+            except pika.exceptions.AMQPError as exception:
+                # Log this error (the display shows an error once the latest reading is too old).
+                print(f'{datetime.datetime.now()} - AMQP connection error (reconnecting):\n {exception!r}', file=sys.stderr, flush=True)
+            # Anything else must not stop this thread (or the display would be stuck on an error).
+            # pylint: disable-next=broad-exception-caught
+            except Exception as exception:
+                # Log this error.
+                print(f'{datetime.datetime.now()} - Unexpected AMQP consumer error (reconnecting):\n {exception!r}', file=sys.stderr, flush=True)
+
+            # Pause before reconnecting.
+            time.sleep(self.reconnect_delay)
+
+    def _on_message(self, channel, method, properties, body):
+        """
+        Callback function that keeps the reading from each incoming message.
+
+        Args:
+            channel (pika.channel.Channel): The channel object.
+            method (pika.spec.Basic.Deliver): Delivery information.
+            properties (pika.spec.BasicProperties): Message properties.
+            body (bytes): The message body (payload).
+        """
+
+        # Decode the message (based on how it was encoded).
+        try:
+            json_object = MeterStreamCodec.decode(body, properties.content_type)
+        except ValueError as exception:
+            # Log this error (and skip this message).
+            print(f'{datetime.datetime.now()} - Unable to decode AMQP message:\n {exception}', file=sys.stderr, flush=True)
+            return
+
+        # Any meter missing from this message keeps its previous value.
+        _, production_power, consumption_power = self.latest if self.latest else (None, 0, 0)
+
+        try:
+            # Each of the items are production, net-consumption or total-consumption.
+            for meter_readings in json_object['readings']:
+                # Is the current array item for production?
+                if meter_readings['reportType'] == 'production':
+                    # Take the cumulative values across all phases.
+                    production_power = meter_readings['cumulative']['actPower']
+                # Is the current array item for consumption?
+                elif meter_readings['reportType'] == 'total-consumption':
+                    # Take the cumulative values across all phases.
+                    consumption_power = meter_readings['cumulative']['actPower']
+
+            timestamp = json_object['timestamp']
+        except (KeyError, TypeError) as exception:
+            # Log this error (and skip this malformed message).
+            print(f'{datetime.datetime.now()} - Unexpected AMQP message:\n {exception!r}', file=sys.stderr, flush=True)
+            return
+
+        # Replace the latest reading (along with the creation timestamp of the message).
+        self.latest = (timestamp, production_power, consumption_power)
+
 def restricted_float(number):
     """
     Validate and convert a floating-point number within the range [0.0, 1.0].
@@ -707,107 +980,52 @@ def main():
     )
 
     try:
-        # Connect to the AMQP broker.
-        with pika.BlockingConnection(parameters=amqp_parameters) as amqp_connection:
-
-            # Get reference to the virtual connection within AMQP.
-            amqp_channel = amqp_connection.channel()
-
-            # Declare a queue (if it does not already exist).
-            amqp_result = amqp_channel.queue_declare(
-                queue='Enphase_Unicorn_HAT_HD',
-                durable=False,
-                exclusive=True,
-                auto_delete=True,
-                arguments={'x-max-length': 1}
-            )
-
-            # Bind the queue to the exchange (if it is not already bound).
-            amqp_channel.queue_bind(
-                queue=amqp_result.method.queue,
-                exchange='Enphase',
-                routing_key='MeterStream'
-            )
+        # Consume the readings from the AMQP broker in the background (so drawing never waits).
+        amqp_consumer = MeterStreamConsumer(parameters=amqp_parameters)
 
-            # We may reference this when no messages are obtained from the queue.
-            timestamp = 0
-
-            # Repeat forever unless the user presses CTRL + C.
-            while True:
-                # Optionally draw the weather.
-                if screen_weather:
-                    # A weather request may fail.
-                    try:
-                        screen_weather.draw_screen()
-                    # Sometimes unable to connect
-                    except requests.exceptions.ConnectionError as exception:
-                        # Log this error.
-                        print(f'{datetime.datetime.now()} - Weather API connection error:\n {exception}', file=sys.stderr)
-                    # This happens generally if there are wider issues on the network.
-                    except requests.exceptions.ReadTimeout:
-                        # Log this non-critial often transient error.
-                        print(f'{datetime.datetime.now()} - Weather API request timed out.', file=sys.stderr)
-                    except requests.exceptions.JSONDecodeError as exception:
-                        # Log this non-critial often transient error.
-                        print(f'{datetime.datetime.now()} - Weather API returned bad JSON:\n {exception}', file=sys.stderr)
-
-                # Attempt to get a message from AMQP.
-                method, _, body = amqp_channel.basic_get(
-                    queue=amqp_result.method.queue,
-                    auto_ack=True
+        # Repeat forever unless the user presses CTRL + C.
+        while True:
+            # Optionally draw the weather (this only draws the weather already in memory, it is
+            # refreshed in the background and may not have loaded yet).
+            weather_drawn = screen_weather.draw_screen() if screen_weather else False
+
+            # Take the latest reading (kept up to date by the consumer thread).
+            latest = amqp_consumer.latest
+
+            # Check the data is within the last 5 seconds.
+            if latest and latest[0] > time.time()-5:
+                # Get the power values.
+                _, production_power, consumption_power = latest
+
+                # Draw the production power screen (until the end time).
+                screen_production.draw_screen(
+                    number_of_microinverters=args.number_of_microinverters,
+                    watts=production_power,
+                    end_time=time.time() + 5
                 )
 
-                # Was there a message?
-                if method:
-                    # Parse the message.
-                    json_object = json.loads(body)
-
-                    # Get the creation timestamp of the message.
-                    timestamp = json_object['timestamp']
-
-                    # Each of the items are production, net-consumption or total-consumption.
-                    for meter_readings in json_object['readings']:
-                        # Is the current array item for production?
-                        if meter_readings['reportType'] == 'production':
-                            # Take the cumulative values across all phases.
-                            production_power = meter_readings['cumulative']['actPower']
-                        # Is the current array item for consumption?
-                        elif meter_readings['reportType'] == 'total-consumption':
-                            # Take the cumulative values across all phases.
-                            consumption_power = meter_readings['cumulative']['actPower']
-
-                # Check the data is within the last 5 seconds.
-                if timestamp > time.time()-5:
-
-                    # Draw the production power screen (until the end time).
-                    screen_production.draw_screen(
-                        number_of_microinverters=args.number_of_microinverters,
-                        watts=production_power,
-                        end_time=time.time() + 5
-                    )
-
-                    # Draw the chart screen.
-                    screen_chart.draw_screen(
-                        number_of_microinverters=args.number_of_microinverters,
-                        production=production_power,
-                        consumption=consumption_power
-                    )
+                # Draw the chart screen.
+                screen_chart.draw_screen(
+                    number_of_microinverters=args.number_of_microinverters,
+                    production=production_power,
+                    consumption=consumption_power
+                )
 
-                    # Pause on the last screen for 5 seconds.
-                    time.sleep(5)
-                elif not screen_weather:
-                    # Display and scroll the red error text on screen for 10 seconds
-                    # (if the weather won't otherwise loop).
-                    UnicornHATHelper.draw_scrolling_text(
-                        unicornhathd=unicornhathd,
-                        screen_width=screen_width,
-                        screen_height=screen_height,
-                        line='Error',
-                        color=(255, 0, 0),
-                        font=font,
-                        speed=args.delay,
-                        end_time=time.time() + 10
-                    )
+                # Pause on the last screen for 5 seconds.
+                time.sleep(5)
+            elif not weather_drawn:
+                # Display and scroll the red error text on screen for 10 seconds
+                # (if nothing else was drawn, so the loop does not spin).
+                UnicornHATHelper.draw_scrolling_text(
+                    unicornhathd=unicornhathd,
+                    screen_width=screen_width,
+                    screen_height=screen_height,
+                    line='Error',
+                    color=(255, 0, 0),
+                    font=font,
+                    speed=args.delay,
+                    end_time=time.time() + 10
+                )
     # Did the user press CTRL + C to attempt to quit this application?
     except KeyboardInterrupt:
         # Notify the user.
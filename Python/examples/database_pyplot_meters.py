@@ -22,13 +22,16 @@ graphically using Matplotlib.
 """
 
 import argparse # We support command line arguments.
+import datetime # We display the times in the local timezone.
 
 import matplotlib.pyplot as plt          # Third party library; "pip install matplotlib"
 import matplotlib.animation as animation # We use matplotlib animations for live data.
-import matplotlib.dates                  # We use matplotlib date functions for comparisons.
 
 import mysql.connector                   # Third party library; "pip install mysql-connector-python"
 
+# The chart helpers shared with gateway_pyplot_meters.py.
+from pyplot_helpers import BlitManager, TimeSeriesRingBuffer
+
 # Contains the program argument data.
 args = None
 
@@ -41,11 +44,14 @@ database_cursor = None
 # The matplotlib figure.
 figure = None
 
-# The lists which will hold the underlying raw data.
-timestamp_data = []
-production_data = []
-consumption_net_data = []
-consumption_total_data = []
+# The ring buffer which will hold the underlying raw data (for each of the series below, with the
+# timestamps stored as matplotlib dates so they can be plotted directly).
+meter_data = None
+
+# The index of each series in the ring buffer.
+PRODUCTION_SERIES = 0
+CONSUMPTION_NET_SERIES = 1
+CONSUMPTION_TOTAL_SERIES = 2
 
 # Reference to the plots and annotations.
 production_plot = None
@@ -58,24 +64,81 @@ consumption_total_annotation = None
 # Will map legend lines to artists.
 legend_map = {}
 
+# Redraws only the plots and annotations for each frame (when blitting).
+blit_manager = None
+
+# Set whilst the animation moves the axes limits (so the plots are only decimated once the new
+# limits are known, rather than for every change of the limits).
+autoscrolling = False
+
+# When blitting, new data that would fall outside the view extends the x-axis by this fraction
+# (so the following frames do not need the whole chart redrawing).
+BLIT_HEADROOM = 0.1
+
 # The last seen database ReadingID.
 last_seen_reading_id = 0
 
-# SQL statement.
-GET_METER_READINGS_SQL = (
-    'SELECT ReadingID, Timestamp, Production_P, NetConsumption_P, TotalConsumption_P '
-    'FROM MeterReading_SinglePhase_View '
-    'WHERE ReadingID > %s '
-    'ORDER BY ReadingID ASC'
+# SQL statements (for the schema in database_meters.sql and the schema in database_meters_wide.sql).
+GET_METER_READINGS_SQL = {
+    'normalised': (
+        'SELECT ReadingID, Timestamp, Production_P, NetConsumption_P, TotalConsumption_P '
+        'FROM MeterReading_SinglePhase_View '
+        'WHERE ReadingID > %s '
+        'ORDER BY ReadingID ASC'
+    ),
+    # Reads the table directly so a range of readings is read contiguously (without any joins).
+    'wide': (
+        'SELECT ReadingID, Timestamp, Production_Phase_A_p, NetConsumption_Phase_A_p, TotalConsumption_Phase_A_p '
+        'FROM MeterReading_Wide '
+        'WHERE ReadingID > %s '
+        'ORDER BY ReadingID ASC'
+    )
+}
+
+# SQL statements to only read the readings from a point in time (this uses the Timestamp index).
+GET_METER_READINGS_SINCE_SQL = {
+    'normalised': (
+        'SELECT ReadingID, Timestamp, Production_P, NetConsumption_P, TotalConsumption_P '
+        'FROM MeterReading_SinglePhase_View '
+        'WHERE Timestamp >= FROM_UNIXTIME(%s) '
+        'ORDER BY Timestamp ASC, ReadingID ASC'
+    ),
+    'wide': (
+        'SELECT ReadingID, Timestamp, Production_Phase_A_p, NetConsumption_Phase_A_p, TotalConsumption_Phase_A_p '
+        'FROM MeterReading_Wide '
+        'WHERE Timestamp >= FROM_UNIXTIME(%s) '
+        'ORDER BY Timestamp ASC, ReadingID ASC'
+    )
+}
+
+# SQL statements to get the most recent ReadingID (reading the table directly, so this uses the
+# primary key rather than the view).
+GET_LAST_READING_ID_SQL = {
+    'normalised': 'SELECT MAX(ReadingID) FROM MeterReading',
+    'wide': 'SELECT MAX(ReadingID) FROM MeterReading_Wide'
+}
+
+# SQL statement to read the coarse history from the rollups in database_meters_rollup.sql.
+GET_METER_READING_ROLLUPS_SQL = (
+    'SELECT PeriodStart, Production_Avg, NetConsumption_Avg, TotalConsumption_Avg '
+    'FROM MeterReading_Rollup_View '
+    'WHERE Resolution = %s AND PeriodStart >= FROM_UNIXTIME(%s) AND PeriodStart < FROM_UNIXTIME(%s) '
+    'ORDER BY PeriodStart ASC'
 )
 
-def add_results_from_database():
+def add_results_from_database(start_timestamp=None):
     """
-    Fetches and adds new meter readings from the database to the data lists.
+    Fetches and adds new meter readings from the database to the ring buffer.
 
     This function retrieves new meter readings from the database using the global cursor
-    'database_cursor' and the global SQL statement 'GET_METER_READINGS_SQL'. It then processes the
-    retrieved data and appends relevant information to the respective data lists.
+    'database_cursor' and the SQL statement in 'GET_METER_READINGS_SQL' for the database schema
+    (or 'GET_METER_READINGS_SINCE_SQL' if only the readings from a point in time are required). It
+    then processes the retrieved data in chunks and appends relevant information to the ring buffer.
+
+    Args:
+        start_timestamp (float, optional):
+            The epoch time of the earliest reading to read (rather than the readings after the last
+            seen ReadingID). Defaults to None.
 
     Returns:
         bool: True if new records were found and added, False otherwise.
@@ -84,32 +147,132 @@ def add_results_from_database():
     global last_seen_reading_id
 
     # Get the meter readings.
-    database_cursor.execute(GET_METER_READINGS_SQL, (last_seen_reading_id,))
+    if start_timestamp is None:
+        database_cursor.execute(GET_METER_READINGS_SQL[args.database_schema], (last_seen_reading_id,))
+    else:
+        database_cursor.execute(GET_METER_READINGS_SINCE_SQL[args.database_schema], (start_timestamp,))
 
     # A flag to determine if there were any new records added.
     found_records = False
 
-    # Take each of the new records and add them to the lists.
-    for (reading_id, timestamp, production_p, net_consumption_p, total_consumption_p) in database_cursor:
-        # Add the current date/time to the sample for the x-axis.
-        timestamp_data.append(timestamp)
+    # Take each chunk of the new records (rather than reading them all into memory at once).
+    while (rows := database_cursor.fetchmany(args.chunk_size)):
+        # Take each of the new records and add them to the ring buffer.
+        for (reading_id, timestamp, production_p, net_consumption_p, total_consumption_p) in rows:
+            # Add the sample (the database timestamps are in local time) in the order of the series.
+            # The current Production meter reading can read < 0 if energy (often a trace amount) is
+            # actually flowing the other way from the grid.
+            meter_data.append(timestamp.timestamp(), (max(0, production_p), 0-net_consumption_p, 0-total_consumption_p))
+
+            # We have seen at least one record.
+            found_records = True
+
+            # Update the last seen ID.
+            last_seen_reading_id = max(last_seen_reading_id, reading_id)
+
+    return found_records
+
+def add_rollups_from_database(resolution, start_timestamp, end_timestamp):
+    """
+    Fetches and adds the average of each rollup period from the database to the ring buffer.
+
+    This provides a coarse history (from database_meters_rollup.sql) without reading every reading.
+
+    Args:
+        resolution (int): The rollup resolution in seconds.
+        start_timestamp (float): The epoch time of the earliest rollup period to read.
+        end_timestamp (float): The epoch time before which the rollup periods are read.
 
-        # The current Production meter reading can read < 0 if energy (often a trace amount) is
-        # actually flowing the other way from the grid.
-        production_data.append(max(0, production_p))
+    Returns:
+        bool: True if any rollups were found and added, False otherwise.
+    """
 
-        # Consumption statistics.
-        consumption_net_data.append(0-net_consumption_p)
-        consumption_total_data.append(0-total_consumption_p)
+    # Get the rollups.
+    database_cursor.execute(GET_METER_READING_ROLLUPS_SQL, (resolution, start_timestamp, end_timestamp))
+
+    # A flag to determine if there were any rollups added.
+    found_records = False
 
-        # We have seen at least one record.
-        found_records = True
+    # Take each chunk of the rollups.
+    while (rows := database_cursor.fetchmany(args.chunk_size)):
+        # Take each of the rollups and add them to the ring buffer (in the same way as the readings).
+        for (period_start, production_avg, net_consumption_avg, total_consumption_avg) in rows:
+            meter_data.append(period_start.timestamp(), (max(0, production_avg), 0-net_consumption_avg, 0-total_consumption_avg))
 
-        # Update the last seen ID.
-        last_seen_reading_id = reading_id
+            # We have seen at least one rollup.
+            found_records = True
 
     return found_records
 
+def get_last_reading_id():
+    """
+    Gets the most recent ReadingID in the database.
+
+    This allows the animation to only read the new readings when there were no readings within the
+    window at startup (rather than reading the whole database).
+
+    Returns:
+        int: The most recent ReadingID (or 0 if there are no readings).
+    """
+
+    database_cursor.execute(GET_LAST_READING_ID_SQL[args.database_schema])
+    (reading_id,) = database_cursor.fetchone()
+
+    return reading_id or 0
+
+def update_plots(_=None):
+    """
+    Updates the plot data (decimated to the pixel width of the axes at the current zoom).
+
+    This is also called whenever the user changes the x-axis limits (such as when zooming).
+
+    Args:
+        _: Dummy argument for the axes callback.
+
+    Returns:
+        None
+    """
+
+    # Is there no data to plot yet?
+    if len(meter_data) == 0:
+        return
+
+    # The timestamps of the data (already matplotlib dates, so this is a view rather than a copy).
+    dates = meter_data.get_timestamps()
+
+    # The number of pixel columns that all the data spans at the current zoom.
+    x_lim = axes.get_xlim()
+    columns = int(axes.get_window_extent().width * (dates[-1] - dates[0]) / max(x_lim[1] - x_lim[0], 1e-9)) + 1
+
+    # Only the envelope of the data that can actually be seen is plotted.
+    dates, (production, consumption_total, consumption_net) = TimeSeriesRingBuffer.decimate(
+        dates,
+        [meter_data.get_series(PRODUCTION_SERIES), meter_data.get_series(CONSUMPTION_TOTAL_SERIES), meter_data.get_series(CONSUMPTION_NET_SERIES)],
+        columns
+    )
+
+    # Plot the data.
+    production_plot.set_data(dates, production)
+    consumption_total_plot.set_data(dates, consumption_total)
+    consumption_net_plot.set_data(dates, consumption_net)
+
+def on_xlim_changed(_):
+    """
+    Updates the plot data when the user changes the x-axis limits (such as when zooming).
+
+    Args:
+        _: Dummy argument for the axes callback.
+
+    Returns:
+        None
+    """
+
+    # Is the animation moving the limits? It updates the plot data itself once it has finished.
+    if autoscrolling:
+        return
+
+    update_plots()
+
 def on_pick(event):
     """
     Toggles the visibility of a plot and its associated annotation based on a legend line pick
@@ -166,16 +329,22 @@ def setup_plot():
     axes = figure.subplots()
     axes.set_facecolor('#DEDEDE')
 
+    # The x-axis is plotted as dates (shown in the local timezone).
+    axes.xaxis_date(tz=datetime.datetime.now().astimezone().tzinfo)
+
     # Annotate the axes.
     axes.set_title('Enphase® Gateway Meters\n')
     axes.set_xlabel('Time')
     axes.set_ylabel('Watts')
 
+    # The timestamps of the data (already matplotlib dates, so this is a view rather than a copy).
+    dates = meter_data.get_timestamps()
+
     # Plot the data.
     global production_plot, consumption_total_plot, consumption_net_plot
-    production_plot, = axes.plot(timestamp_data, production_data, c='#EC5E29', label='Production', marker='o', markevery=[-1])
-    consumption_total_plot, = axes.plot(timestamp_data, consumption_total_data, c='#29B7EC', label='Consumption', marker='o', markevery=[-1])
-    consumption_net_plot, = axes.plot(timestamp_data, consumption_net_data, c='#29EC5E', label='Export/Import', marker='o', markevery=[-1], visible=False)
+    production_plot, = axes.plot(dates, meter_data.get_series(PRODUCTION_SERIES), c='#EC5E29', label='Production', marker='o', markevery=[-1], animated=args.blit)
+    consumption_total_plot, = axes.plot(dates, meter_data.get_series(CONSUMPTION_TOTAL_SERIES), c='#29B7EC', label='Consumption', marker='o', markevery=[-1], animated=args.blit)
+    consumption_net_plot, = axes.plot(dates, meter_data.get_series(CONSUMPTION_NET_SERIES), c='#29EC5E', label='Export/Import', marker='o', markevery=[-1], visible=False, animated=args.blit)
 
     # Draw a horizontal line at 0 indicating import/export threshold.
     axes.axhline(linewidth=0.3, color='k')
@@ -187,11 +356,12 @@ def setup_plot():
     if args.continuous:
         axes.axhline(y=args.continuous, linewidth=1, color='y')
 
-    # Label the most recent result (at the end).
+    # The annotations that will label the most recent result (at the end).
     global production_annotation, consumption_total_annotation, consumption_net_annotation
-    production_annotation = axes.annotate(f'{production_data[-1]} W', xy=(timestamp_data[-1], production_data[-1]), xytext=(0, 5), textcoords='offset points')
-    consumption_total_annotation = axes.annotate(f'{consumption_total_data[-1]} W', xy=(timestamp_data[-1], consumption_total_data[-1]), xytext=(0, 5), textcoords='offset points')
-    consumption_net_annotation = axes.annotate(f'{consumption_net_data[-1]} W', xy=(timestamp_data[-1], consumption_net_data[-1]), xytext=(0, 5), textcoords='offset points', visible=False)
+    production_annotation = axes.annotate('', xy=(0, 0), xytext=(0, 5), textcoords='offset points', animated=args.blit)
+    consumption_total_annotation = axes.annotate('', xy=(0, 0), xytext=(0, 5), textcoords='offset points', animated=args.blit)
+    consumption_net_annotation = axes.annotate('', xy=(0, 0), xytext=(0, 5), textcoords='offset points', visible=False, animated=args.blit)
+    update_annotations()
 
     # Display the legend.
     legend = axes.legend()
@@ -219,14 +389,46 @@ def setup_plot():
     # Configure the axes' grid.
     axes.yaxis.grid(linestyle='dashed', alpha=0.8)
 
+    # Decimate the data whenever the user changes the zoom (and for the initial zoom).
+    axes.callbacks.connect('xlim_changed', on_xlim_changed)
+    update_plots()
+
+    # When blitting, the plots and annotations are drawn over the chart after each redraw.
+    if args.blit:
+        global blit_manager
+        blit_manager = BlitManager(figure, [production_plot, production_annotation, consumption_total_plot, consumption_total_annotation, consumption_net_plot, consumption_net_annotation])
+
     # Return the figure.
     return figure
 
+def update_annotations():
+    """
+    Updates the annotations that display the most recent values on the plot.
+
+    Returns:
+        None
+    """
+
+    # Is there no data to label yet?
+    if len(meter_data) == 0:
+        return
+
+    timestamp, values = meter_data.get_latest()
+
+    production_annotation.xy = (timestamp, values[PRODUCTION_SERIES])
+    production_annotation.set_text(f'{values[PRODUCTION_SERIES]:g} W')
+
+    consumption_total_annotation.xy = (timestamp, values[CONSUMPTION_TOTAL_SERIES])
+    consumption_total_annotation.set_text(f'{values[CONSUMPTION_TOTAL_SERIES]:g} W')
+
+    consumption_net_annotation.xy = (timestamp, values[CONSUMPTION_NET_SERIES])
+    consumption_net_annotation.set_text(f'{values[CONSUMPTION_NET_SERIES]:g} W')
+
 def update_axes():
     """
     Updates the plot data and annotations.
 
-    This function updates the plot data based on the latest data in the global data lists.
+    This function updates the plot data based on the latest data in the ring buffer.
     It also updates the annotations that display the most recent values on the plot.
 
     Returns:
@@ -234,19 +436,10 @@ def update_axes():
     """
 
     # Plot the data.
-    production_plot.set_data(timestamp_data, production_data)
-    consumption_total_plot.set_data(timestamp_data, consumption_total_data)
-    consumption_net_plot.set_data(timestamp_data, consumption_net_data)
+    update_plots()
 
     # Update the annotations.
-    production_annotation.xy = (timestamp_data[-1], production_data[-1])
-    production_annotation.set_text(f'{production_data[-1]} W')
-
-    consumption_total_annotation.xy = (timestamp_data[-1], consumption_total_data[-1])
-    consumption_total_annotation.set_text(f'{consumption_total_data[-1]} W')
-
-    consumption_net_annotation.xy = (timestamp_data[-1], consumption_net_data[-1])
-    consumption_net_annotation.set_text(f'{consumption_net_data[-1]} W')
+    update_annotations()
 
 def animate(_):
     """
@@ -265,8 +458,8 @@ def animate(_):
         None
     """
 
-    # Store this before it is potentially over-written.
-    most_recent_timestamp = timestamp_data[-1]
+    # Store this before it is potentially over-written (there is none until the first reading).
+    most_recent_timestamp = meter_data.get_latest()[0] if len(meter_data) > 0 else None
 
     # If there are no new meter readings to add then we skip re-drawing.
     if add_results_from_database():
@@ -278,28 +471,53 @@ def animate(_):
         old_y_lim = axes.get_ylim()
 
         # Check whether the current zoom included the old end datapoint
-        # (i.e. user appeared deliberately interested in fresh data).
-        user_viewing_recent_data = (old_x_lim[0] <= matplotlib.dates.date2num(most_recent_timestamp) <= old_x_lim[1])
+        # (i.e. user appeared deliberately interested in fresh data). With no earlier data, the
+        # chart is always scaled to the first readings.
+        user_viewing_recent_data = (most_recent_timestamp is None or old_x_lim[0] <= most_recent_timestamp <= old_x_lim[1])
 
         # Check whether the newest added data would now fall out of the old zoom view.
-        new_data_visible_in_old_view = (old_x_lim[0] <= matplotlib.dates.date2num(timestamp_data[-1]) <= old_x_lim[1])
-
-        # Ensure the axis are auto-scaled after adding new data.
-        axes.relim()
-        axes.autoscale()
-
-        # Update the toolbar memory to the new zoomed out axis limits.
-        figure.canvas.toolbar.update()
-        figure.canvas.toolbar.push_current()
-
-        # Was the user looking at old data before we added more data or were they looking at fresh
-        # data that now will be outside of their view.
-        if (not user_viewing_recent_data
-                or (user_viewing_recent_data and new_data_visible_in_old_view)):
-            # Restore old axis zoom (recent datapoint was never in zoom range anyway or zoom range
-            # still covers the new data).
-            axes.set_xlim(old_x_lim)
-            axes.set_ylim(old_y_lim)
+        new_data_visible_in_old_view = (old_x_lim[0] <= meter_data.get_latest()[0] <= old_x_lim[1])
+
+        # When blitting, only the plots and annotations are redrawn unless the zoom has to change.
+        if args.blit and (not user_viewing_recent_data or new_data_visible_in_old_view):
+            blit_manager.blit()
+            return
+
+        # The plots are decimated once the new limits are known (not for each change below).
+        global autoscrolling
+        autoscrolling = True
+
+        try:
+            # Ensure the axis are auto-scaled after adding new data.
+            axes.relim()
+            axes.autoscale()
+
+            # When blitting, leave room for the following data (so those frames can be blitted).
+            if args.blit:
+                new_x_lim = axes.get_xlim()
+                axes.set_xlim(new_x_lim[0], new_x_lim[1] + (new_x_lim[1] - new_x_lim[0]) * BLIT_HEADROOM)
+
+            # Update the toolbar memory to the new zoomed out axis limits.
+            figure.canvas.toolbar.update()
+            figure.canvas.toolbar.push_current()
+
+            # Was the user looking at old data before we added more data or were they looking at
+            # fresh data that now will be outside of their view.
+            if (not user_viewing_recent_data
+                    or (user_viewing_recent_data and new_data_visible_in_old_view)):
+                # Restore old axis zoom (recent datapoint was never in zoom range anyway or zoom
+                # range still covers the new data).
+                axes.set_xlim(old_x_lim)
+                axes.set_ylim(old_y_lim)
+        finally:
+            autoscrolling = False
+
+        # Decimate the plots to the new limits.
+        update_plots()
+
+        # When blitting, the whole chart is only redrawn when the zoom changes.
+        if args.blit:
+            figure.canvas.draw_idle()
 
 def main():
     """
@@ -323,11 +541,17 @@ def main():
     database_group.add_argument('/DBUsername', '-DBUsername', '--DBUsername', dest='database_username', default='root', help='The database username (defaults to "root").')
     database_group.add_argument('/DBPassword', '-DBPassword', '--DBPassword', dest='database_password', default='', help='The database password (defaults to blank).')
     database_group.add_argument('/DBDatabase', '-DBDatabase', '--DBDatabase', dest='database_database', default='Enphase', help='The database schema (defaults to "Enphase").')
+    database_group.add_argument('/Schema', '-Schema', '--Schema', dest='database_schema', choices=list(GET_METER_READINGS_SQL), default='normalised', help='The layout of the database; "normalised" (database_meters.sql) or "wide" (database_meters_wide.sql) (defaults to "normalised").')
 
     # Arguments to control how the program generally behaves.
     general_group = parser.add_argument_group('General')
     general_group.add_argument('/Animate', '-Animate', '--Animate', action='store_true', dest='animate', help='Allow chart to refresh every 10 seconds.')
+    general_group.add_argument('/Blit', '-Blit', '--Blit', action='store_true', dest='blit', help='Only redraw the plots and annotations when animating (unless the zoom has to change).')
     general_group.add_argument('/From', '-From', '--From', type=int, dest='start_from', help='The earliest ReadingID to read from.')
+    general_group.add_argument('/Window', '-Window', '--Window', type=float, dest='window', help='The number of hours of readings to load at startup (defaults to the retention).')
+    general_group.add_argument('/Rollup', '-Rollup', '--Rollup', type=int, dest='rollup', choices=[60, 900, 3600, 86400], help='Fill the rest of the retention before the window with the averages of these rollup periods in seconds (database_meters_rollup.sql).')
+    general_group.add_argument('/ChunkSize', '-ChunkSize', '--ChunkSize', type=int, dest='chunk_size', default=10000, help='The number of rows fetched from the database at a time (defaults to 10000).')
+    general_group.add_argument('/Retention', '-Retention', '--Retention', type=float, dest='retention', default=24, help='The number of hours of readings to keep (defaults to 24).')
     general_group.add_argument('/Peak', '-Peak', '--Peak', type=int, dest='peak', help='The peak wattage from array (num of inverters * 366 for IQ 7A) before clipping.')
     general_group.add_argument('/Continuous', '-Continuous', '--Continuous', type=int, dest='continuous', help='The maximum continuous wattage from array (num of inverters * 349 for IQ 7A) before clipping.')
 
@@ -356,17 +580,44 @@ def main():
         if args.start_from:
             last_seen_reading_id = args.start_from
 
-        # Add the inital batch of records from the database to the lists.
-        print('Loading existing records in database (this may take a while).')
-        add_results_from_database()
+        # Preallocate the ring buffer for the data (readings are approximately every second).
+        global meter_data
+        retention = args.retention * 60 * 60
+        meter_data = TimeSeriesRingBuffer(capacity=int(retention) + 1, number_of_series=3, retention=retention, time_scale=TimeSeriesRingBuffer.SECONDS_PER_DAY)
+
+        # Add the inital batch of records from the database to the ring buffer.
+        print('Loading existing records in database.')
+
+        # Is the user starting from a particular ReadingID?
+        if args.start_from:
+            add_results_from_database()
+        else:
+            # Only the readings within the window are loaded (rather than the whole database).
+            window = retention if args.window is None else min(args.window * 60 * 60, retention)
+            start_timestamp = datetime.datetime.now().timestamp() - window
+
+            # The rest of the retention can be filled with the (much fewer) rollups.
+            if args.rollup and window < retention:
+                add_rollups_from_database(args.rollup, start_timestamp - (retention - window), start_timestamp)
+
+            # Without any readings in the window, the animation only reads the readings after the
+            # most recent one (rather than the whole database).
+            if not add_results_from_database(start_timestamp):
+                last_seen_reading_id = get_last_reading_id()
+
         print('Loaded existing records.')
 
         # Draw the initial plot.
         global figure
         figure = setup_plot()
 
-        # Set a timer to animate the chart every 5 seconds.
-        if args.animate:
+        # Set a timer to animate the chart every 5 seconds (when blitting, the animation draws the
+        # chart itself rather than the whole chart being redrawn for every frame).
+        if args.animate and args.blit:
+            animation_timer = figure.canvas.new_timer(interval=5000)
+            animation_timer.add_callback(animate, None)
+            animation_timer.start()
+        elif args.animate:
             _ = animation.FuncAnimation(figure, animate, interval=5000)
 
         # Show the plot screen.
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# This file is part of Enphase-API <https://github.com/Matthew1471/Enphase-API>
+# Copyright (C) 2023 Matthew1471!
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+This example provides functionality to aggregate the meter readings in a MySQL®/MariaDB® database
+into 1 minute, 15 minute, hourly and daily rollups (schema is in resources/database_meters_rollup.sql).
+
+The rollups are maintained incrementally; each run only reads the readings after the last
+processed ReadingID, so it can be run repeatedly (or left running with /Follow) to catch up.
+"""
+
+import argparse # We support command line arguments.
+import datetime # We output the current date/time for debugging.
+import time     # We delay between each catch up when following.
+
+import mysql.connector # Third party library; "pip install mysql-connector-python"
+
+# The resolution (in seconds) of each of the rollups.
+ROLLUP_RESOLUTIONS = (60, 900, 3600, 86400)
+
+# Readings further apart than this (in seconds) are treated as a gap in the data (so no energy is
+# integrated between them).
+MAXIMUM_INTEGRATION_GAP = 10
+
+# SQL statements (for the schema in database_meters.sql and the schema in database_meters_wide.sql).
+GET_METER_READINGS_SQL = {
+    'normalised': (
+        'SELECT ReadingID, Timestamp, Production_P, NetConsumption_P, TotalConsumption_P '
+        'FROM MeterReading_SinglePhase_View '
+        'WHERE ReadingID > %s '
+        'ORDER BY ReadingID ASC '
+        'LIMIT %s'
+    ),
+    'wide': (
+        'SELECT ReadingID, Timestamp, Production_Phase_A_p, NetConsumption_Phase_A_p, TotalConsumption_Phase_A_p '
+        'FROM MeterReading_Wide '
+        'WHERE ReadingID > %s '
+        'ORDER BY ReadingID ASC '
+        'LIMIT %s'
+    )
+}
+
+# The state row is locked so two jobs cannot both add the same readings to the rollups.
+GET_ROLLUP_STATE_SQL = (
+    'SELECT LastReadingID, LastTimestamp FROM MeterReading_Rollup_State WHERE StateID = 1 FOR UPDATE'
+)
+
+UPDATE_ROLLUP_STATE_SQL = (
+    'UPDATE MeterReading_Rollup_State SET LastReadingID = %s, LastTimestamp = %s WHERE StateID = 1'
+)
+
+# A rollup period may already exist (from an earlier run), if so it is merged with this run's values.
+ADD_ROLLUP_SQL = (
+    'INSERT INTO MeterReading_Rollup (Resolution, PeriodStart, Samples, '
+    'Production_Sum, Production_Min, Production_Max, Production_Wh, '
+    'NetConsumption_Sum, NetConsumption_Min, NetConsumption_Max, NetConsumption_Wh, '
+    'NetConsumption_Import_Wh, NetConsumption_Export_Wh, '
+    'TotalConsumption_Sum, TotalConsumption_Min, TotalConsumption_Max, TotalConsumption_Wh'
+    ') VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) '
+    'ON DUPLICATE KEY UPDATE '
+    'Samples = Samples + VALUES(Samples), '
+    'Production_Sum = Production_Sum + VALUES(Production_Sum), '
+    'Production_Min = LEAST(COALESCE(Production_Min, VALUES(Production_Min)), COALESCE(VALUES(Production_Min), Production_Min)), '
+    'Production_Max = GREATEST(COALESCE(Production_Max, VALUES(Production_Max)), COALESCE(VALUES(Production_Max), Production_Max)), '
+    'Production_Wh = Production_Wh + VALUES(Production_Wh), '
+    'NetConsumption_Sum = NetConsumption_Sum + VALUES(NetConsumption_Sum), '
+    'NetConsumption_Min = LEAST(COALESCE(NetConsumption_Min, VALUES(NetConsumption_Min)), COALESCE(VALUES(NetConsumption_Min), NetConsumption_Min)), '
+    'NetConsumption_Max = GREATEST(COALESCE(NetConsumption_Max, VALUES(NetConsumption_Max)), COALESCE(VALUES(NetConsumption_Max), NetConsumption_Max)), '
+    'NetConsumption_Wh = NetConsumption_Wh + VALUES(NetConsumption_Wh), '
+    'NetConsumption_Import_Wh = NetConsumption_Import_Wh + VALUES(NetConsumption_Import_Wh), '
+    'NetConsumption_Export_Wh = NetConsumption_Export_Wh + VALUES(NetConsumption_Export_Wh), '
+    'TotalConsumption_Sum = TotalConsumption_Sum + VALUES(TotalConsumption_Sum), '
+    'TotalConsumption_Min = LEAST(COALESCE(TotalConsumption_Min, VALUES(TotalConsumption_Min)), COALESCE(VALUES(TotalConsumption_Min), TotalConsumption_Min)), '
+    'TotalConsumption_Max = GREATEST(COALESCE(TotalConsumption_Max, VALUES(TotalConsumption_Max)), COALESCE(VALUES(TotalConsumption_Max), TotalConsumption_Max)), '
+    'TotalConsumption_Wh = TotalConsumption_Wh + VALUES(TotalConsumption_Wh)'
+)
+
+class MeterRollup:
+    """
+    A class to aggregate the readings within a single rollup period.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty rollup period.
+        """
+
+        # The number of readings in this period.
+        self.samples = 0
+
+        # The sum, minimum, maximum and integrated energy (Wh) of each of the production,
+        # net-consumption and total-consumption meters (minimum and maximum are None until a
+        # reading from that meter is seen).
+        self.meters = [[0.0, None, None, 0.0] for _ in range(3)]
+
+        # The energy imported from (and exported to) the grid.
+        self.import_wh = 0.0
+        self.export_wh = 0.0
+
+    def add(self, duration, powers):
+        """
+        Add a reading to this rollup period.
+
+        Args:
+            duration (float):
+                The seconds since the previous reading (the time this reading's power is
+                integrated over).
+            powers (tuple):
+                The production, net-consumption and total-consumption power (None if the meter
+                is not present).
+        """
+
+        self.samples += 1
+
+        # Take each of the meters.
+        for meter, power in zip(self.meters, powers):
+            # Is this meter not present?
+            if power is None:
+                continue
+
+            meter[0] += power
+            meter[1] = power if meter[1] is None else min(meter[1], power)
+            meter[2] = power if meter[2] is None else max(meter[2], power)
+            meter[3] += power * duration / 3600
+
+        # A positive net-consumption is imported from the grid, a negative is exported.
+        net_consumption = powers[1]
+        if net_consumption is not None:
+            if net_consumption >= 0:
+                self.import_wh += net_consumption * duration / 3600
+            else:
+                self.export_wh -= net_consumption * duration / 3600
+
+    def get_parameters(self, resolution, period_start):
+        """
+        Get the SQL parameters to add (or merge) this rollup period to the database.
+
+        Args:
+            resolution (int): The resolution (in seconds) of this rollup.
+            period_start (datetime.datetime): The start of this rollup period.
+
+        Returns:
+            tuple: The parameters for ADD_ROLLUP_SQL.
+        """
+
+        production, net_consumption, total_consumption = self.meters
+
+        return (
+            resolution, period_start, self.samples,
+            *production,
+            *net_consumption, self.import_wh, self.export_wh,
+            *total_consumption
+        )
+
+def get_period_start(timestamp, resolution):
+    """
+    Get the start of the rollup period containing a timestamp.
+
+    Periods are aligned to midnight (in the database's time zone) so a daily rollup is a calendar
+    day, the same as the DATE() of each reading in MeterReading_Statistics_View.
+
+    Args:
+        timestamp (datetime.datetime): The timestamp of the reading.
+        resolution (int): The resolution (in seconds) of the rollup (which must divide a day).
+
+    Returns:
+        datetime.datetime: The start of the period.
+    """
+
+    # The seconds since midnight (rounded down to the start of the period).
+    seconds = (timestamp.hour * 3600) + (timestamp.minute * 60) + timestamp.second
+    seconds -= seconds % resolution
+
+    return timestamp.replace(hour=seconds // 3600, minute=(seconds // 60) % 60, second=seconds % 60, microsecond=0)
+
+def add_readings_to_rollups(database_connection, database_cursor, database_schema, chunk_size):
+    """
+    Adds the next chunk of unprocessed readings to the rollups.
+
+    The rollups and the last processed ReadingID are committed together, so a chunk is either
+    fully added to the rollups or not at all.
+
+    Args:
+        database_connection (MySQLConnection):
+            The database connection.
+        database_cursor (MySQLCursor):
+            The cursor for reading the meter readings and writing the rollups.
+        database_schema (str):
+            The schema of the readings ("normalised" or "wide").
+        chunk_size (int):
+            The maximum number of readings to add.
+
+    Returns:
+        int: The number of readings added to the rollups.
+    """
+
+    # Get (and lock) the last processed reading.
+    database_cursor.execute(GET_ROLLUP_STATE_SQL)
+    last_reading_id, last_timestamp = database_cursor.fetchone()
+
+    # Get the next chunk of readings.
+    database_cursor.execute(GET_METER_READINGS_SQL[database_schema], (last_reading_id, chunk_size))
+    meter_readings = database_cursor.fetchall()
+
+    # The rollup for each resolution and period within this chunk.
+    rollups = {}
+
+    # Take each of the readings.
+    for (reading_id, timestamp, production_p, net_consumption_p, total_consumption_p) in meter_readings:
+
+        # The power is integrated over the time since the previous reading (unless this is the
+        # first reading or there was a gap in the readings).
+        duration = (timestamp - last_timestamp).total_seconds() if last_timestamp else 0
+        if not 0 < duration <= MAXIMUM_INTEGRATION_GAP:
+            duration = 0
+
+        # The database returns DECIMAL values.
+        powers = tuple(None if power is None else float(power) for power in (production_p, net_consumption_p, total_consumption_p))
+
+        # Add this reading to the period of each of the resolutions.
+        for resolution in ROLLUP_RESOLUTIONS:
+            key = (resolution, get_period_start(timestamp, resolution))
+
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollup = rollups[key] = MeterRollup()
+
+            rollup.add(duration, powers)
+
+        last_reading_id = reading_id
+        last_timestamp = timestamp
+
+    # Were there any new readings?
+    if meter_readings:
+        # Add (or merge) each of the rollup periods (as a single multi-row INSERT).
+        database_cursor.executemany(
+            ADD_ROLLUP_SQL,
+            [rollup.get_parameters(resolution, period_start) for (resolution, period_start), rollup in rollups.items()]
+        )
+
+        # Record the last processed reading.
+        database_cursor.execute(UPDATE_ROLLUP_STATE_SQL, (last_reading_id, last_timestamp))
+
+    # Commit the rollups and the state together (this also releases the lock).
+    database_connection.commit()
+
+    return len(meter_readings)
+
+def main():
+    """
+    Main function for aggregating the meter readings in a MySQL®/MariaDB® database into rollups.
+
+    This function handles command line arguments, connects to the database and adds any
+    unprocessed readings to the rollups in chunks. If /Follow is specified it then repeats.
+
+    Returns:
+        None
+    """
+
+    # Create an instance of argparse to handle any command line arguments.
+    parser = argparse.ArgumentParser(prefix_chars='/-', add_help=False, description='A program that aggregates the meter readings in an MySQL®/MariaDB® database into rollups.')
+
+    # Arguments to control the database connection.
+    database_group = parser.add_argument_group('Database')
+    database_group.add_argument('/DBHost', '-DBHost', '--DBHost', dest='database_host', default='127.0.0.1', help='The database server host (defaults to "127.0.0.1").')
+    database_group.add_argument('/DBUsername', '-DBUsername', '--DBUsername', dest='database_username', default='root', help='The database username (defaults to "root").')
+    database_group.add_argument('/DBPassword', '-DBPassword', '--DBPassword', dest='database_password', default='', help='The database password (defaults to blank).')
+    database_group.add_argument('/DBDatabase', '-DBDatabase', '--DBDatabase', dest='database_database', default='Enphase', help='The database schema (defaults to "Enphase").')
+    database_group.add_argument('/Schema', '-Schema', '--Schema', dest='database_schema', choices=list(GET_METER_READINGS_SQL), default='normalised', help='The layout of the database; "normalised" (database_meters.sql) or "wide" (database_meters_wide.sql) (defaults to "normalised").')
+
+    # Arguments to control how the program generally behaves.
+    general_group = parser.add_argument_group('General')
+    general_group.add_argument('/ChunkSize', '-ChunkSize', '--ChunkSize', type=int, dest='chunk_size', default=10000, help='The maximum number of readings added to the rollups in each transaction (defaults to 10000).')
+    general_group.add_argument('/Follow', '-Follow', '--Follow', type=int, dest='follow', help='Keep running, catching up again after this many seconds.')
+
+    # We want this to appear last in the argument usage list.
+    general_group.add_argument('/?', '/Help', '/help', '-h','--help','-help', action='help', help='Show this help message and exit.')
+
+    # Handle any command line arguments.
+    args = parser.parse_args()
+
+    # Connect to the MySQL®/MariaDB® database.
+    with mysql.connector.connect(
+        user=args.database_username,
+        password=args.database_password,
+        host=args.database_host,
+        database=args.database_database
+    ) as database_connection:
+
+        # Get a reference to a database cursor.
+        database_cursor = database_connection.cursor()
+
+        try:
+            # Repeat (if following) unless the user presses CTRL + C.
+            while True:
+                # Keep adding chunks until the rollups have caught up.
+                total_readings = 0
+                while True:
+                    readings = add_readings_to_rollups(
+                        database_connection=database_connection,
+                        database_cursor=database_cursor,
+                        database_schema=args.database_schema,
+                        chunk_size=args.chunk_size
+                    )
+
+                    total_readings += readings
+
+                    # Was this the last (partial) chunk?
+                    if readings < args.chunk_size:
+                        break
+
+                # Notify the user.
+                print(f'{datetime.datetime.now()} - Added {total_readings} readings to the rollups.', flush=True)
+
+                # Is the program only catching up once?
+                if not args.follow:
+                    break
+
+                time.sleep(args.follow)
+        except KeyboardInterrupt:
+            # Notify the user.
+            print(f'{datetime.datetime.now()} - Shutting down.', flush=True)
+
+# Launch the main method if invoked directly.
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -20,19 +20,330 @@
 This example provides functionality to interact with the Enphase® IQ Gateway API for monitoring
 solar energy production and consumption data and publish that data to an AMQP broker
 (such as RabbitMQ®) for consumption by other example scripts.
+
+Readings are spooled to disk whilst the AMQP broker is unavailable (and replayed once it returns).
 """
 
-import datetime # We output the current date/time for debugging.
-import json     # This script makes heavy use of JSON parsing.
-import os.path  # We check whether a file exists.
-import time     # We use the current epoch seconds for reading times and to delay.
+import concurrent.futures # Each published message completes a future when it is confirmed.
+import datetime           # We output the current date/time for debugging.
+import json               # This script makes heavy use of JSON parsing.
+import os.path            # We check whether a file exists.
+import queue              # Messages wait in a bounded queue to be published.
+import sys                # We write to stderr.
+import threading          # The AMQP connection runs in its own thread.
+import time               # We use the current epoch seconds for reading times.
 
-import pika     # Third party library; "pip install pika"
+import pika               # Third party library; "pip install pika"
+import requests.exceptions # We handle some of the exceptions we might get back.
 
 # All the shared Enphase® functions are in these packages.
 from enphase_api.cloud.authentication import Authentication
 from enphase_api.local.gateway import Gateway
+from enphase_api.local.meter_stream_codec import MeterStreamCodec
+from enphase_api.local.poll_scheduler import PollScheduler
+from enphase_api.local.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+from enphase_api.local.response_deduplicator import ResponseDeduplicator
+from enphase_api.local.spool import Spool
+
+
+class AMQPPublisher:
+    """
+    A class to publish messages to an AMQP topic exchange with publisher confirms.
 
+    The connection runs in its own thread (using a pika SelectConnection) so publishing does not
+    wait for the broker; each publish returns a future that completes once the broker confirms
+    (or rejects) the message. Confirms are handled as the broker sends them (which may cover many
+    messages at once). If the connection is lost it is re-established (with backoff) and the
+    exchange is declared again.
+    """
+
+    def __init__(self, parameters, exchange, exchange_type='topic', maximum_queue_size=1000, reconnect_delay=1, maximum_reconnect_delay=60):
+        """
+        Initialize the publisher (and start its connection thread).
+
+        Args:
+            parameters (pika.ConnectionParameters):
+                The AMQP connection parameters.
+            exchange (str):
+                The exchange to publish to (declared as durable if it does not already exist).
+            exchange_type (str, optional):
+                The type of the exchange. Defaults to 'topic'.
+            maximum_queue_size (int, optional):
+                The maximum number of messages waiting to be sent to the broker. Defaults to 1000.
+            reconnect_delay (float, optional):
+                Seconds to wait before the first reconnection attempt (this doubles for each
+                consecutive failure). Defaults to 1.
+            maximum_reconnect_delay (float, optional):
+                The maximum number of seconds to wait between reconnection attempts.
+                Defaults to 60.
+        """
+
+        self.parameters = parameters
+        self.exchange = exchange
+        self.exchange_type = exchange_type
+        self.reconnect_delay = reconnect_delay
+        self.maximum_reconnect_delay = maximum_reconnect_delay
+
+        # The messages (and their futures) waiting to be sent to the broker.
+        self.outbound = queue.Queue(maxsize=maximum_queue_size)
+
+        # The futures of the messages sent but not yet confirmed (by delivery tag).
+        self.unconfirmed = {}
+
+        # The connection, channel and last delivery tag (only used by the connection thread).
+        self.connection = None
+        self.channel = None
+        self.delivery_tag = None
+
+        # The number of consecutive failed connection attempts.
+        self.failures = 0
+
+        # Set when the publisher is being closed.
+        self.closing = threading.Event()
+
+        # Start the connection thread.
+        self.thread = threading.Thread(target=self._run, name='AMQPPublisher', daemon=True)
+        self.thread.start()
+
+    def publish(self, routing_key, body, properties=None, timeout=None):
+        """
+        Queue a message to be published (this does not wait for the broker).
+
+        Args:
+            routing_key (str): The routing key of the message.
+            body (bytes): The message body.
+            properties (pika.BasicProperties, optional): The message properties. Defaults to None.
+            timeout (float, optional):
+                Seconds to wait if the outbound queue is full. Defaults to None (wait forever).
+
+        Returns:
+            concurrent.futures.Future: Completes when the broker confirms the message.
+
+        Raises:
+            queue.Full: If the outbound queue is still full after the timeout.
+        """
+
+        future = concurrent.futures.Future()
+
+        self.outbound.put((routing_key, body, properties, future), timeout=timeout)
+
+        # Wake the connection thread (if it is connected, otherwise it sends once connected).
+        connection = self.connection
+        if connection is not None:
+            try:
+                connection.ioloop.add_callback_threadsafe(self._send_outbound)
+            except pika.exceptions.AMQPError:
+                pass
+
+        return future
+
+    def close(self):
+        """
+        Close the connection and stop the connection thread.
+
+        Any messages not yet confirmed (or not yet sent) fail with a ConnectionError (unless they
+        were cancelled).
+        """
+
+        self.closing.set()
+
+        # Ask the connection thread to close the connection.
+        connection = self.connection
+        if connection is not None:
+            try:
+                connection.ioloop.add_callback_threadsafe(self._close_connection)
+            except pika.exceptions.AMQPError:
+                pass
+
+        self.thread.join()
+
+        # Fail anything that was never sent (a cancelled future cannot be failed).
+        while not self.outbound.empty():
+            future = self.outbound.get_nowait()[3]
+            if future.set_running_or_notify_cancel():
+                future.set_exception(ConnectionError('The AMQP publisher has been closed.'))
+
+    def _run(self):
+        """
+        The connection thread; connects (and reconnects) to the broker and runs its I/O loop.
+        """
+
+        while not self.closing.is_set():
+            # Connect to the AMQP broker (the callbacks below run within the I/O loop).
+            self.connection = pika.SelectConnection(
+                parameters=self.parameters,
+                on_open_callback=self._on_connection_open,
+                on_open_error_callback=self._on_connection_open_error,
+                on_close_callback=self._on_connection_closed
+            )
+
+            # Runs until the connection is closed (or fails to open).
+            self.connection.ioloop.start()
+
+            # Anything sent but not confirmed has to be treated as not delivered.
+            for future in self.unconfirmed.values():
+                future.set_exception(ConnectionError('The AMQP connection was lost before the message was confirmed.'))
+
+            self.unconfirmed.clear()
+            self.connection = None
+            self.channel = None
+            self.delivery_tag = None
+
+            # Back off before reconnecting (doubling each consecutive failure).
+            if not self.closing.is_set():
+                self.failures += 1
+                self.closing.wait(min(self.reconnect_delay * (2 ** (self.failures - 1)), self.maximum_reconnect_delay))
+
+    def _close_connection(self):
+        """
+        Close the connection (from within the I/O loop).
+
+        A connection that is still opening is also closed (so closing does not wait for it to open).
+        """
+
+        if not (self.connection.is_closing or self.connection.is_closed):
+            self.connection.close()
+
+    def _on_connection_open(self, connection):
+        """
+        Open a channel once the connection is open.
+        """
+
+        # Was the publisher closed while the connection was opening?
+        if self.closing.is_set():
+            self._close_connection()
+            return
+
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_open_error(self, connection, exception):
+        """
+        Stop the I/O loop if the connection could not be opened (it will be retried).
+        """
+
+        connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason):
+        """
+        Stop the I/O loop once the connection is closed (it will be reconnected unless closing).
+        """
+
+        connection.ioloop.stop()
+
+    def _on_channel_open(self, channel):
+        """
+        Declare the exchange once the channel is open.
+        """
+
+        self.channel = channel
+
+        # Was the publisher closed while the channel was opening?
+        if self.closing.is_set():
+            self._close_connection()
+            return
+
+        # A closed channel (e.g. the exchange was declared differently) closes the connection.
+        channel.add_on_close_callback(self._on_channel_closed)
+
+        # Declare the exchange if it does not already exist (including after a broker restart).
+        channel.exchange_declare(
+            exchange=self.exchange,
+            exchange_type=self.exchange_type,
+            durable=True,
+            callback=self._on_exchange_declared
+        )
+
+    def _on_channel_closed(self, channel, reason):
+        """
+        Close the connection when the channel closes (so it is re-established).
+        """
+
+        self._close_connection()
+
+    def _on_exchange_declared(self, _):
+        """
+        Enable publisher confirms once the exchange has been declared.
+        """
+
+        # Was the publisher closed while the exchange was being declared?
+        if self.closing.is_set():
+            self._close_connection()
+            return
+
+        self.channel.confirm_delivery(ack_nack_callback=self._on_delivery_confirmation, callback=self._on_confirm_selected)
+
+    def _on_confirm_selected(self, _):
+        """
+        Start sending messages once publisher confirms are enabled.
+        """
+
+        # Was the publisher closed while publisher confirms were being enabled?
+        if self.closing.is_set():
+            self._close_connection()
+            return
+
+        # Delivery tags restart on each channel.
+        self.delivery_tag = 0
+
+        # This connection attempt succeeded.
+        self.failures = 0
+
+        # Send anything that was queued while disconnected.
+        self._send_outbound()
+
+    def _send_outbound(self):
+        """
+        Send each of the queued messages to the broker (from within the I/O loop).
+        """
+
+        # Is the channel not yet ready (publisher confirms are not yet enabled)?
+        if self.channel is None or not self.channel.is_open or self.delivery_tag is None:
+            return
+
+        while True:
+            try:
+                routing_key, body, properties, future = self.outbound.get_nowait()
+            except queue.Empty:
+                return
+
+            # Was the message cancelled (e.g. its batch timed out) before it was sent?
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            self.channel.basic_publish(
+                exchange=self.exchange,
+                routing_key=routing_key,
+                body=body,
+                properties=properties
+            )
+
+            # The broker numbers each message on the channel.
+            self.delivery_tag += 1
+            self.unconfirmed[self.delivery_tag] = future
+
+    def _on_delivery_confirmation(self, method_frame):
+        """
+        Complete the futures of the messages the broker has confirmed (or rejected).
+        """
+
+        method = method_frame.method
+        confirmed = isinstance(method, pika.spec.Basic.Ack)
+
+        # A single confirmation can cover every message up to (and including) this delivery tag.
+        if method.multiple:
+            delivery_tags = [delivery_tag for delivery_tag in self.unconfirmed if delivery_tag <= method.delivery_tag]
+        else:
+            delivery_tags = [method.delivery_tag]
+
+        for delivery_tag in delivery_tags:
+            future = self.unconfirmed.pop(delivery_tag, None)
+            if future is None:
+                continue
+
+            if confirmed:
+                future.set_result(delivery_tag)
+            else:
+                future.set_exception(ConnectionError('The AMQP broker rejected the message.'))
 
 def get_secure_gateway_session(credentials):
     """
@@ -70,8 +381,19 @@ def get_secure_gateway_session(credentials):
     if not os.path.exists('configuration/gateway.cer'):
         Gateway.trust_gateway(host)
 
-    # Instantiate the Gateway API wrapper (with the default library hostname if None provided).
-    gateway = Gateway(host)
+    # Instantiate the Gateway API wrapper (with the default library hostname if None provided),
+    # an expired session is renewed with the same token and the session is persisted so a restart
+    # can reuse it. The polled endpoints respond quickly, so a short timeout stops a stalled request
+    # from holding up the next poll. Idempotent requests are retried and fail fast whilst the
+    # gateway is unreachable.
+    gateway = Gateway(
+        host,
+        reauthenticate=True,
+        session_file=Gateway.DEFAULT_SESSION_FILE,
+        timeout=(credentials.get('gateway_connect_timeout', 5), credentials.get('gateway_read_timeout', 10)),
+        retry_policy=RetryPolicy(),
+        circuit_breaker=CircuitBreaker()
+    )
 
     # Are we not able to login to the gateway?
     if not gateway.login(credentials['gateway_token']):
@@ -134,32 +456,143 @@ def main():
         client_properties=client_properties
     )
 
-    # Connect to the AMQP broker.
-    with pika.BlockingConnection(parameters=amqp_parameters) as amqp_connection:
-        # Get reference to the virtual channel within AMQP.
-        amqp_channel = amqp_connection.channel()
+    # The encoding of each message (JSON, or the more compact binary or MessagePack encodings).
+    amqp_content_type = credentials.get('amqp_content_type', MeterStreamCodec.CONTENT_TYPE_JSON)
+
+    # Consumers decode each message based on its content type.
+    amqp_properties = pika.BasicProperties(content_type=amqp_content_type)
+
+    # How long to wait for the broker to confirm a batch of messages.
+    amqp_confirm_timeout = credentials.get('amqp_confirm_timeout', 30)
+
+    def amqp_sink(readings):
+        """
+        Publishes a batch of readings from the spool to the AMQP broker and waits for the broker
+        to confirm the whole batch.
+
+        Args:
+            readings (list): A list of (timestamp, json_object) readings.
+        """
+
+        # Encode the whole batch first (so a reading that cannot be encoded fails the batch before
+        # any of it is published).
+        bodies = [MeterStreamCodec.encode(timestamp, response, amqp_content_type) for timestamp, response in readings]
+
+        # Queue each of the readings to be published (without waiting for each confirmation).
+        futures = []
+        try:
+            for body in bodies:
+                futures.append(
+                    amqp_publisher.publish(
+                        routing_key='MeterStream',
+                        body=body,
+                        properties=amqp_properties,
+                        timeout=amqp_confirm_timeout
+                    )
+                )
+        except BaseException:
+            # The batch stays in the spool, so do not send the part of it that was queued.
+            for future in futures:
+                future.cancel()
+            raise
+
+        # Wait for the broker to confirm them all (any failure leaves the batch in the spool).
+        done, not_done = concurrent.futures.wait(futures, timeout=amqp_confirm_timeout)
+
+        if not_done:
+            # Do not send anything still queued (the batch will be published again from the spool).
+            for future in not_done:
+                future.cancel()
+
+            raise TimeoutError(f'{len(not_done)} of {len(futures)} messages were not confirmed by the AMQP broker.')
+
+        for future in done:
+            future.result()
+
+    def amqp_error(exception):
+        """
+        Notifies the user that the AMQP broker is unavailable (the readings are spooled to disk).
+
+        Args:
+            exception (Exception): The exception raised while publishing to the AMQP broker.
+        """
+
+        print(f'{datetime.datetime.now()} - Unable to publish readings to AMQP (spooling to disk):\n {exception!r}', file=sys.stderr, flush=True)
+
+    # Publish to the AMQP broker (reconnecting automatically).
+    amqp_publisher = AMQPPublisher(
+        parameters=amqp_parameters,
+        exchange='Enphase',
+        maximum_queue_size=credentials.get('amqp_queue_size', 1000)
+    )
 
-        # Declare a topic exchange if one does not already exist.
-        amqp_channel.exchange_declare(exchange='Enphase', exchange_type='topic', durable=True)
+    # Readings are spooled to disk whilst the AMQP broker is unavailable (and replayed once it
+    # returns). Readings that cannot be encoded are moved to a dead-letter file in the spool
+    # directory.
+    with Spool(
+        directory=credentials.get('spool_directory', 'configuration/spool/amqp'),
+        sink=amqp_sink,
+        fsync=credentials.get('spool_fsync', Spool.FSYNC_SEGMENT),
+        error_callback=amqp_error,
+        permanent_errors=(ValueError, KeyError, TypeError),
+        maximum_attempts=credentials.get('spool_maximum_attempts'),
+        close_timeout=credentials.get('spool_close_timeout', 30)
+    ) as spool:
 
         # Notify the user.
         print(f'{datetime.datetime.now()} - Collecting meter readings. To exit press CTRL+C', flush=True)
 
-        try:
-            # Repeat forever unless the user presses CTRL + C.
-            while True:
+        # Optionally readings that have not changed (other than when they were created) are not
+        # spooled, although an unchanged reading is still spooled every dedup_maximum_age seconds.
+        if credentials.get('dedup_readings', False):
+            deduplicator = ResponseDeduplicator(
+                fields={'/ivp/meters/reports': lambda readings: [(meter_readings['reportType'], meter_readings['cumulative'], meter_readings['lines']) for meter_readings in readings]},
+                maximum_age=credentials.get('dedup_maximum_age', 60)
+            )
+        else:
+            deduplicator = None
+
+        def poll_meter_reports():
+            """
+            Requests the meter reports and adds them to the spool (unless they are unchanged).
+
+            Returns:
+                list: The meter reports (or None if the gateway was unreachable).
+            """
+
+            try:
                 # Request the data from the meter reports.
                 response = gateway.api_call('/ivp/meters/reports')
+            # The gateway has been unreachable for several requests (the failure was already logged).
+            except CircuitOpenError:
+                return None
+            # Sometimes unable to connect (after the retries).
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as exception:
+                # Log this error.
+                print(f'{datetime.datetime.now()} - Problem connecting to the gateway..\n {exception}', file=sys.stderr, flush=True)
+                return None
+
+            # Is this the same as the last reading?
+            if deduplicator and not deduplicator.is_changed('/ivp/meters/reports', response):
+                return response
+
+            # Add this result to the spool (this does not wait for the AMQP broker).
+            spool.submit((time.time(), response))
+
+            return response
+
+        # The meter reports are requested every poll_interval seconds (on a fixed schedule, so a
+        # slow request skips the ticks it missed unless poll_missed is "catch_up").
+        scheduler = PollScheduler(missed=credentials.get('poll_missed', PollScheduler.MISSED_SKIP))
+        scheduler.add(
+            name='/ivp/meters/reports',
+            interval=credentials.get('poll_interval', 1),
+            callback=poll_meter_reports
+        )
 
-                # Add this result to the AMQP broker.
-                amqp_channel.basic_publish(
-                    exchange='Enphase',
-                    routing_key='MeterStream',
-                    body=json.dumps({'timestamp': time.time(), 'readings': response})
-                )
-
-                # Capture interval, in fractional seconds.
-                time.sleep(0.99)
+        try:
+            # Repeat forever unless the user presses CTRL + C.
+            scheduler.run()
         except KeyboardInterrupt:
             # Notify the user.
             print(f'{datetime.datetime.now()} - Shutting down.', flush=True)
@@ -170,6 +603,9 @@ def main():
             # Re-raise.
             raise
 
+    # The spool has been closed so the AMQP connection is no longer required.
+    amqp_publisher.close()
+
 # Launch the main method if invoked directly.
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -35,6 +35,7 @@ import sys      # We check whether we are running on Windows® or not.
 # All the shared Enphase® functions are in these packages.
 from enphase_api.cloud.authentication import Authentication
 from enphase_api.local.gateway import Gateway
+from enphase_api.local.models import Inverter
 
 
 def get_human_readable_power(watts, in_hours = False):
@@ -163,9 +164,6 @@ def main():
     # (by default it only does this automatically every 5 minutes).
     #gateway.api_call('/installer/pcu_comm_check')
 
-    # Get gateway production, consumption and storage status.
-    production_statistics = gateway.api_call('/production.json')
-
     # The meter status tells us if they are enabled and what mode they are operating in
     # (production for production meters but net-consumption or total-consumption for consumption
     # meters).
@@ -173,38 +171,52 @@ def main():
 
     # The Production meters can be not present (not Gateway Metered) or individually turned off
     # (and they require a working CT clamp).
+    meter_statistics_production = [meter_status for meter_status in meters_status if meter_status['measurementType'] == 'production'][0]
+
+    # The Consumption meters can be not present (not Gateway Metered) or individually turned off
+    # (and they require a working CT clamp).
+    meter_statistics_consumption = [meter_status for meter_status in meters_status if meter_status['measurementType'] == 'net-consumption' or meter_status['measurementType'] == 'total-consumption'][0]
+
+    # The paths of the inverters section and the sections of the Production Statistics JSON that
+    # match the configured meter modes.
+    inverters_production = 'production[type=inverters]'
+    eim_production = f'production[type=eim,measurementType={meter_statistics_production["measurementType"]}]'
+    eim_consumption = f'consumption[type=eim,measurementType={meter_statistics_consumption["measurementType"]}]'
+
+    # Get just the gateway production and consumption statistics that are displayed.
+    production_statistics = gateway.api_call('/production.json', select=[
+        f'{inverters_production}.activeCount',
+        f'{inverters_production}.readingTime',
+        f'{inverters_production}.whLifetime',
+        f'{inverters_production}.wNow',
+        f'{eim_production}.activeCount',
+        f'{eim_production}.whLastSevenDays',
+        f'{eim_production}.whToday',
+        f'{eim_production}.wNow',
+        f'{eim_consumption}.activeCount',
+        f'{eim_consumption}.whToday',
+        f'{eim_consumption}.wNow'
+    ])
+
     eim_production_w_now = None
     eim_production_wh_today = None
     eim_production_wh_last_seven_days = None
 
-    meter_statistics_production = [meter_status for meter_status in meters_status if meter_status['measurementType'] == 'production'][0]
-    if meter_statistics_production['state'] == 'enabled':
-        # Get the Production section of the Production Statistics JSON that matches the configured
-        # meter mode.
-        production_statistics_production_eim = [production_statistic for production_statistic in production_statistics['production'] if production_statistic['type'] == 'eim' and production_statistic['measurementType'] == meter_statistics_production['measurementType']][0]
-
-        # Is the production meter responding?
-        if production_statistics_production_eim['activeCount'] > 0:
-            # Production statistics.
-            eim_production_w_now = production_statistics_production_eim['wNow']
-            eim_production_wh_today = production_statistics_production_eim['whToday']
-            eim_production_wh_last_seven_days = production_statistics_production_eim.get('whLastSevenDays')
+    # Is the production meter enabled and responding?
+    if meter_statistics_production['state'] == 'enabled' and production_statistics[f'{eim_production}.activeCount']:
+        # Production statistics.
+        eim_production_w_now = production_statistics[f'{eim_production}.wNow']
+        eim_production_wh_today = production_statistics[f'{eim_production}.whToday']
+        eim_production_wh_last_seven_days = production_statistics[f'{eim_production}.whLastSevenDays']
 
-    # The Consumption meters can be not present (not Gateway Metered) or individually turned off
-    # (and they require a working CT clamp).
     eim_consumption_w_now = None
     eim_consumption_wh_today = None
 
-    meter_statistics_consumption = [meter_status for meter_status in meters_status if meter_status['measurementType'] == 'net-consumption' or meter_status['measurementType'] == 'total-consumption'][0]
-    if meter_statistics_consumption['state'] == 'enabled':
-        # Get the Consumption section for the right meter of the Production Statistics JSON.
-        production_statistics_consumption_eim = [production_statistic for production_statistic in production_statistics['consumption'] if production_statistic['type'] == 'eim' and production_statistic['measurementType'] == meter_statistics_consumption['measurementType']][0]
-
-        # Is the consumption meter responding?
-        if production_statistics_consumption_eim['activeCount'] > 0:
-            # Consumption statistics.
-            eim_consumption_w_now = production_statistics_consumption_eim['wNow']
-            eim_consumption_wh_today = production_statistics_consumption_eim['whToday']
+    # Is the consumption meter enabled and responding?
+    if meter_statistics_consumption['state'] == 'enabled' and production_statistics[f'{eim_consumption}.activeCount']:
+        # Consumption statistics.
+        eim_consumption_w_now = production_statistics[f'{eim_consumption}.wNow']
+        eim_consumption_wh_today = production_statistics[f'{eim_consumption}.whToday']
 
     # We support Unicode and ANSI modes of running this application.
     # Check the Windows® console can display UTF-8 characters.
@@ -213,27 +225,24 @@ def main():
     else:
         string_names = {'Production': 'Production:', 'Microinverter': '-', 'Meter': 'Meter:', 'Lifetime': 'Lifetime:', 'Details': ''}
 
-    # Get the Inverters section of the Production Statistics JSON.
-    production_statistics_inverters = [production_statistic for production_statistic in production_statistics['production'] if production_statistic['type'] == 'inverters'][0]
-
     # Generate the status (with emojis if runtime is utf-8 capable).
-    status  = f'\n{string_names["Production"]} Inverters {get_human_readable_power(production_statistics_inverters["wNow"])} ({production_statistics_inverters["activeCount"]} Inverters)'
+    status  = f'\n{string_names["Production"]} Inverters {get_human_readable_power(production_statistics[f"{inverters_production}.wNow"])} ({production_statistics[f"{inverters_production}.activeCount"]} Inverters)'
 
     # Used to calculate the microinverter automatic polling interval
     # (gateway polls microinverters automatically every 5 minutes).
     latest_inverter_reported = None
 
     # Get Inverter(s) status.
-    inverters = gateway.api_call('/api/v1/production/inverters')
+    inverters = Inverter.from_json_list(gateway.api_call('/api/v1/production/inverters'))
 
     # Get panel by panel status.
     for inverter in inverters:
 
         # We convert the last report date timestamp to a datetime.
-        inverter_last_reported = datetime.datetime.fromtimestamp(inverter["lastReportDate"])
+        inverter_last_reported = datetime.datetime.fromtimestamp(inverter.last_report_date)
 
         # Add the status of this microinverter to our status string.
-        status += f'\n  {string_names["Microinverter"]} {inverter["lastReportWatts"]} W (Serial: {inverter["serialNumber"]}, Last Seen: {inverter_last_reported})'
+        status += f'\n  {string_names["Microinverter"]} {inverter.last_report_watts} W (Serial: {inverter.serial_number}, Last Seen: {inverter_last_reported})'
 
         # Used to calculate the microinverter polling interval
         # (gateway polls microinverters every 5 minutes).
@@ -241,7 +250,7 @@ def main():
             latest_inverter_reported = inverter_last_reported
 
     # This will always be present (even without a production meter).
-    status += f'\n{string_names["Lifetime"]} Total Generated {get_human_readable_power(production_statistics_inverters["whLifetime"], True)}'
+    status += f'\n{string_names["Lifetime"]} Total Generated {get_human_readable_power(production_statistics[f"{inverters_production}.whLifetime"], True)}'
 
     # This requires a configured Production meter.
     if eim_production_w_now is not None:
@@ -269,7 +278,7 @@ def main():
             status += f' ({get_human_readable_power(eim_consumption_wh_today, True)} today)'
 
     # This was when the poll of all the microinverters had completed.
-    inverters_reading_time = production_statistics_inverters['readingTime']
+    inverters_reading_time = production_statistics[f'{inverters_production}.readingTime']
 
     # Microinverters do not power up in very low light.
     if inverters_reading_time != 0:
@@ -23,19 +23,26 @@ solar energy production and consumption data and store it in a MySQL®/MariaDB®
 The functions in this module allow you to:
 - Establish a secure gateway session
 - Fetch production and consumption from Enphase® IQ Gateway devices
-- Store this data in a database
+- Store this data in a database (spooling it to disk whilst the database is unavailable)
 """
 
 import datetime # We output the current date/time for debugging.
 import json     # This script makes heavy use of JSON parsing.
 import os.path  # We check whether a file exists.
-import time     # We use the current epoch seconds for reading times and to delay.
+import sys      # We write to stderr.
+import time     # We use the current epoch seconds for reading times.
 
-import mysql.connector # Third party library; "pip install mysql-connector-python".
+import mysql.connector     # Third party library; "pip install mysql-connector-python".
+import requests.exceptions # We handle some of the exceptions we might get back.
 
 # All the shared Enphase® functions are in these packages.
 from enphase_api.cloud.authentication import Authentication
 from enphase_api.local.gateway import Gateway
+from enphase_api.local.models import MeterReport
+from enphase_api.local.poll_scheduler import PollScheduler
+from enphase_api.local.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+from enphase_api.local.response_deduplicator import ResponseDeduplicator
+from enphase_api.local.spool import Spool
 
 
 # SQL statements.
@@ -51,6 +58,20 @@ ADD_METER_READING_RESULT = (
     'INSERT INTO `MeterReading_Result` (p, q, s, v, i, pf, f) VALUES (%s, %s, %s, %s, %s, %s, %s)'
 )
 
+# The columns of the alternative (denormalised) schema in database_meters_wide.sql; each meter type
+# and phase has 7 consecutive columns.
+WIDE_METER_READING_COLUMNS = [
+    f'{meter_type}_Phase_{phase}_{field}'
+    for meter_type in ('Production', 'NetConsumption', 'TotalConsumption')
+    for phase in ('A', 'B', 'C')
+    for field in ('p', 'q', 's', 'v', 'i', 'pf', 'f')
+]
+
+ADD_WIDE_METER_READING = (
+    'INSERT INTO `MeterReading_Wide` (Timestamp, ' + ', '.join(WIDE_METER_READING_COLUMNS) + ') '
+    'VALUES (FROM_UNIXTIME(%s)' + ', %s' * len(WIDE_METER_READING_COLUMNS) + ')'
+)
+
 # Maps each type of inserted meter reading record ID to the relevant place in our SQL parameters.
 OFFSET_MAPPING = {
     'production': 0,
@@ -58,24 +79,55 @@ OFFSET_MAPPING = {
     'total-consumption': 2,
 }
 
-def add_results_to_database(database_connection, database_cursor_meter_reading, database_cursor_meter_reading_result, timestamp, json_object):
+def check_auto_increment(database_cursor, single_writer=False):
+    """
+    Checks that the database allocates the IDs of a multi-row INSERT consecutively (the IDs of a
+    batch's results are resolved from the first inserted ID).
+
+    Args:
+        database_cursor (MySQLCursor):
+            The cursor of the database connection.
+        single_writer (bool, optional):
+            True if this is the only process adding meter readings to the database (so no other
+            INSERT can take IDs from the middle of a batch). Defaults to False.
+
+    Raises:
+        mysql.connector.errors.NotSupportedError:
+            If the IDs of a multi-row INSERT may not be consecutive.
+
+    Returns:
+        None
     """
-    Adds meter readings and their results for each phase to the database.
 
-    This function takes the following arguments and adds meter readings along with their results
-    for each phase to the database:
+    # Get how the database allocates AUTO_INCREMENT IDs.
+    database_cursor.execute('SELECT @@auto_increment_increment, @@innodb_autoinc_lock_mode')
+    auto_increment_increment, innodb_autoinc_lock_mode = database_cursor.fetchall()[0]
+
+    # Are the IDs spaced out (such as in a multi-source replication setup)?
+    if auto_increment_increment != 1:
+        raise mysql.connector.errors.NotSupportedError(f'The database has an auto_increment_increment of {auto_increment_increment} (the meter reading results require 1).')
+
+    # Can another connection's INSERT take IDs from the middle of a batch ("interleaved" lock mode)?
+    if innodb_autoinc_lock_mode == 2 and not single_writer:
+        raise mysql.connector.errors.NotSupportedError('The database has an innodb_autoinc_lock_mode of 2 so the IDs of a batch of meter reading results may not be consecutive (set "database_single_writer" to true in the credentials if this is the only process adding meter readings).')
+
+def add_results_to_database(database_connection, database_cursor, readings):
+    """
+    Adds a batch of meter readings and their results for each phase to the database.
+
+    The results of every reading in the batch are written with one multi-row INSERT, their IDs
+    are then resolved from the first inserted ID and the readings are written with a second
+    multi-row INSERT before a single commit.
 
     Args:
         database_connection (MySQLConnection):
             The database connection.
-        database_cursor_meter_reading (MySQLCursorPrepared):
-            The cursor for inserting meter readings.
-        database_cursor_meter_reading_result (MySQLCursorPrepared):
-            The cursor for inserting meter reading results.
-        timestamp (datetime.datetime):
-            The timestamp for the meter readings.
-        json_object (list):
-            A JSON object containing meter readings and their results.
+        database_cursor (MySQLCursor):
+            The cursor for inserting meter readings and their results (this must not be a
+            prepared cursor, as those cannot rewrite executemany() into a multi-row INSERT).
+        readings (list):
+            A list of (timestamp, json_object) tuples, each JSON object containing meter
+            readings and their results.
 
     Raises:
         ValueError:
@@ -85,51 +137,133 @@ def add_results_to_database(database_connection, database_cursor_meter_reading,
         None
     """
 
-    # Initialise to empty by default so they convert to a database NULL if not later set.
-    result_ids = [None] * 9
-
-    # Take each of the meter types.
-    for meter_readings in json_object:
-
-        # Get the parameter index offset for this meters' meter type.
-        meter_type_offset = OFFSET_MAPPING.get(meter_readings['reportType'])
-        if meter_type_offset is None:
-            raise ValueError(f'Unexpected meter reading report type "{meter_readings["reportType"]}" in JSON.')
-
-        # Take each of the phase readings.
-        for phase_index, phase_result in enumerate(meter_readings['lines']):
-
-            # Too many phases?
-            if phase_index > 2:
-                raise ValueError(f'Unexpected phase #{phase_index} in JSON.')
-
-            # Map each of the JSON values to our database columns.
-            meter_reading_result = (
-                phase_result['actPower'],
-                phase_result['reactPwr'],
-                phase_result['apprntPwr'],
-                phase_result['rmsVoltage'],
-                phase_result['rmsCurrent'],
-                phase_result['pwrFactor'],
-                phase_result['freqHz']
-            )
+    # The results for all the readings in this batch.
+    meter_reading_results = []
 
-            try:
-                # Add to the database the meter reading(s).
-                # Using a dictionary instead of a tuple prevented query preparation,
-                # possibly due to a MySQL Connector bug.
-                database_cursor_meter_reading_result.execute(ADD_METER_READING_RESULT, meter_reading_result)
-            except mysql.connector.errors.DataError:
-                print(json_object, flush=True)
-                raise
+    # Each reading's timestamp and the position of each of its results within the batch.
+    meter_reading_result_positions = []
+
+    # Take each of the readings.
+    for timestamp, json_object in readings:
+
+        # Initialise to empty by default so they convert to a database NULL if not later set.
+        result_positions = [None] * 9
 
-            # Get the result ID for this phase insert.
-            result_ids[(meter_type_offset*3)+phase_index] = database_cursor_meter_reading_result.lastrowid
+        # Take each of the meter types.
+        for meter_report in MeterReport.from_json_list(json_object):
 
-    # Add the meters' readings.
-    database_cursor_meter_reading.execute(ADD_METER_READING, (timestamp,) + tuple(result_ids))
+            # Get the parameter index offset for this meters' meter type.
+            meter_type_offset = OFFSET_MAPPING.get(meter_report.report_type)
+            if meter_type_offset is None:
+                raise ValueError(f'Unexpected meter reading report type "{meter_report.report_type}" in JSON.')
 
-    # Make sure data is committed to the database.
+            # Take each of the phase readings.
+            for phase_index, phase_result in enumerate(meter_report.lines):
+
+                # Too many phases?
+                if phase_index > 2:
+                    raise ValueError(f'Unexpected phase #{phase_index} in JSON.')
+
+                # Remember where in the batch this phase result will be inserted.
+                result_positions[(meter_type_offset*3)+phase_index] = len(meter_reading_results)
+
+                # The phase result is already in the order of our database columns.
+                meter_reading_results.append(phase_result)
+
+        meter_reading_result_positions.append((timestamp, result_positions))
+
+    # Were there any results to add?
+    if meter_reading_results:
+        try:
+            # Add to the database all the meter reading results (as a single multi-row INSERT).
+            database_cursor.executemany(ADD_METER_READING_RESULT, meter_reading_results)
+        except mysql.connector.errors.DataError:
+            print(readings, flush=True)
+            raise
+
+        # A multi-row INSERT reports the ID of its first row and InnoDB allocates the IDs of a
+        # single multi-row INSERT consecutively (this is checked by check_auto_increment()).
+        first_result_id = database_cursor.lastrowid
+    else:
+        first_result_id = None
+
+    # Add the meters' readings (resolving each result's ID from its position in the batch).
+    database_cursor.executemany(
+        ADD_METER_READING,
+        [
+            (timestamp,) + tuple(None if position is None else first_result_id + position for position in result_positions)
+            for timestamp, result_positions in meter_reading_result_positions
+        ]
+    )
+
+    # Make sure the whole batch is committed to the database at once.
+    database_connection.commit()
+
+def add_wide_results_to_database(database_connection, database_cursor, readings):
+    """
+    Adds a batch of meter readings to a database that uses the alternative (denormalised) schema.
+
+    Each reading is a single wide row (see database_meters_wide.sql) so the whole batch is written
+    with one multi-row INSERT before a single commit.
+
+    Args:
+        database_connection (MySQLConnection):
+            The database connection.
+        database_cursor (MySQLCursor):
+            The cursor for inserting meter readings (this must not be a prepared cursor, as those
+            cannot rewrite executemany() into a multi-row INSERT).
+        readings (list):
+            A list of (timestamp, json_object) tuples, each JSON object containing meter
+            readings and their results.
+
+    Raises:
+        ValueError:
+            If an unexpected meter reading report type or phase is encountered in the JSON.
+
+    Returns:
+        None
+    """
+
+    # The rows for all the readings in this batch.
+    meter_reading_rows = []
+
+    # Take each of the readings.
+    for timestamp, json_object in readings:
+
+        # Initialise to empty by default so they convert to a database NULL if not later set.
+        meter_reading_row = [None] * len(WIDE_METER_READING_COLUMNS)
+
+        # Take each of the meter types.
+        for meter_report in MeterReport.from_json_list(json_object):
+
+            # Get the parameter index offset for this meters' meter type.
+            meter_type_offset = OFFSET_MAPPING.get(meter_report.report_type)
+            if meter_type_offset is None:
+                raise ValueError(f'Unexpected meter reading report type "{meter_report.report_type}" in JSON.')
+
+            # Take each of the phase readings.
+            for phase_index, phase_result in enumerate(meter_report.lines):
+
+                # Too many phases?
+                if phase_index > 2:
+                    raise ValueError(f'Unexpected phase #{phase_index} in JSON.')
+
+                # The first of this meter type and phase's 7 columns.
+                column = ((meter_type_offset*3)+phase_index) * 7
+
+                # The phase result is already in the order of our database columns.
+                meter_reading_row[column:column+7] = phase_result
+
+        meter_reading_rows.append((timestamp,) + tuple(meter_reading_row))
+
+    try:
+        # Add to the database all the meter readings (as a single multi-row INSERT).
+        database_cursor.executemany(ADD_WIDE_METER_READING, meter_reading_rows)
+    except mysql.connector.errors.DataError:
+        print(readings, flush=True)
+        raise
+
+    # Make sure the whole batch is committed to the database at once.
     database_connection.commit()
 
 def get_secure_gateway_session(credentials):
@@ -168,8 +302,19 @@ def get_secure_gateway_session(credentials):
     if not os.path.exists('configuration/gateway.cer'):
         Gateway.trust_gateway(host)
 
-    # Instantiate the Gateway API wrapper (with the default library hostname if None provided).
-    gateway = Gateway(host)
+    # Instantiate the Gateway API wrapper (with the default library hostname if None provided),
+    # an expired session is renewed with the same token and the session is persisted so a restart
+    # can reuse it. The polled endpoints respond quickly, so a short timeout stops a stalled request
+    # from holding up the next poll. Idempotent requests are retried and fail fast whilst the
+    # gateway is unreachable.
+    gateway = Gateway(
+        host,
+        reauthenticate=True,
+        session_file=Gateway.DEFAULT_SESSION_FILE,
+        timeout=(credentials.get('gateway_connect_timeout', 5), credentials.get('gateway_read_timeout', 10)),
+        retry_policy=RetryPolicy(),
+        circuit_breaker=CircuitBreaker()
+    )
 
     # Are we not able to login to the gateway?
     if not gateway.login(credentials['gateway_token']):
@@ -210,38 +355,146 @@ def main():
     database_password = credentials.get('database_password', '')
     database_database = credentials.get('database_database', 'Enphase')
 
-    # Connect to the MySQL®/MariaDB® database.
-    with mysql.connector.connect(
-        host=database_host,
-        user=database_username,
-        password=database_password,
-        database=database_database
-    ) as database_connection:
+    # Readings are written to the database in batches (of up to this many readings or after this
+    # many seconds).
+    database_batch_size = credentials.get('database_batch_size', 10)
+    database_batch_interval = credentials.get('database_batch_interval', 10)
+
+    # The database either uses the schema in database_meters.sql ("normalised") or the schema in
+    # database_meters_wide.sql ("wide").
+    database_schema = credentials.get('database_schema', 'normalised')
+
+    if database_schema == 'normalised':
+        add_results = add_results_to_database
+    elif database_schema == 'wide':
+        add_results = add_wide_results_to_database
+    else:
+        raise ValueError(f'Unexpected database schema "{database_schema}" in credentials.')
+
+    # The database connection and cursor (only used by the spool's drainer thread).
+    database_connection = None
+    database_cursor = None
+
+    def database_sink(readings):
+        """
+        Adds a batch of readings from the spool to the database (connecting if required).
+
+        Args:
+            readings (list): A list of (timestamp, json_object) readings.
+        """
+
+        nonlocal database_connection, database_cursor
+
+        # Connect (or reconnect if the database was restarted) to the MySQL®/MariaDB® database.
+        if database_connection is None or not database_connection.is_connected():
+            database_connection = mysql.connector.connect(
+                host=database_host,
+                user=database_username,
+                password=database_password,
+                database=database_database
+            )
+
+            # Get a reference to a database cursor.
+            database_cursor = database_connection.cursor()
 
-        # Get references to 2 database cursors (that will PREPARE duplicate SQL statements).
-        database_cursor_meter_reading = database_connection.cursor(prepared=True)
-        database_cursor_meter_reading_result = database_connection.cursor(prepared=True)
+            # The normalised schema relies on the IDs of a batch's results being consecutive.
+            if database_schema == 'normalised':
+                check_auto_increment(database_cursor, credentials.get('database_single_writer', False))
+
+        try:
+            # Add this batch of results to the database.
+            add_results(
+                database_connection=database_connection,
+                database_cursor=database_cursor,
+                readings=readings
+            )
+        except Exception:
+            # Discard any partially added batch (the spool will retry the whole batch).
+            if database_connection.is_connected():
+                database_connection.rollback()
+
+            # Re-raise.
+            raise
+
+    def database_error(exception):
+        """
+        Notifies the user that the database is unavailable (the readings are spooled to disk).
+
+        Args:
+            exception (Exception): The exception raised while adding to the database.
+        """
+
+        print(f'{datetime.datetime.now()} - Unable to add readings to the database (spooling to disk):\n {exception}', file=sys.stderr, flush=True)
+
+    # Readings are spooled to disk whilst the database is unavailable (and replayed once it returns).
+    # Readings the database can never accept (such as a malformed reading) are moved to a
+    # dead-letter file in the spool directory rather than blocking the rest of the backlog.
+    with Spool(
+        directory=credentials.get('spool_directory', 'configuration/spool/database'),
+        sink=database_sink,
+        batch_size=database_batch_size,
+        batch_interval=database_batch_interval,
+        fsync=credentials.get('spool_fsync', Spool.FSYNC_SEGMENT),
+        error_callback=database_error,
+        permanent_errors=(ValueError, KeyError, TypeError, mysql.connector.errors.DataError),
+        maximum_attempts=credentials.get('spool_maximum_attempts'),
+        close_timeout=credentials.get('spool_close_timeout', 30)
+    ) as spool:
 
         # Notify the user.
         print(f'{datetime.datetime.now()} - Collecting meter readings. To exit press CTRL+C', flush=True)
 
-        try:
-            # Repeat forever unless the user presses CTRL + C.
-            while True:
+        # Optionally readings that have not changed (other than when they were created) are not
+        # spooled, although an unchanged reading is still spooled every dedup_maximum_age seconds.
+        if credentials.get('dedup_readings', False):
+            deduplicator = ResponseDeduplicator(
+                fields={'/ivp/meters/reports': lambda readings: [(meter_readings['reportType'], meter_readings['cumulative'], meter_readings['lines']) for meter_readings in readings]},
+                maximum_age=credentials.get('dedup_maximum_age', 60)
+            )
+        else:
+            deduplicator = None
+
+        def poll_meter_reports():
+            """
+            Requests the meter reports and adds them to the spool (unless they are unchanged).
+
+            Returns:
+                list: The meter reports (or None if the gateway was unreachable).
+            """
+
+            try:
                 # Request the data from the meter reports.
                 response = gateway.api_call('/ivp/meters/reports')
+            # The gateway has been unreachable for several requests (the failure was already logged).
+            except CircuitOpenError:
+                return None
+            # Sometimes unable to connect (after the retries).
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as exception:
+                # Log this error.
+                print(f'{datetime.datetime.now()} - Problem connecting to the gateway..\n {exception}', file=sys.stderr, flush=True)
+                return None
+
+            # Is this the same as the last reading?
+            if deduplicator and not deduplicator.is_changed('/ivp/meters/reports', response):
+                return response
+
+            # Add this result to the spool (this does not wait for the database).
+            spool.submit((time.time(), response))
+
+            return response
+
+        # The meter reports are requested every poll_interval seconds (on a fixed schedule, so a
+        # slow request skips the ticks it missed unless poll_missed is "catch_up").
+        scheduler = PollScheduler(missed=credentials.get('poll_missed', PollScheduler.MISSED_SKIP))
+        scheduler.add(
+            name='/ivp/meters/reports',
+            interval=credentials.get('poll_interval', 1),
+            callback=poll_meter_reports
+        )
 
-                # Add this result to the database.
-                add_results_to_database(
-                    database_connection=database_connection,
-                    database_cursor_meter_reading=database_cursor_meter_reading,
-                    database_cursor_meter_reading_result=database_cursor_meter_reading_result,
-                    timestamp=time.time(),
-                    json_object=response
-                )
-
-                # Capture interval, in fractional seconds.
-                time.sleep(0.99)
+        try:
+            # Repeat forever unless the user presses CTRL + C.
+            scheduler.run()
         except KeyboardInterrupt:
             # Notify the user.
             print(f'{datetime.datetime.now()} - Shutting down.', flush=True)
@@ -252,6 +505,10 @@ def main():
             # Re-raise.
             raise
 
+    # The spool has been closed so the database connection is no longer required.
+    if database_connection is not None:
+        database_connection.close()
+
 # Launch the main method if invoked directly.
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# This file is part of Enphase-API <https://github.com/Matthew1471/Enphase-API>
+# Copyright (C) 2023 Matthew1471!
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+This example provides functionality to interact with a fleet of Enphase® IQ Gateways for
+monitoring solar energy production and consumption data and store it in a MySQL®/MariaDB®
+database (one database schema per gateway).
+
+The functions in this module allow you to:
+- Poll many Enphase® IQ Gateway devices from a single process (with bounded concurrency)
+- Isolate failures (and slow responses or database errors) to the gateway that failed
+- Store this data in a database
+"""
+
+import datetime # We output the current date/time for debugging.
+import json     # This script makes heavy use of JSON parsing.
+import sys      # We write to stderr.
+import time     # We use the current epoch seconds for reading times and to time batches.
+
+import mysql.connector # Third party library; "pip install mysql-connector-python".
+
+# All the shared Enphase® functions are in these packages.
+from enphase_api.cloud.authentication import Authentication
+from enphase_api.local.gateway_fleet import GatewayFleet
+from enphase_api.local.models import MeterReport
+from enphase_api.local.poll_scheduler import PollScheduler
+from enphase_api.local.resilience import CircuitBreaker, RetryPolicy
+
+
+# SQL statements (each gateway has its own copy of the database schema).
+ADD_METER_READING = (
+    'INSERT INTO `{database}`.`MeterReading` (Timestamp, '
+    'Production_Phase_A_ID, Production_Phase_B_ID, Production_Phase_C_ID, '
+    'NetConsumption_Phase_A_ID, NetConsumption_Phase_B_ID, NetConsumption_Phase_C_ID, '
+    'TotalConsumption_Phase_A_ID, TotalConsumption_Phase_B_ID, TotalConsumption_Phase_C_ID'
+    ') VALUES (FROM_UNIXTIME(%s), %s, %s, %s, %s, %s, %s, %s, %s, %s)'
+)
+
+ADD_METER_READING_RESULT = (
+    'INSERT INTO `{database}`.`MeterReading_Result` (p, q, s, v, i, pf, f) VALUES (%s, %s, %s, %s, %s, %s, %s)'
+)
+
+# The columns of the alternative (denormalised) schema in database_meters_wide.sql; each meter type
+# and phase has 7 consecutive columns.
+WIDE_METER_READING_COLUMNS = [
+    f'{meter_type}_Phase_{phase}_{field}'
+    for meter_type in ('Production', 'NetConsumption', 'TotalConsumption')
+    for phase in ('A', 'B', 'C')
+    for field in ('p', 'q', 's', 'v', 'i', 'pf', 'f')
+]
+
+ADD_WIDE_METER_READING = (
+    'INSERT INTO `{database}`.`MeterReading_Wide` (Timestamp, ' + ', '.join(WIDE_METER_READING_COLUMNS) + ') '
+    'VALUES (FROM_UNIXTIME(%s)' + ', %s' * len(WIDE_METER_READING_COLUMNS) + ')'
+)
+
+# A batch failing with these errors can never be added (the other errors may be temporary).
+PERMANENT_ERRORS = (ValueError, KeyError, TypeError, mysql.connector.errors.DataError)
+
+# Maps each type of inserted meter reading record ID to the relevant place in our SQL parameters.
+OFFSET_MAPPING = {
+    'production': 0,
+    'net-consumption': 1,
+    'total-consumption': 2,
+}
+
+def check_auto_increment(database_cursor, single_writer=False):
+    """
+    Checks that the database allocates the IDs of a multi-row INSERT consecutively (the IDs of a
+    batch's results are resolved from the first inserted ID).
+
+    Args:
+        database_cursor (MySQLCursor):
+            The cursor of the database connection.
+        single_writer (bool, optional):
+            True if this is the only process adding meter readings to the database (so no other
+            INSERT can take IDs from the middle of a batch). Defaults to False.
+
+    Raises:
+        mysql.connector.errors.NotSupportedError:
+            If the IDs of a multi-row INSERT may not be consecutive.
+
+    Returns:
+        None
+    """
+
+    # Get how the database allocates AUTO_INCREMENT IDs.
+    database_cursor.execute('SELECT @@auto_increment_increment, @@innodb_autoinc_lock_mode')
+    auto_increment_increment, innodb_autoinc_lock_mode = database_cursor.fetchall()[0]
+
+    # Are the IDs spaced out (such as in a multi-source replication setup)?
+    if auto_increment_increment != 1:
+        raise mysql.connector.errors.NotSupportedError(f'The database has an auto_increment_increment of {auto_increment_increment} (the meter reading results require 1).')
+
+    # Can another connection's INSERT take IDs from the middle of a batch ("interleaved" lock mode)?
+    if innodb_autoinc_lock_mode == 2 and not single_writer:
+        raise mysql.connector.errors.NotSupportedError('The database has an innodb_autoinc_lock_mode of 2 so the IDs of a batch of meter reading results may not be consecutive (set "database_single_writer" to true in the credentials if this is the only process adding meter readings).')
+
+def add_results_to_database(database_connection, database_cursor, database, readings):
+    """
+    Adds a batch of meter readings and their results for each phase to a gateway's database.
+
+    The results of every reading in the batch are written with one multi-row INSERT, their IDs
+    are then resolved from the first inserted ID and the readings are written with a second
+    multi-row INSERT before a single commit.
+
+    Args:
+        database_connection (MySQLConnection):
+            The database connection.
+        database_cursor (MySQLCursor):
+            The cursor for inserting meter readings and their results (this must not be a
+            prepared cursor, as those cannot rewrite executemany() into a multi-row INSERT).
+        database (str):
+            The name of the database (schema) holding this gateway's readings.
+        readings (list):
+            A list of (timestamp, json_object) tuples, each JSON object containing meter
+            readings and their results.
+
+    Raises:
+        ValueError:
+            If an unexpected meter reading report type or phase is encountered in the JSON.
+
+    Returns:
+        None
+    """
+
+    # The results for all the readings in this batch.
+    meter_reading_results = []
+
+    # Each reading's timestamp and the position of each of its results within the batch.
+    meter_reading_result_positions = []
+
+    # Take each of the readings.
+    for timestamp, json_object in readings:
+
+        # Initialise to empty by default so they convert to a database NULL if not later set.
+        result_positions = [None] * 9
+
+        # Take each of the meter types.
+        for meter_report in MeterReport.from_json_list(json_object):
+
+            # Get the parameter index offset for this meters' meter type.
+            meter_type_offset = OFFSET_MAPPING.get(meter_report.report_type)
+            if meter_type_offset is None:
+                raise ValueError(f'Unexpected meter reading report type "{meter_report.report_type}" in JSON.')
+
+            # Take each of the phase readings.
+            for phase_index, phase_result in enumerate(meter_report.lines):
+
+                # Too many phases?
+                if phase_index > 2:
+                    raise ValueError(f'Unexpected phase #{phase_index} in JSON.')
+
+                # Remember where in the batch this phase result will be inserted.
+                result_positions[(meter_type_offset*3)+phase_index] = len(meter_reading_results)
+
+                # The phase result is already in the order of our database columns.
+                meter_reading_results.append(phase_result)
+
+        meter_reading_result_positions.append((timestamp, result_positions))
+
+    # Were there any results to add?
+    if meter_reading_results:
+        try:
+            # Add to the database all the meter reading results (as a single multi-row INSERT).
+            database_cursor.executemany(ADD_METER_READING_RESULT.format(database=database), meter_reading_results)
+        except mysql.connector.errors.DataError:
+            print(readings, flush=True)
+            raise
+
+        # A multi-row INSERT reports the ID of its first row and InnoDB allocates the IDs of a
+        # single multi-row INSERT consecutively (this is checked by check_auto_increment()).
+        first_result_id = database_cursor.lastrowid
+    else:
+        first_result_id = None
+
+    # Add the meters' readings (resolving each result's ID from its position in the batch).
+    database_cursor.executemany(
+        ADD_METER_READING.format(database=database),
+        [
+            (timestamp,) + tuple(None if position is None else first_result_id + position for position in result_positions)
+            for timestamp, result_positions in meter_reading_result_positions
+        ]
+    )
+
+    # Make sure the whole batch is committed to the database at once.
+    database_connection.commit()
+
+def add_wide_results_to_database(database_connection, database_cursor, database, readings):
+    """
+    Adds a batch of meter readings to a gateway's database that uses the alternative (denormalised) schema.
+
+    Each reading is a single wide row (see database_meters_wide.sql) so the whole batch is written
+    with one multi-row INSERT before a single commit.
+
+    Args:
+        database_connection (MySQLConnection):
+            The database connection.
+        database_cursor (MySQLCursor):
+            The cursor for inserting meter readings (this must not be a prepared cursor, as those
+            cannot rewrite executemany() into a multi-row INSERT).
+        database (str):
+            The name of the database (schema) holding this gateway's readings.
+        readings (list):
+            A list of (timestamp, json_object) tuples, each JSON object containing meter
+            readings and their results.
+
+    Raises:
+        ValueError:
+            If an unexpected meter reading report type or phase is encountered in the JSON.
+
+    Returns:
+        None
+    """
+
+    # The rows for all the readings in this batch.
+    meter_reading_rows = []
+
+    # Take each of the readings.
+    for timestamp, json_object in readings:
+
+        # Initialise to empty by default so they convert to a database NULL if not later set.
+        meter_reading_row = [None] * len(WIDE_METER_READING_COLUMNS)
+
+        # Take each of the meter types.
+        for meter_report in MeterReport.from_json_list(json_object):
+
+            # Get the parameter index offset for this meters' meter type.
+            meter_type_offset = OFFSET_MAPPING.get(meter_report.report_type)
+            if meter_type_offset is None:
+                raise ValueError(f'Unexpected meter reading report type "{meter_report.report_type}" in JSON.')
+
+            # Take each of the phase readings.
+            for phase_index, phase_result in enumerate(meter_report.lines):
+
+                # Too many phases?
+                if phase_index > 2:
+                    raise ValueError(f'Unexpected phase #{phase_index} in JSON.')
+
+                # The first of this meter type and phase's 7 columns.
+                column = ((meter_type_offset*3)+phase_index) * 7
+
+                # The phase result is already in the order of our database columns.
+                meter_reading_row[column:column+7] = phase_result
+
+        meter_reading_rows.append((timestamp,) + tuple(meter_reading_row))
+
+    try:
+        # Add to the database all the meter readings (as a single multi-row INSERT).
+        database_cursor.executemany(ADD_WIDE_METER_READING.format(database=database), meter_reading_rows)
+    except mysql.connector.errors.DataError:
+        print(readings, flush=True)
+        raise
+
+    # Make sure the whole batch is committed to the database at once.
+    database_connection.commit()
+
+def get_fleet(credentials):
+    """
+    Creates a fleet of Enphase® IQ Gateways from the credentials.
+
+    Each gateway's token is validated before any connection is made, the certificate of each
+    gateway is downloaded and login happens on the first request to that gateway.
+
+    Args:
+        credentials (dict): A dictionary containing the required credentials.
+
+    Returns:
+        GatewayFleet: An initialised GatewayFleet for polling the gateways.
+
+    Raises:
+        ValueError: If any of the tokens are missing/expired/invalid.
+    """
+
+    # Check each of the gateways has a valid JSON Web Token (JWT) before we start.
+    for gateway in credentials['gateways']:
+        if not (gateway.get('gateway_token')
+                    and Authentication.check_token_valid(
+                        token=gateway['gateway_token'],
+                        gateway_serial_number=gateway.get('gateway_serial_number'))):
+            # It is either not present or not valid.
+            raise ValueError(f'No or expired token for gateway {gateway.get("gateway_serial_number")}.')
+
+    # Return the initialised fleet (each gateway has a short timeout and its own circuit breaker,
+    # so a slow or unreachable gateway does not hold up the others).
+    return GatewayFleet(
+        gateways=credentials['gateways'],
+        max_workers=credentials.get('fleet_concurrency', 4),
+        timeout=(credentials.get('gateway_connect_timeout', 5), credentials.get('gateway_read_timeout', 10)),
+        retry_policy=RetryPolicy(),
+        circuit_breaker=CircuitBreaker
+    )
+
+def main():
+    """
+    Main function for collecting and storing Enphase® meter readings from a fleet of gateways to a
+    MySQL®/MariaDB® database.
+
+    This function loads credentials from a JSON file, polls every gateway in the fleet from a
+    bounded pool of worker threads and stores each gateway's readings in that gateway's database.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+
+    # Notify the user.
+    print(f'{datetime.datetime.now()} - Starting up.', flush=True)
+
+    # Load credentials.
+    with open('configuration/credentials_fleet.json', mode='r', encoding='utf-8') as json_file:
+        credentials = json.load(json_file)
+
+    # Each gateway can store its readings in its own database (schema).
+    databases = {
+        gateway['gateway_serial_number']: gateway.get('database_database', f'Enphase_{gateway["gateway_serial_number"]}')
+        for gateway in credentials['gateways']
+    }
+
+    # Gather the database details from the credentials file.
+    database_host = credentials.get('database_host', 'localhost')
+    database_username = credentials.get('database_username', 'root')
+    database_password = credentials.get('database_password', '')
+
+    # Connect to the MySQL®/MariaDB® database (the one connection is shared by all gateways).
+    with get_fleet(credentials) as fleet, mysql.connector.connect(
+        host=database_host,
+        user=database_username,
+        password=database_password
+    ) as database_connection:
+
+        # Get a reference to a database cursor.
+        database_cursor = database_connection.cursor()
+
+        # Readings are written to each gateway's database in batches (of up to this many readings
+        # or after this many seconds).
+        database_batch_size = credentials.get('database_batch_size', 10)
+        database_batch_interval = credentials.get('database_batch_interval', 10)
+
+        # The readings of a gateway that cannot currently be written are kept (up to this many).
+        database_maximum_readings = credentials.get('database_maximum_readings', 3600)
+
+        # The database either uses the schema in database_meters.sql ("normalised") or the schema in
+        # database_meters_wide.sql ("wide").
+        database_schema = credentials.get('database_schema', 'normalised')
+
+        if database_schema == 'normalised':
+            # This schema relies on the IDs of a batch's results being consecutive.
+            check_auto_increment(database_cursor, credentials.get('database_single_writer', False))
+            add_results = add_results_to_database
+        elif database_schema == 'wide':
+            add_results = add_wide_results_to_database
+        else:
+            raise ValueError(f'Unexpected database schema "{database_schema}" in credentials.')
+
+        # The number of seconds to wait for all the gateways to respond to each poll.
+        fleet_deadline = credentials.get('fleet_deadline', 5)
+
+        # The readings not yet written to each gateway's database.
+        readings = {serial_number: [] for serial_number in databases}
+        batch_start_time = time.monotonic()
+
+        def add_batches_to_database(minimum_size):
+            """
+            Adds each gateway's batch of readings to its database if it has enough readings.
+            """
+
+            for serial_number, gateway_readings in readings.items():
+                # Does this gateway have enough readings waiting?
+                if gateway_readings and len(gateway_readings) >= minimum_size:
+                    try:
+                        # Add this batch of results to the gateway's database.
+                        add_results(
+                            database_connection=database_connection,
+                            database_cursor=database_cursor,
+                            database=databases[serial_number],
+                            readings=gateway_readings
+                        )
+                    except PERMANENT_ERRORS as exception:
+                        # This batch can never be added, the other gateways are unaffected.
+                        print(f'{datetime.datetime.now()} - Discarding {len(gateway_readings)} readings from gateway {serial_number}:\n {exception}', file=sys.stderr, flush=True)
+                        database_connection.rollback()
+                    except mysql.connector.Error as exception:
+                        # Keep the most recent readings for this gateway's next batch (e.g. once
+                        # its database exists), the other gateways are unaffected.
+                        print(f'{datetime.datetime.now()} - Unable to add readings from gateway {serial_number}:\n {exception}', file=sys.stderr, flush=True)
+                        database_connection.rollback()
+                        del gateway_readings[:-database_maximum_readings]
+                        continue
+
+                    # Start a new batch.
+                    gateway_readings.clear()
+
+        # Notify the user.
+        print(f'{datetime.datetime.now()} - Collecting meter readings from {len(databases)} gateways. To exit press CTRL+C', flush=True)
+
+        def poll_meter_reports():
+            """
+            Requests the meter reports of every available gateway and writes any due batches.
+
+            Returns:
+                dict: The meter reports (or the exception) of each gateway polled.
+            """
+
+            nonlocal batch_start_time
+
+            # Request the data from the meter reports of every available gateway (any gateway that
+            # has not responded by the deadline is reported as failed).
+            results = fleet.api_call('/ivp/meters/reports', deadline=fleet_deadline)
+
+            # All the gateways were polled at about the same time.
+            timestamp = time.time()
+
+            # Take each of the gateway results.
+            for serial_number, response in results.items():
+                # Did this gateway fail? The other gateways are unaffected.
+                if isinstance(response, Exception):
+                    print(f'{datetime.datetime.now()} - Gateway {serial_number} failed:\n {response}', file=sys.stderr, flush=True)
+                    continue
+
+                # Add this result to the gateway's batch.
+                readings[serial_number].append((timestamp, response))
+
+            # Has it been waiting long enough? Then every partial batch is written.
+            if time.monotonic() - batch_start_time >= database_batch_interval:
+                add_batches_to_database(minimum_size=1)
+                batch_start_time = time.monotonic()
+            else:
+                # Only write the full batches.
+                add_batches_to_database(minimum_size=database_batch_size)
+
+            return results
+
+        # The fleet is polled every poll_interval seconds (on a fixed schedule, so a slow poll skips
+        # the ticks it missed unless poll_missed is "catch_up").
+        scheduler = PollScheduler(missed=credentials.get('poll_missed', PollScheduler.MISSED_SKIP))
+        scheduler.add(
+            name='/ivp/meters/reports',
+            interval=credentials.get('poll_interval', 1),
+            callback=poll_meter_reports
+        )
+
+        try:
+            # Repeat forever unless the user presses CTRL + C.
+            scheduler.run()
+        except KeyboardInterrupt:
+            # Notify the user.
+            print(f'{datetime.datetime.now()} - Shutting down.', flush=True)
+
+            # Add any partial batches of results to the databases.
+            add_batches_to_database(minimum_size=1)
+        except Exception:
+            # Notify the user.
+            print(f'{datetime.datetime.now()} - Exception occurred.', flush=True)
+
+            # Re-raise.
+            raise
+
+# Launch the main method if invoked directly.
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -25,16 +25,21 @@ import datetime    # We timestamp any errors.
 import json        # This script makes heavy use of JSON parsing.
 import os.path     # We check whether a file exists.
 import sys         # We write to stderr.
+import time        # We use the current epoch seconds for reading times.
 
 import matplotlib.pyplot as plt          # Third party library; "pip install matplotlib"
 import matplotlib.animation as animation # We use matplotlib animations for live data.
-import matplotlib.dates                  # We use matplotlib date functions for comparisons.
 
 import requests.exceptions               # We handle some of the exceptions we might get back.
 
 # All the shared Enphase® functions are in these packages.
 from enphase_api.cloud.authentication import Authentication
 from enphase_api.local.gateway import Gateway
+from enphase_api.local.resilience import CircuitBreaker, RetryPolicy
+from enphase_api.local.response_deduplicator import ResponseDeduplicator
+
+# The chart helpers shared with database_pyplot_meters.py.
+from pyplot_helpers import BlitManager, TimeSeriesRingBuffer
 
 
 # Contains the axes (or chart).
@@ -49,11 +54,26 @@ gateway = None
 # Information about the meters (whether they are enabled etc.)
 meters_status = None
 
-# The lists which will hold the underlying raw data.
-timestamp_data = []
-production_data = []
-consumption_net_data = []
-consumption_total_data = []
+# The paths of the production statistics that are requested from the gateway.
+production_selection = None
+
+# Detects production statistics that have not changed since the last sample (see "dedup_readings").
+deduplicator = None
+
+# The paths of the production statistics of the inverters and of each meter.
+INVERTERS_PRODUCTION = 'production[type=inverters]'
+PRODUCTION_EIM = 'production[type=eim,measurementType=production]'
+CONSUMPTION_NET_EIM = 'consumption[type=eim,measurementType=net-consumption]'
+CONSUMPTION_TOTAL_EIM = 'consumption[type=eim,measurementType=total-consumption]'
+
+# The ring buffer which will hold the underlying raw data (for each of the series below, with the
+# timestamps stored as matplotlib dates so they can be plotted directly).
+meter_data = None
+
+# The index of each series in the ring buffer.
+PRODUCTION_SERIES = 0
+CONSUMPTION_NET_SERIES = 1
+CONSUMPTION_TOTAL_SERIES = 2
 
 # Reference to the plots and annotations.
 production_plot = None
@@ -66,31 +86,96 @@ consumption_total_annotation = None
 # Will map legend lines to artists.
 legend_map = {}
 
+# Redraws only the plots and annotations for each frame (when blitting).
+blit_manager = None
+
+# Set whilst the animation moves the axes limits (so the plots are only decimated once the new
+# limits are known, rather than for every change of the limits).
+autoscrolling = False
+
+# When blitting, new data that would fall outside the view extends the x-axis by this fraction
+# (so the following frames do not need the whole chart redrawing).
+BLIT_HEADROOM = 0.1
+
+# Whether only the plots and annotations are redrawn for each frame (see "plot_blit").
+blit = False
+
 # Store a count of the number of inverters for calculating system limits.
 number_of_inverters = 0
 
+def get_production_selection():
+    """
+    Gets the paths of the production statistics that are used (only the meters that are enabled).
+
+    Returns:
+        list: The paths to select from the "/production.json" response.
+    """
+
+    # This will always be present (even without a production meter).
+    selection = [f'{INVERTERS_PRODUCTION}.activeCount']
+
+    # The Production meters can be not present (not Gateway Metered) or individually turned off
+    # (and they require a working CT clamp).
+    meter_statistics_production = [meter_status for meter_status in meters_status if meter_status['measurementType'] == 'production'][0]
+    if meter_statistics_production['state'] == 'enabled':
+        selection += [f'{PRODUCTION_EIM}.activeCount', f'{PRODUCTION_EIM}.wNow']
+
+    # The Consumption meters can be not present (not Gateway Metered) or individually turned off
+    # (and they require a working CT clamp).
+    meter_statistics_consumption = [meter_status for meter_status in meters_status if meter_status['measurementType'] == 'net-consumption' or meter_status['measurementType'] == 'total-consumption'][0]
+    if meter_statistics_consumption['state'] == 'enabled':
+        for meter in (CONSUMPTION_NET_EIM, CONSUMPTION_TOTAL_EIM):
+            selection += [f'{meter}.activeCount', f'{meter}.wNow']
+
+    return selection
+
+def get_meter_reading(production_statistics, meter):
+    """
+    Gets the current reading of a meter from the selected production statistics.
+
+    Args:
+        production_statistics (dict): The selected production statistics.
+        meter (str): The path of the meter's production statistics.
+
+    Returns:
+        float: The current reading (or 0 if the meter is not present, turned off or not responding).
+    """
+
+    # Is the meter not selected, not present or not responding?
+    if not production_statistics.get(f'{meter}.activeCount'):
+        return 0
+
+    return production_statistics[f'{meter}.wNow']
+
 def add_result_from_gateway():
     """
     Retrieves and processes energy production and consumption data from the Enphase® Gateway API.
 
     This function requests production and consumption data from the Enphase® Gateway API,
-    processes the data, and updates global data lists for timestamps, production, and consumption.
+    processes the data, and adds the timestamp, production, and consumption to the ring buffer.
 
     It handles cases where the API request fails due to connection issues or JSON decoding errors.
 
     Returns:
-        bool: True if data was successfully added, False if an error occurred.
+        bool: True if data was successfully added, False if an error occurred or the data had not changed.
     """
 
     # Sometimes a request will intermittently fail and in this event we retry.
     try:
-        # Get gateway production, consumption and storage status.
-        production_statistics = gateway.api_call('/production.json')
+        # Get just the selected gateway production and consumption statistics.
+        production_statistics = gateway.api_call('/production.json', select=production_selection)
     # Sometimes unable to connect (especially if using mDNS and it does not catch our query)
     except requests.exceptions.ConnectionError as exception:
         # Log this error.
         print(f'{datetime.datetime.now()} - Problem connecting..\n {exception}', file=sys.stderr)
 
+        # No point continuing this function.
+        return False
+    # This happens generally if there are wider issues on the network.
+    except requests.exceptions.Timeout:
+        # Log this non-critial often transient error.
+        print(f'{datetime.datetime.now()} - Request timed out..', file=sys.stderr)
+
         # No point continuing this function.
         return False
     except requests.exceptions.JSONDecodeError as exception:
@@ -100,54 +185,81 @@ def add_result_from_gateway():
         # No point continuing this function.
         return False
 
-    # Add the current date/time to the sample for the x-axis.
-    timestamp_data.append(datetime.datetime.now())
+    # Are these the same production statistics as the last sample (the meters and inverters report
+    # less often than they are polled)? There is then nothing new to plot.
+    if deduplicator and not deduplicator.is_changed('/production.json', production_statistics):
+        return False
+
+    # The current epoch time of the sample for the x-axis.
+    timestamp = time.time()
 
     # Obtain the number of micro-inverters.
-    production_statistics_production = [production_statistic for production_statistic in production_statistics['production'] if production_statistic['type'] == 'inverters'][0]
     global number_of_inverters
-    number_of_inverters = production_statistics_production['activeCount']
+    number_of_inverters = production_statistics[f'{INVERTERS_PRODUCTION}.activeCount'] or 0
 
-    # The Production meters can be not present (not Gateway Metered) or individually turned off
-    # (and they require a working CT clamp).
-    meter_statistics_production = [meter_status for meter_status in meters_status if meter_status['measurementType'] == 'production'][0]
-    if meter_statistics_production['state'] == 'enabled':
-        # Get the Production section of the Production Statistics JSON that matches the configured
-        # meter mode.
-        production_statistics_production_eim = [production_statistic for production_statistic in production_statistics['production'] if production_statistic['type'] == 'eim' and production_statistic['measurementType'] == meter_statistics_production['measurementType']][0]
+    # The current Production meter reading can read < 0 if energy (often a trace amount) is
+    # actually flowing the other way from the grid.
+    production = max(0, get_meter_reading(production_statistics, PRODUCTION_EIM))
 
-        # The current Production meter reading can read < 0 if energy (often a trace amount) is
-        # actually flowing the other way from the grid.
-        production_data.append(max(0, production_statistics_production_eim['wNow']) if production_statistics_production_eim['activeCount'] > 0 else 0)
-    else:
-        production_data.append(0)
+    # Consumption statistics.
+    consumption_net = 0-get_meter_reading(production_statistics, CONSUMPTION_NET_EIM)
+    consumption_total = 0-get_meter_reading(production_statistics, CONSUMPTION_TOTAL_EIM)
 
-    # The Consumption meters can be not present (not Gateway Metered) or individually turned off
-    # (and they require a working CT clamp).
-    meter_statistics_consumption = [meter_status for meter_status in meters_status if meter_status['measurementType'] == 'net-consumption' or meter_status['measurementType'] == 'total-consumption'][0]
-    if meter_statistics_consumption['state'] == 'enabled':
-        # Get the Consumption section for each meter of the Production Statistics JSON.
-        for production_statistics_consumption in production_statistics['consumption']:
-
-            if production_statistics_consumption['type'] == 'eim':
-                # Which meter is this stats for?
-                if production_statistics_consumption['measurementType'] == 'net-consumption':
-                    # Net consumption statistics.
-                    consumption_net_data.append(0-production_statistics_consumption['wNow'] if production_statistics_consumption['activeCount'] > 0 else 0)
-                elif production_statistics_consumption['measurementType'] == 'total-consumption':
-                    # Total consumption statistics.
-                    consumption_total_data.append(0-production_statistics_consumption['wNow'] if production_statistics_consumption['activeCount'] > 0 else 0)
-                else:
-                    raise ValueError(f'Unknown measurementType : {production_statistics_consumption["measurementType"]}')
-            else:
-                print(f'Warning : Ignoring unknown consumption type: {production_statistics_consumption["type"]}')
-    else:
-        consumption_net_data.append(0)
-        consumption_total_data.append(0)
+    # Add the sample (in the order of the series).
+    meter_data.append(timestamp, (production, consumption_net, consumption_total))
 
     # We have updated data.
     return True
 
+def update_plots(_=None):
+    """
+    Updates the plot data (decimated to the pixel width of the axes at the current zoom).
+
+    This is also called whenever the user changes the x-axis limits (such as when zooming).
+
+    Args:
+        _: Dummy argument for the axes callback.
+
+    Returns:
+        None
+    """
+
+    # The timestamps of the data (already matplotlib dates, so this is a view rather than a copy).
+    dates = meter_data.get_timestamps()
+
+    # The number of pixel columns that all the data spans at the current zoom.
+    x_lim = axes.get_xlim()
+    columns = int(axes.get_window_extent().width * (dates[-1] - dates[0]) / max(x_lim[1] - x_lim[0], 1e-9)) + 1
+
+    # Only the envelope of the data that can actually be seen is plotted.
+    dates, (production, consumption_total, consumption_net) = TimeSeriesRingBuffer.decimate(
+        dates,
+        [meter_data.get_series(PRODUCTION_SERIES), meter_data.get_series(CONSUMPTION_TOTAL_SERIES), meter_data.get_series(CONSUMPTION_NET_SERIES)],
+        columns
+    )
+
+    # Plot the data.
+    production_plot.set_data(dates, production)
+    consumption_total_plot.set_data(dates, consumption_total)
+    consumption_net_plot.set_data(dates, consumption_net)
+
+def on_xlim_changed(_):
+    """
+    Updates the plot data when the user changes the x-axis limits (such as when zooming).
+
+    Args:
+        _: Dummy argument for the axes callback.
+
+    Returns:
+        None
+    """
+
+    # Is the animation moving the limits? It updates the plot data itself once it has finished.
+    if autoscrolling:
+        return
+
+    update_plots()
+
 def on_pick(event):
     """
     Toggles the visibility of a plot and its associated annotation based on a legend line pick
@@ -204,16 +316,22 @@ def setup_plot():
     axes = figure.subplots()
     axes.set_facecolor('#DEDEDE')
 
+    # The x-axis is plotted as dates (shown in the local timezone).
+    axes.xaxis_date(tz=datetime.datetime.now().astimezone().tzinfo)
+
     # Annotate the axes.
     axes.set_title('Enphase® Gateway Meters\n')
     axes.set_xlabel('Time')
     axes.set_ylabel('Watts')
 
+    # The timestamps of the data (already matplotlib dates, so this is a view rather than a copy).
+    dates = meter_data.get_timestamps()
+
     # Plot the data.
     global production_plot, consumption_total_plot, consumption_net_plot
-    production_plot, = axes.plot(timestamp_data, production_data, c='#EC5E29', label='Production', marker='o', markevery=[-1])
-    consumption_total_plot, = axes.plot(timestamp_data, consumption_total_data, c='#29B7EC', label='Consumption', marker='o', markevery=[-1])
-    consumption_net_plot, = axes.plot(timestamp_data, consumption_net_data, c='#29EC5E', label='Export/Import', marker='o', markevery=[-1], visible=False)
+    production_plot, = axes.plot(dates, meter_data.get_series(PRODUCTION_SERIES), c='#EC5E29', label='Production', marker='o', markevery=[-1], animated=blit)
+    consumption_total_plot, = axes.plot(dates, meter_data.get_series(CONSUMPTION_TOTAL_SERIES), c='#29B7EC', label='Consumption', marker='o', markevery=[-1], animated=blit)
+    consumption_net_plot, = axes.plot(dates, meter_data.get_series(CONSUMPTION_NET_SERIES), c='#29EC5E', label='Export/Import', marker='o', markevery=[-1], visible=False, animated=blit)
 
     # Draw a horizontal line at 0 indicating import/export threshold.
     axes.axhline(linewidth=0.3, color='k')
@@ -224,9 +342,10 @@ def setup_plot():
 
     # Label the most recent result (at the end).
     global production_annotation, consumption_total_annotation, consumption_net_annotation
-    production_annotation = axes.annotate(f'{production_data[-1]} W', xy=(timestamp_data[-1], production_data[-1]), xytext=(0, 5), textcoords='offset points')
-    consumption_total_annotation = axes.annotate(f'{consumption_total_data[-1]} W', xy=(timestamp_data[-1], consumption_total_data[-1]), xytext=(0, 5), textcoords='offset points')
-    consumption_net_annotation = axes.annotate(f'{consumption_net_data[-1]} W', xy=(timestamp_data[-1], consumption_net_data[-1]), xytext=(0, 5), textcoords='offset points', visible=False)
+    timestamp, values = meter_data.get_latest()
+    production_annotation = axes.annotate(f'{values[PRODUCTION_SERIES]:g} W', xy=(timestamp, values[PRODUCTION_SERIES]), xytext=(0, 5), textcoords='offset points', animated=blit)
+    consumption_total_annotation = axes.annotate(f'{values[CONSUMPTION_TOTAL_SERIES]:g} W', xy=(timestamp, values[CONSUMPTION_TOTAL_SERIES]), xytext=(0, 5), textcoords='offset points', animated=blit)
+    consumption_net_annotation = axes.annotate(f'{values[CONSUMPTION_NET_SERIES]:g} W', xy=(timestamp, values[CONSUMPTION_NET_SERIES]), xytext=(0, 5), textcoords='offset points', visible=False, animated=blit)
 
     # Display the legend.
     legend = axes.legend()
@@ -254,6 +373,15 @@ def setup_plot():
     # Configure the axes' grid.
     axes.yaxis.grid(linestyle='dashed', alpha=0.8)
 
+    # Decimate the data whenever the user changes the zoom (and for the initial zoom).
+    axes.callbacks.connect('xlim_changed', on_xlim_changed)
+    update_plots()
+
+    # When blitting, the plots and annotations are drawn over the chart after each redraw.
+    if blit:
+        global blit_manager
+        blit_manager = BlitManager(figure, [production_plot, production_annotation, consumption_total_plot, consumption_total_annotation, consumption_net_plot, consumption_net_annotation])
+
     # Return the figure.
     return figure
 
@@ -261,7 +389,7 @@ def update_axes():
     """
     Updates the plot data and annotations.
 
-    This function updates the plot data based on the latest data in the global data lists.
+    This function updates the plot data based on the latest data in the ring buffer.
     It also updates the annotations that display the most recent values on the plot.
 
     Returns:
@@ -269,19 +397,19 @@ def update_axes():
     """
 
     # Plot the data.
-    production_plot.set_data(timestamp_data, production_data)
-    consumption_total_plot.set_data(timestamp_data, consumption_total_data)
-    consumption_net_plot.set_data(timestamp_data, consumption_net_data)
+    update_plots()
 
     # Update the annotations.
-    production_annotation.xy = (timestamp_data[-1], production_data[-1])
-    production_annotation.set_text(f'{production_data[-1]} W')
+    timestamp, values = meter_data.get_latest()
+
+    production_annotation.xy = (timestamp, values[PRODUCTION_SERIES])
+    production_annotation.set_text(f'{values[PRODUCTION_SERIES]:g} W')
 
-    consumption_total_annotation.xy = (timestamp_data[-1], consumption_total_data[-1])
-    consumption_total_annotation.set_text(f'{consumption_total_data[-1]} W')
+    consumption_total_annotation.xy = (timestamp, values[CONSUMPTION_TOTAL_SERIES])
+    consumption_total_annotation.set_text(f'{values[CONSUMPTION_TOTAL_SERIES]:g} W')
 
-    consumption_net_annotation.xy = (timestamp_data[-1], consumption_net_data[-1])
-    consumption_net_annotation.set_text(f'{consumption_net_data[-1]} W')
+    consumption_net_annotation.xy = (timestamp, values[CONSUMPTION_NET_SERIES])
+    consumption_net_annotation.set_text(f'{values[CONSUMPTION_NET_SERIES]:g} W')
 
 def animate(_):
     """
@@ -301,7 +429,7 @@ def animate(_):
     """
 
     # Store this before it is potentially over-written.
-    most_recent_timestamp = timestamp_data[-1]
+    most_recent_timestamp, _ = meter_data.get_latest()
 
     # If there are no new meter readings to add then we skip re-drawing.
     if add_result_from_gateway():
@@ -314,27 +442,51 @@ def animate(_):
 
         # Check whether the current zoom included the old end datapoint
         # (i.e. user appeared deliberately interested in fresh data).
-        user_viewing_recent_data = (old_x_lim[0] <= matplotlib.dates.date2num(most_recent_timestamp) <= old_x_lim[1])
+        user_viewing_recent_data = (old_x_lim[0] <= most_recent_timestamp <= old_x_lim[1])
 
         # Check whether the newest added data would now fall out of the old zoom view.
-        new_data_visible_in_old_view = (old_x_lim[0] <= matplotlib.dates.date2num(timestamp_data[-1]) <= old_x_lim[1])
-
-        # Ensure the axis are auto-scaled after adding new data.
-        axes.relim()
-        axes.autoscale()
-
-        # Update the toolbar memory to the new zoomed out axis limits.
-        figure.canvas.toolbar.update()
-        figure.canvas.toolbar.push_current()
-
-        # Was the user looking at old data before we added more data or were they looking at fresh
-        # data that now will be outside of their view.
-        if (not user_viewing_recent_data
-                or (user_viewing_recent_data and new_data_visible_in_old_view)):
-            # Restore old axis zoom (recent datapoint was never in zoom range anyway or zoom range
-            # still covers the new data).
-            axes.set_xlim(old_x_lim)
-            axes.set_ylim(old_y_lim)
+        new_data_visible_in_old_view = (old_x_lim[0] <= meter_data.get_latest()[0] <= old_x_lim[1])
+
+        # When blitting, only the plots and annotations are redrawn unless the zoom has to change.
+        if blit and (not user_viewing_recent_data or new_data_visible_in_old_view):
+            blit_manager.blit()
+            return
+
+        # The plots are decimated once the new limits are known (not for each change below).
+        global autoscrolling
+        autoscrolling = True
+
+        try:
+            # Ensure the axis are auto-scaled after adding new data.
+            axes.relim()
+            axes.autoscale()
+
+            # When blitting, leave room for the following data (so those frames can be blitted).
+            if blit:
+                new_x_lim = axes.get_xlim()
+                axes.set_xlim(new_x_lim[0], new_x_lim[1] + (new_x_lim[1] - new_x_lim[0]) * BLIT_HEADROOM)
+
+            # Update the toolbar memory to the new zoomed out axis limits.
+            figure.canvas.toolbar.update()
+            figure.canvas.toolbar.push_current()
+
+            # Was the user looking at old data before we added more data or were they looking at
+            # fresh data that now will be outside of their view.
+            if (not user_viewing_recent_data
+                    or (user_viewing_recent_data and new_data_visible_in_old_view)):
+                # Restore old axis zoom (recent datapoint was never in zoom range anyway or zoom
+                # range still covers the new data).
+                axes.set_xlim(old_x_lim)
+                axes.set_ylim(old_y_lim)
+        finally:
+            autoscrolling = False
+
+        # Decimate the plots to the new limits.
+        update_plots()
+
+        # When blitting, the whole chart is only redrawn when the zoom changes.
+        if blit:
+            figure.canvas.draw_idle()
 
 def get_secure_gateway_session(credentials):
     """
@@ -372,8 +524,19 @@ def get_secure_gateway_session(credentials):
     if not os.path.exists('configuration/gateway.cer'):
         Gateway.trust_gateway(host)
 
-    # Instantiate the Gateway API wrapper (with the default library hostname if None provided).
-    gateway = Gateway(host)
+    # Instantiate the Gateway API wrapper (with the default library hostname if None provided),
+    # an expired session is renewed with the same token and the session is persisted so a restart
+    # can reuse it. The polled endpoints respond quickly, so a short timeout stops a stalled request
+    # from holding up the next poll. Idempotent requests are retried and fail fast whilst the
+    # gateway is unreachable.
+    gateway = Gateway(
+        host,
+        reauthenticate=True,
+        session_file=Gateway.DEFAULT_SESSION_FILE,
+        timeout=(credentials.get('gateway_connect_timeout', 5), credentials.get('gateway_read_timeout', 10)),
+        retry_policy=RetryPolicy(),
+        circuit_breaker=CircuitBreaker()
+    )
 
     # Are we not able to login to the gateway?
     if not gateway.login(credentials['gateway_token']):
@@ -412,15 +575,42 @@ def main():
     global meters_status
     meters_status = gateway.api_call('/ivp/meters')
 
+    # Only the production statistics that are used are returned from each request.
+    global production_selection
+    production_selection = get_production_selection()
+
+    # Unchanged production statistics are only plotted every dedup_maximum_age seconds (so the
+    # chart is not redrawn for them).
+    global deduplicator
+    if credentials.get('dedup_readings', False):
+        deduplicator = ResponseDeduplicator(maximum_age=credentials.get('dedup_maximum_age', 60))
+
+    # The history is retained for this many seconds (and at most one sample a second is added).
+    plot_retention = credentials.get('plot_retention', 86400)
+
+    # Preallocate the ring buffer for the data.
+    global meter_data
+    meter_data = TimeSeriesRingBuffer(capacity=int(plot_retention) + 1, number_of_series=3, retention=plot_retention, time_scale=TimeSeriesRingBuffer.SECONDS_PER_DAY)
+
     # Get the first result.
     add_result_from_gateway()
 
+    # Whether only the plots and annotations are redrawn for each frame.
+    global blit
+    blit = credentials.get('plot_blit', False)
+
     # Draw the initial plot.
     global figure
     figure = setup_plot()
 
-    # Set a timer to animate the chart every 1 second.
-    _ = animation.FuncAnimation(figure, animate, interval=1000)
+    # Set a timer to animate the chart every 1 second (when blitting, the animation draws the
+    # chart itself rather than the whole chart being redrawn for every frame).
+    if blit:
+        animation_timer = figure.canvas.new_timer(interval=1000)
+        animation_timer.add_callback(animate, None)
+        animation_timer.start()
+    else:
+        _ = animation.FuncAnimation(figure, animate, interval=1000)
 
     # Show the plot screen.
     plt.show()
@@ -36,6 +36,9 @@ import colorsys
 # We timestamp any errors.
 import datetime
 
+# We cache the frames of recently drawn text and animations.
+import functools
+
 # We count forwards then backwards.
 import itertools
 
@@ -48,9 +51,16 @@ import os
 # We write to stderr.
 import sys
 
+# The weather is refreshed in its own thread.
+import threading
+
 # We use the sleep function to pause between screen draws.
 import time
 
+# We slice each frame out of the image as a NumPy array ("pip install numpy" if getting import
+# errors).
+import numpy as np
+
 # Unicorn HAT HD uses pillow to generate images to then draw on the LEDs of the Unicorn HAT HD
 # ("pip install pillow" if getting import errors).
 from PIL import Image, ImageDraw, ImageFont
@@ -68,20 +78,53 @@ import urllib3
 # All the shared Enphase® functions are in these packages.
 from enphase_api.cloud.authentication import Authentication
 from enphase_api.local.gateway import Gateway
+from enphase_api.local.models import ProductionSummary
+from enphase_api.local.poll_scheduler import PollScheduler
+from enphase_api.local.resilience import CircuitBreaker, RetryPolicy
 
 class UnicornHATHelper:
     """
     A utility class for drawing scrolling text and animations on a Unicorn HAT HD display.
     """
 
+    # The number of most recently drawn texts and animations that have their frames cached.
+    TEXT_CACHE_SIZE = 32
+    ANIMATION_CACHE_SIZE = 16
+
     @staticmethod
-    def draw_scrolling_text(unicornhathd, screen_width, screen_height, line, color, font, speed=0.04, end_time=time.time() + 60):
+    def draw_frame(unicornhathd, frame):
         """
-        Draw scrolling text on the Unicorn HAT HD using a specified font.
+        Draw a whole frame into the Unicorn HAT HD buffer (this does not show it).
 
         Args:
             unicornhathd (UnicornHAT HD):
                 An instance of the Unicorn HAT HD library.
+            frame (numpy.ndarray):
+                The (x, y, RGB) pixels of the frame.
+
+        Returns:
+            None
+        """
+
+        # The Unicorn HAT HD library stores its buffer in the same (x, y, RGB) layout so the whole
+        # frame can be copied in one go.
+        buffer = getattr(unicornhathd, '_buf', None)
+        if buffer is not None and buffer.shape == frame.shape:
+            buffer[:] = frame
+            return
+
+        # Other implementations (such as the simulator) have each pixel set.
+        for x_pixel, y_pixel in np.ndindex(frame.shape[:2]):
+            red, green, blue = [int(n) for n in frame[x_pixel, y_pixel]]
+            unicornhathd.set_pixel(x_pixel, y_pixel, red, green, blue)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+    def get_scrolling_text_frames(screen_width, screen_height, line, color, font):
+        """
+        Get the frames of text scrolling forwards then backwards (the most recent are cached).
+
+        Args:
             screen_width (int):
                 Width of the screen in pixels.
             screen_height (int):
@@ -92,20 +135,9 @@ class UnicornHATHelper:
                 The RGB color tuple (red, green, blue) for the text.
             font (PIL ImageFont):
                 The font to use for rendering the text.
-            speed (float, optional):
-                The time delay between scrolling frames in seconds. Default is 0.04.
-            end_time (float, optional):
-                The timestamp indicating when to stop scrolling.
-                Default is current time + 60 seconds.
 
         Returns:
-            None
-
-        Note:
-            This method draws scrolling text on the Unicorn HAT HD using the specified font.
-            The text scrolls horizontally left to right multiple times until the end_time is
-            reached or the method is manually interrupted. The text color, font, and speed
-            of scrolling can be customized.
+            tuple: The (x, y, RGB) frames (each a view of the same rendered text).
         """
 
         # Calculate the width and height of the text when rendered by the font.
@@ -122,28 +154,95 @@ class UnicornHATHelper:
         # (we set the text colour based off system production energy we're generating).
         draw.text(xy=(0, -font_upper), text=line, fill=color, font=font)
 
-        # We want to scroll left to right multiple times (at least once).
-        while True:
+        # Convert the image to an array once (with the x axis first so each frame is just a view).
+        columns = np.asarray(image).swapaxes(0, 1)
 
-            # For each pixel we are scrolling forwards then backwards.
-            for scroll_x_offset in itertools.chain(range(font_width - screen_width), range(font_width - screen_width, 0, -1)):
+        # For each pixel we are scrolling forwards then backwards, each frame is the screen's worth
+        # of columns from the scrolling offset (the screen's x axis is reversed).
+        return tuple(
+            columns[scroll_x_offset:scroll_x_offset + screen_width][::-1]
+            for scroll_x_offset in itertools.chain(range(font_width - screen_width), range(font_width - screen_width, 0, -1))
+        )
 
-                # Take each of the pixels on the x axis.
-                for x_pixel in range(screen_width):
+    @staticmethod
+    @functools.lru_cache(maxsize=ANIMATION_CACHE_SIZE)
+    def get_animation_frames(screen_width, screen_height, filename):
+        """
+        Get the frames of an animation image (the most recent are cached).
 
-                    # Take each of the pixels on the y axis for this position on the x axis.
-                    for y_pixel in range(screen_height):
+        Args:
+            screen_width (int):
+                Width of the screen in pixels.
+            screen_height (int):
+                Height of the screen in pixels.
+            filename (str):
+                The name of the image file (without the extension) to use for animation frames.
+
+        Returns:
+            tuple: The (x, y, RGB) frames (each a view of the same image).
+        """
 
-                        # Get what the pixel should be according to the Pillow in memory image
-                        # followed by the x axis scrolling offset.
-                        pixel = image.getpixel((x_pixel + scroll_x_offset, y_pixel))
+        # Open the requested image (and ignore any transparency values).
+        with Image.open(f'resources/icons/{filename}.png') as image:
+            # Convert the image to an array once (its rows are the screen's x axis so each frame is
+            # just a view).
+            pixels = np.asarray(image.convert('RGB'))
+
+        # Get the image width and height.
+        image_height, image_width, _ = pixels.shape
+
+        # Take each of the frame x positions in the image then each of the frame y positions.
+        return tuple(
+            pixels[frame_y * screen_height:(frame_y * screen_height) + screen_width, frame_x * screen_width:(frame_x * screen_width) + screen_height]
+            for frame_x in range(int(image_width / screen_width))
+            for frame_y in range(int(image_height / screen_height))
+        )
 
-                        # Get the Red, Green, Blue values for this pixel.
-                        red, green, blue = [int(n) for n in pixel]
+    @staticmethod
+    def draw_scrolling_text(unicornhathd, screen_width, screen_height, line, color, font, speed=0.04, end_time=time.time() + 60):
+        """
+        Draw scrolling text on the Unicorn HAT HD using a specified font.
+
+        Args:
+            unicornhathd (UnicornHAT HD):
+                An instance of the Unicorn HAT HD library.
+            screen_width (int):
+                Width of the screen in pixels.
+            screen_height (int):
+                Height of the screen in pixels.
+            line (str):
+                The text to display.
+            color (tuple):
+                The RGB color tuple (red, green, blue) for the text.
+            font (PIL ImageFont):
+                The font to use for rendering the text.
+            speed (float, optional):
+                The time delay between scrolling frames in seconds. Default is 0.04.
+            end_time (float, optional):
+                The timestamp indicating when to stop scrolling.
+                Default is current time + 60 seconds.
 
-                        # Tell the Unicorn HAT HD to set the LED pixel buffer to be set to the
-                        # same as the Pillow in memory image pixel.
-                        unicornhathd.set_pixel((screen_width - 1) - x_pixel, y_pixel, red, green, blue)
+        Returns:
+            None
+
+        Note:
+            This method draws scrolling text on the Unicorn HAT HD using the specified font.
+            The text scrolls horizontally left to right multiple times until the end_time is
+            reached or the method is manually interrupted. The text color, font, and speed
+            of scrolling can be customized.
+        """
+
+        # Get the (cached) frames of the text scrolling forwards then backwards.
+        frames = UnicornHATHelper.get_scrolling_text_frames(screen_width, screen_height, line, color, font)
+
+        # We want to scroll left to right multiple times (at least once).
+        while True:
+
+            # Take each of the scrolling frames.
+            for frame in frames:
+
+                # Draw the frame into the Unicorn HAT HD buffer.
+                UnicornHATHelper.draw_frame(unicornhathd, frame)
 
                 # The screen has been re-drawn in the buffer so now set the Unicorn HAT HD to
                 # reflect the buffer (so the user won't watch it re-drawing).
@@ -186,40 +285,23 @@ class UnicornHATHelper:
             It updates the Unicorn HAT HD display with each frame, creating a scrolling animation.
         """
 
-        # Open the requested image (and ignore any transparency values).
-        image = Image.open(f'resources/icons/{filename}.png').convert('RGB')
+        # Get the (cached) frames of the animation.
+        frames = UnicornHATHelper.get_animation_frames(screen_width, screen_height, filename)
 
         # The images are left-to-right.
         unicornhathd.rotation(unicornhathd.get_rotation() + 90)
 
-        # Get the image width and height.
-        image_width, image_height = image.size
-
-        # Take each of the frame x positions in the image.
-        for frame_x in range(int(image_width / screen_width)):
-            # Take each of the frame y positions in the image.
-            for frame_y in range(int(image_height / screen_height)):
-                # Take each of the screen's x axis pixels.
-                for x_pixel in range(screen_width):
-                    # Take each of the screen's y axis pixels for this position on the x axis.
-                    for y_pixel in range(screen_height):
-                        # Get what the pixel should be according to the Pillow in memory image
-                        # followed by the x axis frame offset.
-                        pixel = image.getpixel(((frame_x * screen_width) + y_pixel, (frame_y * screen_height) + x_pixel))
-
-                        # Get the Red, Green, Blue values for this pixel.
-                        red, green, blue = [int(n) for n in pixel]
-
-                        # Tell the Unicorn HAT HD to set the LED pixel buffer to be set to the
-                        # same as the Pillow in memory image pixel.
-                        unicornhathd.set_pixel(x_pixel, y_pixel, red, green, blue)
+        # Take each of the frames.
+        for frame in frames:
+            # Draw the frame into the Unicorn HAT HD buffer.
+            UnicornHATHelper.draw_frame(unicornhathd, frame)
 
-                # The screen has been re-drawn in the buffer so now set the Unicorn HAT HD to
-                # reflect the buffer (so the user will not watch it re-drawing).
-                unicornhathd.show()
+            # The screen has been re-drawn in the buffer so now set the Unicorn HAT HD to
+            # reflect the buffer (so the user will not watch it re-drawing).
+            unicornhathd.show()
 
-                # Pause before attempting to draw the next scrolling frame.
-                time.sleep(speed)
+            # Pause before attempting to draw the next scrolling frame.
+            time.sleep(speed)
 
         # Restore rotation.
         unicornhathd.rotation(unicornhathd.get_rotation() - 90)
@@ -229,38 +311,42 @@ class ScreenWeather:
     A class for displaying weather information on a Unicorn HAT HD.
     """
 
-    def __init__(self, unicornhathd, screen_width, screen_height, latitude, longitude):
+    def __init__(self, unicornhathd, screen_width, screen_height, latitude, longitude, time_to_live=900, retry_interval=60):
         self.unicornhathd = unicornhathd
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.latitude = latitude
         self.longitude = longitude
 
+        # How many seconds the weather is fresh for, and how long to wait after a failed refresh.
+        self.time_to_live = time_to_live
+        self.retry_interval = retry_interval
+
         self.weather_last_updated = None
+        self.weather_last_attempted = None
         self.weather_filename = None
 
+        # The thread refreshing the weather (if a refresh is in progress).
+        self.refresh_thread = None
+
     def draw_screen(self):
         """
         Draw the weather animation on the Unicorn HAT HD display.
 
+        The weather is refreshed in the background when it is older than its time to live; until
+        then the previous (stale) weather is drawn, so drawing never waits on the network.
+
         Returns:
-            None
+            bool: True if the weather was drawn, False if it has not been loaded yet.
         """
 
-        # If the weather has not been loaded yet, or it was loaded over 15 minutes ago.
-        if not self.weather_last_updated or self.weather_last_updated + 900 < time.time():
-            # Get the latest weather.
-            weather_code, wind_speed, is_day = self.get_weather_details()
+        # If the weather has not been loaded yet, or it is older than its time to live.
+        if not self.weather_last_updated or self.weather_last_updated + self.time_to_live < time.time():
+            self.refresh_weather()
 
-            # Set the weather_last_updated date/time.
-            self.weather_last_updated = time.time()
-
-            # We convert the weather_code, wind_speed and is_day into a PNG filename.
-            self.weather_filename = self.get_weather_filename(
-                weather_code=weather_code,
-                wind_speed=wind_speed,
-                is_day=is_day
-            )
+        # Has the weather not been loaded yet?
+        if not self.weather_filename:
+            return False
 
         # Draw the weather animation.
         UnicornHATHelper.draw_animation(
@@ -270,6 +356,69 @@ class ScreenWeather:
             filename=self.weather_filename
         )
 
+        return True
+
+    def refresh_weather(self):
+        """
+        Start refreshing the weather in the background (unless a refresh is already in progress or
+        the last attempt failed too recently).
+
+        Returns:
+            None
+        """
+
+        # Is the weather already being refreshed?
+        if self.refresh_thread and self.refresh_thread.is_alive():
+            return
+
+        # Did the last attempt fail too recently?
+        if self.weather_last_attempted and self.weather_last_attempted + self.retry_interval > time.time():
+            return
+
+        # Set the weather_last_attempted date/time.
+        self.weather_last_attempted = time.time()
+
+        # Refresh the weather in the background.
+        self.refresh_thread = threading.Thread(target=self.update_weather, name='ScreenWeather', daemon=True)
+        self.refresh_thread.start()
+
+    def update_weather(self):
+        """
+        Get the latest weather (this is run in the background by refresh_weather).
+
+        Returns:
+            None
+        """
+
+        # A weather request may fail (the previous weather is kept).
+        try:
+            # Get the latest weather.
+            weather_code, wind_speed, is_day = self.get_weather_details()
+        # Sometimes unable to connect
+        except requests.exceptions.ConnectionError as exception:
+            # Log this error.
+            print(f'{datetime.datetime.now()} - Weather API connection error:\n {exception}', file=sys.stderr)
+            return
+        # This happens generally if there are wider issues on the network.
+        except requests.exceptions.ReadTimeout:
+            # Log this non-critial often transient error.
+            print(f'{datetime.datetime.now()} - Weather API request timed out.', file=sys.stderr)
+            return
+        except requests.exceptions.JSONDecodeError as exception:
+            # Log this non-critial often transient error.
+            print(f'{datetime.datetime.now()} - Weather API returned bad JSON:\n {exception}', file=sys.stderr)
+            return
+
+        # We convert the weather_code, wind_speed and is_day into a PNG filename.
+        self.weather_filename = self.get_weather_filename(
+            weather_code=weather_code,
+            wind_speed=wind_speed,
+            is_day=is_day
+        )
+
+        # Set the weather_last_updated date/time.
+        self.weather_last_updated = time.time()
+
     def get_weather_details(self, timezone='Europe%2FLondon'):
         """
         Retrieve weather details from an API.
@@ -541,6 +690,82 @@ class ScreenChart:
         # Restore rotation.
         self.unicornhathd.rotation(self.unicornhathd.get_rotation() - 90)
 
+class ProductionPoller:
+    """
+    A class for getting the production details from the gateway in the background.
+
+    Each request is scheduled for when the gateway is next expected to have a new reading (the
+    microinverters only report every 5 minutes), or after 60 seconds if that is not known.
+    """
+
+    def __init__(self, gateway, reading_type='Meter', interval=60):
+        self.gateway = gateway
+        self.reading_type = reading_type
+
+        # The latest production details and the exception of the latest attempt (if it failed).
+        self.production_details = None
+        self.exception = None
+
+        # Set once the first attempt has completed.
+        self.updated = threading.Event()
+
+        # The next refresh is the next reading time returned with the production details.
+        self.scheduler = PollScheduler()
+        self.scheduler.add(
+            name='/production.json',
+            interval=interval,
+            callback=self.update_production_details,
+            next_refresh=lambda production_details: production_details[3]
+        )
+
+        # Poll in the background.
+        self.thread = threading.Thread(target=self.scheduler.run, name='ProductionPoller', daemon=True)
+        self.thread.start()
+
+    def update_production_details(self):
+        """
+        Get the latest production details (this is run in the background by the scheduler).
+
+        Returns:
+            tuple: The production details (or None if they could not be obtained).
+        """
+
+        # A request may fail (the exception is raised to the display loop instead).
+        try:
+            production_details = get_production_details(gateway=self.gateway, reading_type=self.reading_type)
+        # The request could fail for any reason (connection, timeout, bad JSON), and an exception
+        # here would stop the scheduler.
+        # pylint: disable-next=broad-exception-caught
+        except Exception as exception:
+            self.exception = exception
+            self.updated.set()
+            return None
+
+        self.production_details = production_details
+        self.exception = None
+        self.updated.set()
+
+        return production_details
+
+    def get_production_details(self):
+        """
+        Get the latest production details (waiting for the first attempt to complete).
+
+        Returns:
+            tuple: The production details (as returned by get_production_details()).
+
+        Raises:
+            Exception: The exception of the latest attempt (if it failed).
+        """
+
+        self.updated.wait()
+
+        # Did the latest attempt fail?
+        if self.exception:
+            raise self.exception
+
+        return self.production_details
+
 def restricted_float(number):
     """
     Validate and convert a floating-point number within the range [0.0, 1.0].
@@ -590,25 +815,27 @@ def get_production_details(gateway, reading_type='Meter'):
 
     # Get Gateway status.
     production_json = gateway.api_call('/production.json')
+    production = ProductionSummary.from_json_list(production_json['production'])
+    consumption = ProductionSummary.from_json_list(production_json['consumption'])
 
     # We generate text colours for production thresholds within the HSV scale based off the number
     # of microinverter devices (which should correspond to overall system size).
-    number_of_microinverters = production_json['production'][0]['activeCount']
+    number_of_microinverters = production[0].active_count
 
     # Where to get the reading from.
     if reading_type == 'Inverters':
         # Get a reference to just the inverters bit of the Production JSON.
-        reading_json = production_json['production'][0]
+        reading = production[0]
 
         # Assume no meter.
         consumption_watts = 0
     elif reading_type == 'Meter':
         # Get a reference to just the production meter bit of the Production JSON.
-        reading_json = production_json['production'][1]
+        reading = production[1]
 
         # Return the consumption_watts (if consumption meter enabled).
-        if len(production_json['consumption']) > 0:
-            consumption_watts = production_json['consumption'][0]['wNow']
+        if len(consumption) > 0:
+            consumption_watts = consumption[0].w_now
         else:
             consumption_watts = 0
     else:
@@ -616,13 +843,13 @@ def get_production_details(gateway, reading_type='Meter'):
         raise ValueError('Invalid reading_type specified for get_production_details().')
 
     # Get the watts being generated now by the inverters.
-    production_watts = reading_json['wNow']
+    production_watts = reading.w_now
 
     # The inverters are only polled every 5 minutes
     # (so we can make sure we only attempt a refresh when there's likely new data).
-    if reading_type == 'Inverters' and reading_json['readingTime'] != 0:
+    if reading_type == 'Inverters' and reading.reading_time != 0:
         # Take the reading time and add 5 minutes (300 seconds).
-        next_reading_time = reading_json['readingTime'] + 300
+        next_reading_time = reading.reading_time + 300
 
         # If the data is already stale (happens in low light) try again in 60 seconds.
         if next_reading_time <= time.time():
@@ -670,8 +897,19 @@ def get_secure_gateway_session(credentials):
     if not os.path.exists('configuration/gateway.cer'):
         Gateway.trust_gateway(host)
 
-    # Instantiate the Gateway API wrapper (with the default library hostname if None provided).
-    gateway = Gateway(host)
+    # Instantiate the Gateway API wrapper (with the default library hostname if None provided),
+    # an expired session is renewed with the same token and the session is persisted so a restart
+    # can reuse it. The polled endpoints respond quickly, so a short timeout stops a stalled request
+    # from holding up the next poll. Idempotent requests are retried and fail fast whilst the
+    # gateway is unreachable.
+    gateway = Gateway(
+        host,
+        reauthenticate=True,
+        session_file=Gateway.DEFAULT_SESSION_FILE,
+        timeout=(credentials.get('gateway_connect_timeout', 5), credentials.get('gateway_read_timeout', 10)),
+        retry_policy=RetryPolicy(),
+        circuit_breaker=CircuitBreaker()
+    )
 
     # Are we not able to login to the gateway?
     if not gateway.login(credentials['gateway_token']):
@@ -710,6 +948,7 @@ def main():
     general_group = parser.add_argument_group('General')
     general_group.add_argument('/WattsPerPanel', '-WattsPerPanel', '--WattsPerPanel', dest='watts_per_panel', type=int, default=380, help='How many watts can each panel comfortably generate (defaults to 380 which is the limit of an IQ8H).')
     general_group.add_argument('/MaxWattsPerPanel', '-MaxWattsPerPanel', '--MaxWattsPerPanel', dest='maximum_watts_per_panel', type=int, default=384, help='How many watts maximum can each panel generate (defaults to 384 which is the limit of an IQ8H).')
+    general_group.add_argument('/ReadingType', '-ReadingType', '--ReadingType', dest='reading_type', choices=['Meter', 'Inverters'], default='Meter', help='Whether the production is read from the production meter or from the microinverters (which only report every 5 minutes) (defaults to "Meter").')
 
     # Arguments that can overide default behaviour when testing this program.
     testing_group = parser.add_argument_group('Testing')
@@ -796,6 +1035,9 @@ def main():
         maximum_watts_per_panel=args.maximum_watts_per_panel
     )
 
+    # The production details are refreshed in the background (when a new reading is expected).
+    production_poller = ProductionPoller(gateway=gateway, reading_type=args.reading_type)
+
     try:
         # Repeat forever unless the user presses CTRL + C.
         while True:
@@ -803,32 +1045,17 @@ def main():
             try:
                 # Optionally draw the weather.
                 if screen_weather:
-                    # A weather request may fail.
-                    try:
-                        screen_weather.draw_screen()
-                    # Sometimes unable to connect
-                    except requests.exceptions.ConnectionError as exception:
-                        # Log this error.
-                        print(f'{datetime.datetime.now()} - Weather API connection error:\n {exception}', file=sys.stderr)
-                    # This happens generally if there are wider issues on the network.
-                    except requests.exceptions.ReadTimeout:
-                        # Log this non-critial often transient error.
-                        print(f'{datetime.datetime.now()} - Weather API request timed out.', file=sys.stderr)
-                    except requests.exceptions.JSONDecodeError as exception:
-                        # Log this non-critial often transient error.
-                        print(f'{datetime.datetime.now()} - Weather API returned bad JSON:\n {exception}', file=sys.stderr)
+                    # This only draws the weather already in memory (it is refreshed in the background).
+                    screen_weather.draw_screen()
 
                     # Clear the screen while the next process runs (there can be a delay).
                     if not args.emulate_HAT:
                         unicornhathd.off()
 
-                # Get the production details.
-                production_power, consumption_power, number_of_microinverters, end_time = get_production_details(
-                    gateway=gateway,
-                    reading_type='Meter'
-                )
+                # Get the latest production details (raising any error getting them).
+                production_power, consumption_power, number_of_microinverters, end_time = production_poller.get_production_details()
 
-                # Draw the production power screen (until the end time).
+                # Draw the production power screen (until the next reading is expected).
                 screen_production.draw_screen(
                     number_of_microinverters=number_of_microinverters,
                     watts=production_power,
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# This file is part of Enphase-API <https://github.com/Matthew1471/Enphase-API>
+# Copyright (C) 2023 Matthew1471!
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+This module provides the chart helpers shared by the PyPlot examples (gateway_pyplot_meters.py and
+database_pyplot_meters.py):
+- A fixed-size store of the most recent samples of several series (with the reduction of a series
+  to the pixel width of a chart)
+- The blitting of a live chart (only redrawing the artists that change each frame)
+"""
+
+import numpy as np # Third party library; "pip install numpy"
+
+
+class TimeSeriesRingBuffer:
+    """
+    A fixed-size store of the most recent samples of several series that share timestamps.
+
+    Timestamps are float64 and values are float32. Each array is allocated at twice the capacity
+    and every sample is written to both halves, so the retained samples (oldest first) are always
+    one contiguous slice that can be plotted without being copied.
+    """
+
+    # Matplotlib dates are in days (pass this as the time_scale to store matplotlib dates).
+    SECONDS_PER_DAY = 24 * 60 * 60
+
+    def __init__(self, capacity, number_of_series, retention=None, time_scale=1):
+        """
+        Initialize (and preallocate) the ring buffer.
+
+        Args:
+            capacity (int): The maximum number of samples retained.
+            number_of_series (int): The number of values in each sample.
+            retention (float, optional):
+                Samples older than this many seconds before the newest sample are discarded.
+                Defaults to None (only the capacity limits the samples retained).
+            time_scale (float, optional):
+                The epoch seconds of each sample are divided by this when it is added (e.g.
+                SECONDS_PER_DAY to store matplotlib dates). Defaults to 1 (epoch seconds).
+        """
+
+        self.capacity = capacity
+        self.time_scale = time_scale
+
+        # The retention in the same units as the stored timestamps.
+        self.retention = retention / time_scale if retention is not None else None
+
+        # The mirrored arrays.
+        self.timestamps = np.zeros(2 * capacity, dtype=np.float64)
+        self.values = np.zeros((number_of_series, 2 * capacity), dtype=np.float32)
+
+        # The position of the oldest sample and the number of samples retained.
+        self.start = 0
+        self.length = 0
+
+    def __len__(self):
+        """
+        Get the number of samples retained.
+
+        Returns:
+            int: The number of samples.
+        """
+
+        return self.length
+
+    def append(self, timestamp, values):
+        """
+        Add a sample (discarding the oldest sample if full and any samples outside the retention).
+
+        Args:
+            timestamp (float): The epoch time of the sample.
+            values (sequence): A value for each of the series.
+        """
+
+        # Convert the timestamp to the stored units.
+        timestamp = timestamp / self.time_scale
+
+        # Write the sample to both halves.
+        position = (self.start + self.length) % self.capacity
+        self.timestamps[position] = self.timestamps[position + self.capacity] = timestamp
+        self.values[:, position] = self.values[:, position + self.capacity] = values
+
+        # Is the buffer full? The oldest sample has just been overwritten.
+        if self.length == self.capacity:
+            self.start = (self.start + 1) % self.capacity
+        else:
+            self.length += 1
+
+        # Discard any samples that are now outside the retention window.
+        if self.retention is not None:
+            while self.length > 1 and self.timestamps[self.start] < timestamp - self.retention:
+                self.start = (self.start + 1) % self.capacity
+                self.length -= 1
+
+    def get_timestamps(self):
+        """
+        Get the timestamps of the samples (oldest first, in the units of the time scale).
+
+        Returns:
+            numpy.ndarray: A view of the timestamps (this is not a copy).
+        """
+
+        return self.timestamps[self.start:self.start + self.length]
+
+    def get_series(self, series):
+        """
+        Get the values of one of the series (oldest first).
+
+        Args:
+            series (int): The index of the series.
+
+        Returns:
+            numpy.ndarray: A view of the values (this is not a copy).
+        """
+
+        return self.values[series, self.start:self.start + self.length]
+
+    def get_latest(self):
+        """
+        Get the most recent sample.
+
+        Returns:
+            tuple: The timestamp (in the units of the time scale) and a view of the value of each series.
+        """
+
+        position = (self.start + self.length - 1) % self.capacity
+        return self.timestamps[position], self.values[:, position]
+
+    @staticmethod
+    def decimate(timestamps, values, columns):
+        """
+        Reduce the data to the minimum and maximum of each pixel column (so the chart looks the same).
+
+        Args:
+            timestamps (numpy.ndarray): The (sorted) x-axis values.
+            values (list): The y-axis values of each series.
+            columns (int): The number of pixel columns that the timestamps span.
+
+        Returns:
+            tuple: The decimated timestamps and the decimated values of each series.
+        """
+
+        # Are there already no more points than a minimum and maximum for each column?
+        if len(timestamps) <= 2 * columns:
+            return timestamps, values
+
+        # The first point in each column (empty columns are skipped).
+        starts = np.unique(np.searchsorted(timestamps, np.linspace(timestamps[0], timestamps[-1], columns, endpoint=False)))
+
+        # Each column is drawn as a vertical line from its minimum to its maximum (and the line still
+        # ends at the most recent point).
+        decimated_timestamps = np.append(np.repeat(timestamps[starts], 2), timestamps[-1])
+
+        decimated_values = []
+        for series in values:
+            decimated_series = np.empty(len(decimated_timestamps), dtype=series.dtype)
+            decimated_series[0:-1:2] = np.minimum.reduceat(series, starts)
+            decimated_series[1:-1:2] = np.maximum.reduceat(series, starts)
+            decimated_series[-1] = series[-1]
+            decimated_values.append(decimated_series)
+
+        return decimated_timestamps, decimated_values
+
+
+class BlitManager:
+    """
+    A class to redraw only the animated artists of a matplotlib figure.
+    """
+
+    def __init__(self, figure, artists):
+        """
+        Initialize the blit manager (the artists are drawn over the chart after each full redraw).
+
+        Args:
+            figure (matplotlib.figure.Figure): The figure.
+            artists (list): The animated artists (redrawn for each frame).
+        """
+
+        self.figure = figure
+        self.artists = artists
+
+        # The chart without the animated artists (stored after each full redraw).
+        self.background = None
+
+        # Store the chart (and draw the artists over it) after each full redraw.
+        self.draw_event = figure.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, _):
+        """
+        Store the chart without the animated artists then draw them.
+
+        Args:
+            _: Dummy argument for the draw event.
+        """
+
+        self.background = self.figure.canvas.copy_from_bbox(self.figure.bbox)
+
+        self.draw_artists()
+
+    def draw_artists(self):
+        """
+        Draw the animated artists (which are excluded from a full redraw).
+        """
+
+        for artist in self.artists:
+            self.figure.draw_artist(artist)
+
+    def blit(self):
+        """
+        Redraw only the animated artists over the stored chart.
+        """
+
+        # Has the chart not yet been drawn?
+        if self.background is None:
+            self.figure.canvas.draw_idle()
+            return
+
+        # Restore the chart, draw the artists and then display the result.
+        self.figure.canvas.restore_region(self.background)
+        self.draw_artists()
+        self.figure.canvas.blit(self.figure.bbox)
+        self.figure.canvas.flush_events()
\ No newline at end of file
@@ -38,7 +38,8 @@ CREATE TABLE `MeterReading` (
   CONSTRAINT `MeterReading_TotalConsumption_Phase_A_ID` FOREIGN KEY (`TotalConsumption_Phase_A_ID`) REFERENCES `MeterReading_Result` (`ResultID`) ON DELETE CASCADE ON UPDATE CASCADE,
   CONSTRAINT `MeterReading_TotalConsumption_Phase_B_ID` FOREIGN KEY (`TotalConsumption_Phase_B_ID`) REFERENCES `MeterReading_Result` (`ResultID`) ON DELETE CASCADE ON UPDATE CASCADE,
   CONSTRAINT `MeterReading_TotalConsumption_Phase_C_ID` FOREIGN KEY (`TotalConsumption_Phase_C_ID`) REFERENCES `MeterReading_Result` (`ResultID`) ON DELETE CASCADE ON UPDATE CASCADE,
- PRIMARY KEY (`ReadingID`)
+ PRIMARY KEY (`ReadingID`),
+ INDEX `MeterReading_Timestamp` (`Timestamp`)
 );
 
 /* Views */
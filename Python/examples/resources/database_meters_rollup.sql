@@ -0,0 +1,98 @@
+/*
+  Rollup tables for database_meters.sql (or database_meters_wide.sql).
+
+  Each rollup row aggregates the (phase A) readings within a period of "Resolution" seconds
+  (60, 900, 3600 or 86400), so long time ranges can be charted and summarised without reading
+  every 1 second reading.
+
+  The rollups are maintained incrementally by database_rollup_meters.py which only reads the
+  readings after the last processed ReadingID (stored in MeterReading_Rollup_State).
+*/
+
+USE `Enphase`;
+
+/* Tables */
+
+CREATE TABLE `MeterReading_Rollup` (
+ `Resolution`               MEDIUMINT     UNSIGNED NOT NULL COMMENT 'Seconds',
+ `PeriodStart`              TIMESTAMP              NOT NULL,
+ `Samples`                  INT           UNSIGNED NOT NULL,
+ `Production_Sum`           DECIMAL(15,3)          NOT NULL DEFAULT 0,
+ `Production_Min`           DECIMAL(9,3)           NULL,
+ `Production_Max`           DECIMAL(9,3)           NULL,
+ `Production_Wh`            DECIMAL(12,3)          NOT NULL DEFAULT 0,
+ `NetConsumption_Sum`       DECIMAL(15,3)          NOT NULL DEFAULT 0,
+ `NetConsumption_Min`       DECIMAL(9,3)           NULL,
+ `NetConsumption_Max`       DECIMAL(9,3)           NULL,
+ `NetConsumption_Wh`        DECIMAL(12,3)          NOT NULL DEFAULT 0,
+ `NetConsumption_Import_Wh` DECIMAL(12,3)          NOT NULL DEFAULT 0,
+ `NetConsumption_Export_Wh` DECIMAL(12,3)          NOT NULL DEFAULT 0,
+ `TotalConsumption_Sum`     DECIMAL(15,3)          NOT NULL DEFAULT 0,
+ `TotalConsumption_Min`     DECIMAL(9,3)           NULL,
+ `TotalConsumption_Max`     DECIMAL(9,3)           NULL,
+ `TotalConsumption_Wh`      DECIMAL(12,3)          NOT NULL DEFAULT 0,
+ PRIMARY KEY (`Resolution`, `PeriodStart`)
+);
+
+CREATE TABLE `MeterReading_Rollup_State` (
+ `StateID`       TINYINT   UNSIGNED NOT NULL,
+ `LastReadingID` INT       UNSIGNED NOT NULL,
+ `LastTimestamp` TIMESTAMP          NULL DEFAULT NULL,
+ PRIMARY KEY (`StateID`)
+);
+
+INSERT INTO `MeterReading_Rollup_State` (StateID, LastReadingID, LastTimestamp) VALUES (1, 0, NULL);
+
+/* Views */
+
+CREATE
+SQL SECURITY INVOKER
+VIEW `MeterReading_Rollup_View`
+AS
+SELECT
+ Resolution,
+ PeriodStart,
+ Samples,
+
+ Production_Sum / Samples AS 'Production_Avg',
+ Production_Min,
+ Production_Max,
+ Production_Wh,
+
+ NetConsumption_Sum / Samples AS 'NetConsumption_Avg',
+ NetConsumption_Min,
+ NetConsumption_Max,
+ NetConsumption_Wh,
+ NetConsumption_Import_Wh,
+ NetConsumption_Export_Wh,
+
+ TotalConsumption_Sum / Samples AS 'TotalConsumption_Avg',
+ TotalConsumption_Min,
+ TotalConsumption_Max,
+ TotalConsumption_Wh
+
+FROM MeterReading_Rollup;
+
+/*
+  The same statistics as MeterReading_Statistics_View but read from the daily rollups (with the
+  energy integrated over the time between each reading).
+*/
+
+CREATE
+SQL SECURITY INVOKER
+VIEW `MeterReading_Rollup_Statistics_View`
+AS
+SELECT DATE(PeriodStart) AS 'Date',
+       ROUND(NetConsumption_Import_Wh / 1000, 2) AS `Import (kWh)`,
+       -- ROUND(((NetConsumption_Import_Wh / 1000) * 32.79) / 100, 2) AS `Cost (£)`,
+       ROUND(Production_Wh / 1000, 2) AS `Produced (kWh)`,
+       ROUND(TotalConsumption_Wh / 1000, 2) AS `Consumed (kWh)`,
+       ROUND((TotalConsumption_Wh - NetConsumption_Import_Wh) / 1000, 2) AS `Self Consumed (kWh)`,
+       -- ROUND((((TotalConsumption_Wh - NetConsumption_Import_Wh) / 1000) * 32.79) / 100, 2) AS `Saved (£)`,
+       ROUND(NetConsumption_Export_Wh / 1000, 2) AS `Export (kWh)`,
+       ROUND(NetConsumption_Wh / 1000, 2) AS `Net Import/Export (kWh)`,
+       -- ROUND(((NetConsumption_Export_Wh / 1000) * 12) / 100, 2) AS `SEG Value (£)`,
+       TIME_FORMAT(SEC_TO_TIME(Samples),'%Hh %im') AS `Duration`
+FROM MeterReading_Rollup
+WHERE Resolution = 86400
+ORDER BY `Produced (kWh)` DESC;
\ No newline at end of file
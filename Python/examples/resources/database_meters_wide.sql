@@ -0,0 +1,232 @@
+/*
+  An alternative (denormalised) schema to database_meters.sql.
+
+  Each reading is stored as one wide row (with a column for each meter type, phase and value)
+  rather than a MeterReading row referencing up to 9 MeterReading_Result rows. The views have the
+  same names and columns as database_meters.sql but do not need to join any tables, and a range
+  of readings is stored contiguously (in ReadingID and therefore Timestamp order).
+
+  Set "database_schema" to "wide" in the credentials file for the database writers to use it and
+  pass "/Schema wide" to database_pyplot_meters.py.
+*/
+
+/* Database */
+
+CREATE DATABASE `Enphase`;
+USE `Enphase`;
+
+/* Tables */
+
+CREATE TABLE `MeterReading_Wide` (
+ `ReadingID`                    INT          UNSIGNED NOT NULL AUTO_INCREMENT,
+ `Timestamp`                    TIMESTAMP             NOT NULL DEFAULT CURRENT_TIMESTAMP,
+ `Production_Phase_A_p`         DECIMAL(9,3)          NULL     COMMENT 'wNow',
+ `Production_Phase_A_q`         DECIMAL(9,3)          NULL     COMMENT 'reactPwr',
+ `Production_Phase_A_s`         DECIMAL(9,3)          NULL     COMMENT 'apprntPwr',
+ `Production_Phase_A_v`         DECIMAL(6,3) UNSIGNED NULL     COMMENT 'rmsVoltage',
+ `Production_Phase_A_i`         DECIMAL(5,3)          NULL     COMMENT 'rmsCurrent',
+ `Production_Phase_A_pf`        DECIMAL(3,2)          NULL     COMMENT 'pwrFactor',
+ `Production_Phase_A_f`         DECIMAL(4,2) UNSIGNED NULL     COMMENT 'frequency',
+ `Production_Phase_B_p`         DECIMAL(9,3)          NULL     COMMENT 'wNow',
+ `Production_Phase_B_q`         DECIMAL(9,3)          NULL     COMMENT 'reactPwr',
+ `Production_Phase_B_s`         DECIMAL(9,3)          NULL     COMMENT 'apprntPwr',
+ `Production_Phase_B_v`         DECIMAL(6,3) UNSIGNED NULL     COMMENT 'rmsVoltage',
+ `Production_Phase_B_i`         DECIMAL(5,3)          NULL     COMMENT 'rmsCurrent',
+ `Production_Phase_B_pf`        DECIMAL(3,2)          NULL     COMMENT 'pwrFactor',
+ `Production_Phase_B_f`         DECIMAL(4,2) UNSIGNED NULL     COMMENT 'frequency',
+ `Production_Phase_C_p`         DECIMAL(9,3)          NULL     COMMENT 'wNow',
+ `Production_Phase_C_q`         DECIMAL(9,3)          NULL     COMMENT 'reactPwr',
+ `Production_Phase_C_s`         DECIMAL(9,3)          NULL     COMMENT 'apprntPwr',
+ `Production_Phase_C_v`         DECIMAL(6,3) UNSIGNED NULL     COMMENT 'rmsVoltage',
+ `Production_Phase_C_i`         DECIMAL(5,3)          NULL     COMMENT 'rmsCurrent',
+ `Production_Phase_C_pf`        DECIMAL(3,2)          NULL     COMMENT 'pwrFactor',
+ `Production_Phase_C_f`         DECIMAL(4,2) UNSIGNED NULL     COMMENT 'frequency',
+ `NetConsumption_Phase_A_p`     DECIMAL(9,3)          NULL     COMMENT 'wNow',
+ `NetConsumption_Phase_A_q`     DECIMAL(9,3)          NULL     COMMENT 'reactPwr',
+ `NetConsumption_Phase_A_s`     DECIMAL(9,3)          NULL     COMMENT 'apprntPwr',
+ `NetConsumption_Phase_A_v`     DECIMAL(6,3) UNSIGNED NULL     COMMENT 'rmsVoltage',
+ `NetConsumption_Phase_A_i`     DECIMAL(5,3)          NULL     COMMENT 'rmsCurrent',
+ `NetConsumption_Phase_A_pf`    DECIMAL(3,2)          NULL     COMMENT 'pwrFactor',
+ `NetConsumption_Phase_A_f`     DECIMAL(4,2) UNSIGNED NULL     COMMENT 'frequency',
+ `NetConsumption_Phase_B_p`     DECIMAL(9,3)          NULL     COMMENT 'wNow',
+ `NetConsumption_Phase_B_q`     DECIMAL(9,3)          NULL     COMMENT 'reactPwr',
+ `NetConsumption_Phase_B_s`     DECIMAL(9,3)          NULL     COMMENT 'apprntPwr',
+ `NetConsumption_Phase_B_v`     DECIMAL(6,3) UNSIGNED NULL     COMMENT 'rmsVoltage',
+ `NetConsumption_Phase_B_i`     DECIMAL(5,3)          NULL     COMMENT 'rmsCurrent',
+ `NetConsumption_Phase_B_pf`    DECIMAL(3,2)          NULL     COMMENT 'pwrFactor',
+ `NetConsumption_Phase_B_f`     DECIMAL(4,2) UNSIGNED NULL     COMMENT 'frequency',
+ `NetConsumption_Phase_C_p`     DECIMAL(9,3)          NULL     COMMENT 'wNow',
+ `NetConsumption_Phase_C_q`     DECIMAL(9,3)          NULL     COMMENT 'reactPwr',
+ `NetConsumption_Phase_C_s`     DECIMAL(9,3)          NULL     COMMENT 'apprntPwr',
+ `NetConsumption_Phase_C_v`     DECIMAL(6,3) UNSIGNED NULL     COMMENT 'rmsVoltage',
+ `NetConsumption_Phase_C_i`     DECIMAL(5,3)          NULL     COMMENT 'rmsCurrent',
+ `NetConsumption_Phase_C_pf`    DECIMAL(3,2)          NULL     COMMENT 'pwrFactor',
+ `NetConsumption_Phase_C_f`     DECIMAL(4,2) UNSIGNED NULL     COMMENT 'frequency',
+ `TotalConsumption_Phase_A_p`   DECIMAL(9,3)          NULL     COMMENT 'wNow',
+ `TotalConsumption_Phase_A_q`   DECIMAL(9,3)          NULL     COMMENT 'reactPwr',
+ `TotalConsumption_Phase_A_s`   DECIMAL(9,3)          NULL     COMMENT 'apprntPwr',
+ `TotalConsumption_Phase_A_v`   DECIMAL(6,3) UNSIGNED NULL     COMMENT 'rmsVoltage',
+ `TotalConsumption_Phase_A_i`   DECIMAL(5,3)          NULL     COMMENT 'rmsCurrent',
+ `TotalConsumption_Phase_A_pf`  DECIMAL(3,2)          NULL     COMMENT 'pwrFactor',
+ `TotalConsumption_Phase_A_f`   DECIMAL(4,2) UNSIGNED NULL     COMMENT 'frequency',
+ `TotalConsumption_Phase_B_p`   DECIMAL(9,3)          NULL     COMMENT 'wNow',
+ `TotalConsumption_Phase_B_q`   DECIMAL(9,3)          NULL     COMMENT 'reactPwr',
+ `TotalConsumption_Phase_B_s`   DECIMAL(9,3)          NULL     COMMENT 'apprntPwr',
+ `TotalConsumption_Phase_B_v`   DECIMAL(6,3) UNSIGNED NULL     COMMENT 'rmsVoltage',
+ `TotalConsumption_Phase_B_i`   DECIMAL(5,3)          NULL     COMMENT 'rmsCurrent',
+ `TotalConsumption_Phase_B_pf`  DECIMAL(3,2)          NULL     COMMENT 'pwrFactor',
+ `TotalConsumption_Phase_B_f`   DECIMAL(4,2) UNSIGNED NULL     COMMENT 'frequency',
+ `TotalConsumption_Phase_C_p`   DECIMAL(9,3)          NULL     COMMENT 'wNow',
+ `TotalConsumption_Phase_C_q`   DECIMAL(9,3)          NULL     COMMENT 'reactPwr',
+ `TotalConsumption_Phase_C_s`   DECIMAL(9,3)          NULL     COMMENT 'apprntPwr',
+ `TotalConsumption_Phase_C_v`   DECIMAL(6,3) UNSIGNED NULL     COMMENT 'rmsVoltage',
+ `TotalConsumption_Phase_C_i`   DECIMAL(5,3)          NULL     COMMENT 'rmsCurrent',
+ `TotalConsumption_Phase_C_pf`  DECIMAL(3,2)          NULL     COMMENT 'pwrFactor',
+ `TotalConsumption_Phase_C_f`   DECIMAL(4,2) UNSIGNED NULL     COMMENT 'frequency',
+ PRIMARY KEY (`ReadingID`),
+ INDEX `MeterReading_Wide_Timestamp` (`Timestamp`)
+);
+
+/* Views */
+
+CREATE
+SQL SECURITY INVOKER
+VIEW `MeterReading_TriplePhase_View`
+AS
+SELECT
+ ReadingID,
+ Timestamp,
+
+ Production_Phase_A_p AS 'Production_Phase_A_p',
+ Production_Phase_A_q AS 'Production_Phase_A_q',
+ Production_Phase_A_s AS 'Production_Phase_A_s',
+ Production_Phase_A_v AS 'Production_Phase_A_v',
+ Production_Phase_A_i AS 'Production_Phase_A_i',
+ Production_Phase_A_pf AS 'Production_Phase_A_pf',
+ Production_Phase_A_f AS 'Production_Phase_A_f',
+
+ Production_Phase_B_p AS 'Production_Phase_B_p',
+ Production_Phase_B_q AS 'Production_Phase_B_q',
+ Production_Phase_B_s AS 'Production_Phase_B_s',
+ Production_Phase_B_v AS 'Production_Phase_B_v',
+ Production_Phase_B_i AS 'Production_Phase_B_i',
+ Production_Phase_B_pf AS 'Production_Phase_B_pf',
+ Production_Phase_B_f AS 'Production_Phase_B_f',
+
+ Production_Phase_C_p AS 'Production_Phase_C_p',
+ Production_Phase_C_q AS 'Production_Phase_C_q',
+ Production_Phase_C_s AS 'Production_Phase_C_s',
+ Production_Phase_C_v AS 'Production_Phase_C_v',
+ Production_Phase_C_i AS 'Production_Phase_C_i',
+ Production_Phase_C_pf AS 'Production_Phase_C_pf',
+ Production_Phase_C_f AS 'Production_Phase_C_f',
+
+ NetConsumption_Phase_A_p AS 'NetConsumption_Phase_A_p',
+ NetConsumption_Phase_A_q AS 'NetConsumption_Phase_A_q',
+ NetConsumption_Phase_A_s AS 'NetConsumption_Phase_A_s',
+ NetConsumption_Phase_A_v AS 'NetConsumption_Phase_A_v',
+ NetConsumption_Phase_A_i AS 'NetConsumption_Phase_A_i',
+ NetConsumption_Phase_A_pf AS 'NetConsumption_Phase_A_pf',
+ NetConsumption_Phase_A_f AS 'NetConsumption_Phase_A_f',
+
+ NetConsumption_Phase_B_p AS 'NetConsumption_Phase_B_p',
+ NetConsumption_Phase_B_q AS 'NetConsumption_Phase_B_q',
+ NetConsumption_Phase_B_s AS 'NetConsumption_Phase_B_s',
+ NetConsumption_Phase_B_v AS 'NetConsumption_Phase_B_v',
+ NetConsumption_Phase_B_i AS 'NetConsumption_Phase_B_i',
+ NetConsumption_Phase_B_pf AS 'NetConsumption_Phase_B_pf',
+ NetConsumption_Phase_B_f AS 'NetConsumption_Phase_B_f',
+
+ NetConsumption_Phase_C_p AS 'NetConsumption_Phase_C_p',
+ NetConsumption_Phase_C_q AS 'NetConsumption_Phase_C_q',
+ NetConsumption_Phase_C_s AS 'NetConsumption_Phase_C_s',
+ NetConsumption_Phase_C_v AS 'NetConsumption_Phase_C_v',
+ NetConsumption_Phase_C_i AS 'NetConsumption_Phase_C_i',
+ NetConsumption_Phase_C_pf AS 'NetConsumption_Phase_C_pf',
+ NetConsumption_Phase_C_f AS 'NetConsumption_Phase_C_f',
+
+ TotalConsumption_Phase_A_p AS 'TotalConsumption_Phase_A_p',
+ TotalConsumption_Phase_A_q AS 'TotalConsumption_Phase_A_q',
+ TotalConsumption_Phase_A_s AS 'TotalConsumption_Phase_A_s',
+ TotalConsumption_Phase_A_v AS 'TotalConsumption_Phase_A_v',
+ TotalConsumption_Phase_A_i AS 'TotalConsumption_Phase_A_i',
+ TotalConsumption_Phase_A_pf AS 'TotalConsumption_Phase_A_pf',
+ TotalConsumption_Phase_A_f AS 'TotalConsumption_Phase_A_f',
+
+ TotalConsumption_Phase_B_p AS 'TotalConsumption_Phase_B_p',
+ TotalConsumption_Phase_B_q AS 'TotalConsumption_Phase_B_q',
+ TotalConsumption_Phase_B_s AS 'TotalConsumption_Phase_B_s',
+ TotalConsumption_Phase_B_v AS 'TotalConsumption_Phase_B_v',
+ TotalConsumption_Phase_B_i AS 'TotalConsumption_Phase_B_i',
+ TotalConsumption_Phase_B_pf AS 'TotalConsumption_Phase_B_pf',
+ TotalConsumption_Phase_B_f AS 'TotalConsumption_Phase_B_f',
+
+ TotalConsumption_Phase_C_p AS 'TotalConsumption_Phase_C_p',
+ TotalConsumption_Phase_C_q AS 'TotalConsumption_Phase_C_q',
+ TotalConsumption_Phase_C_s AS 'TotalConsumption_Phase_C_s',
+ TotalConsumption_Phase_C_v AS 'TotalConsumption_Phase_C_v',
+ TotalConsumption_Phase_C_i AS 'TotalConsumption_Phase_C_i',
+ TotalConsumption_Phase_C_pf AS 'TotalConsumption_Phase_C_pf',
+ TotalConsumption_Phase_C_f AS 'TotalConsumption_Phase_C_f'
+
+FROM MeterReading_Wide
+ORDER BY ReadingID DESC;
+
+CREATE
+SQL SECURITY INVOKER
+VIEW `MeterReading_SinglePhase_View`
+AS
+SELECT
+ ReadingID,
+ Timestamp,
+ Production_Phase_A_p AS 'Production_p',
+ Production_Phase_A_q AS 'Production_q',
+ Production_Phase_A_s AS 'Production_s',
+ Production_Phase_A_v AS 'Production_v',
+ Production_Phase_A_i AS 'Production_i',
+ Production_Phase_A_pf AS 'Production_pf',
+ Production_Phase_A_f AS 'Production_f',
+
+ NetConsumption_Phase_A_p AS 'NetConsumption_p',
+ NetConsumption_Phase_A_q AS 'NetConsumption_q',
+ NetConsumption_Phase_A_s AS 'NetConsumption_s',
+ NetConsumption_Phase_A_v AS 'NetConsumption_v',
+ NetConsumption_Phase_A_i AS 'NetConsumption_i',
+ NetConsumption_Phase_A_pf AS 'NetConsumption_pf',
+ NetConsumption_Phase_A_f AS 'NetConsumption_f',
+
+ TotalConsumption_Phase_A_p AS 'TotalConsumption_p',
+ TotalConsumption_Phase_A_q AS 'TotalConsumption_q',
+ TotalConsumption_Phase_A_s AS 'TotalConsumption_s',
+ TotalConsumption_Phase_A_v AS 'TotalConsumption_v',
+ TotalConsumption_Phase_A_i AS 'TotalConsumption_i',
+ TotalConsumption_Phase_A_pf AS 'TotalConsumption_pf',
+ TotalConsumption_Phase_A_f AS 'TotalConsumption_f'
+
+FROM MeterReading_Wide
+ORDER BY ReadingID DESC;
+
+/*
+  This view includes fields which help with financial calculations:
+  - You may wish to uncomment `Cost (£)` and `Saved (£)` and replace '32.79' with your energy import cost.
+  - You may wish to uncomment `SEG Value (£)` and replace '12' with your energy export rate.
+*/
+
+CREATE
+SQL SECURITY INVOKER
+VIEW `MeterReading_Statistics_View`
+AS
+SELECT DATE(Timestamp) AS 'Date',
+       ROUND(  ((SUM(CASE WHEN NetConsumption_P >= 0 THEN NetConsumption_P ELSE 0 END) / COUNT(*)) * COUNT(DISTINCT HOUR(Timestamp))) / 1000, 2) AS `Import (kWh)`,
+       -- ROUND(((((SUM(CASE WHEN NetConsumption_P >= 0 THEN NetConsumption_P ELSE 0 END) / COUNT(*)) * COUNT(DISTINCT HOUR(Timestamp))) / 1000) * 32.79) / 100, 2) AS `Cost (£)`,
+       ROUND(((SUM(Production_P) / COUNT(*)) * COUNT(DISTINCT HOUR(Timestamp))) / 1000, 2) AS `Produced (kWh)`,
+       ROUND(((SUM(TotalConsumption_P) / COUNT(*)) * COUNT(DISTINCT HOUR(Timestamp))) / 1000, 2) AS `Consumed (kWh)`,
+       ROUND(  (((SUM(TotalConsumption_P) - SUM(CASE WHEN NetConsumption_P >= 0 THEN NetConsumption_P ELSE 0 END)) / COUNT(*)) * COUNT(DISTINCT HOUR(Timestamp))) / 1000, 2) AS `Self Consumed (kWh)`,
+       -- ROUND((((((SUM(TotalConsumption_P) - SUM(CASE WHEN NetConsumption_P >= 0 THEN NetConsumption_P ELSE 0 END)) / COUNT(*)) * COUNT(DISTINCT HOUR(Timestamp))) / 1000) * 32.79) / 100, 2) AS `Saved (£)`,
+       ROUND(((SUM(CASE WHEN NetConsumption_P < 0 THEN ABS(NetConsumption_P) ELSE 0 END) / COUNT(*)) * COUNT(DISTINCT HOUR(Timestamp))) / 1000, 2) AS `Export (kWh)`,
+       ROUND(((SUM(NetConsumption_P) / COUNT(*)) * COUNT(DISTINCT HOUR(Timestamp))) / 1000, 2) AS `Net Import/Export (kWh)`,
+       -- ROUND((((SUM(CASE WHEN NetConsumption_P < 0 THEN ABS(NetConsumption_P) ELSE 0 END) / COUNT(*)) * COUNT(DISTINCT HOUR(Timestamp)) / 1000) * 12) / 100, 2) AS `SEG Value (£)`,
+       TIME_FORMAT(SEC_TO_TIME(COUNT(*)),'%Hh %im') AS `Duration`
+FROM MeterReading_SinglePhase_View
+GROUP BY DATE(Timestamp)
+ORDER BY `Produced (kWh)` DESC;
\ No newline at end of file
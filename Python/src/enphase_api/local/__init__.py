@@ -24,4 +24,4 @@ users to access and manage Enphase® solar energy system data locally without In
 """
 
 # Declare what should be offered in the Public API.
-__all__ = ['Gateway']
\ No newline at end of file
+__all__ = ['AsyncGateway', 'CircuitBreaker', 'CircuitOpenError', 'Gateway', 'GatewayFleet', 'Inverter', 'JSONDecoder', 'MeterReport', 'MeterResult', 'MeterStreamCodec', 'PollScheduler', 'ProductionSummary', 'Projection', 'ResponseDeduplicator', 'RetryPolicy', 'ServerSentEventsDecoder', 'Spool', 'UnauthorisedError']
\ No newline at end of file
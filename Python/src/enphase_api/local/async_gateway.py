@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# This file is part of Enphase-API <https://github.com/Matthew1471/Enphase-API>
+# Copyright (C) 2023 Matthew1471!
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Enphase-API Async Gateway Module
+This module provides an asyncio equivalent of the Gateway class for interacting locally with an
+Enphase® IQ Gateway. Several API calls can be awaited concurrently (e.g. with asyncio.gather())
+so a polling tick only takes as long as the slowest single request.
+"""
+
+# We parse the JSON responses ourselves (so empty responses can be supported), api_call()'s
+# "json" argument would otherwise shadow the module.
+from json import loads as json_loads
+
+# Only one task renews an expired session at a time.
+import asyncio
+
+# We check if a file exists.
+import os
+
+# We optionally pin the downloaded certificate to provide security to requests.
+import ssl
+
+# Third party library; "pip install aiohttp" if getting import errors.
+import aiohttp
+
+# We decode Server-Sent-Events (SSE) streams.
+from enphase_api.local.server_sent_events import ServerSentEventsDecoder
+
+
+class AsyncGateway:
+    """
+    A class to talk locally to Enphase®'s IQ Gateway using asyncio.
+    This supports maintaining an authenticated session between API calls.
+
+    The certificate can be downloaded beforehand using Gateway.trust_gateway().
+    """
+
+    # This is the default file path for the trusted gateway certificate.
+    DEFAULT_CERT_FILE = 'configuration/gateway.cer'
+
+    # aiohttp is prevented from creating its own user-agent (see skip_auto_headers below).
+    HEADERS = {'Accept': 'application/json'}
+
+    # This sets a 10 second connect timeout (the IQ Gateway is on the local network).
+    CONNECT_TIMEOUT = 10
+
+    # This sets a 5 minute read timeout (some endpoints are slow to respond).
+    READ_TIMEOUT = 300
+
+    def __init__(self, host=None, cert_file=DEFAULT_CERT_FILE, reauthenticate=False):
+        """
+        Initialize an asynchronous Enphase® IQ Gateway instance.
+
+        Args:
+            host (str, optional):
+                The host URL of the Enphase® IQ Gateway (including the protocol).
+                Defaults to 'https://envoy.local'.
+            cert_file (str, optional):
+                The file path of the trusted certificate for the Enphase® IQ Gateway.
+                Defaults to DEFAULT_CERT_FILE.
+            reauthenticate (bool, optional):
+                If True, an expired session is renewed (by logging in again with the token from
+                the last login) and the request retried once. Defaults to False.
+
+        Notes:
+            - If the certificate file is available, certificate pinning is implemented.
+            - If no certificate file is found, HTTPS requests will be made with reduced security.
+            - The underlying aiohttp session is created on first use (it requires a running loop).
+        """
+
+        # The IQ Gateway host (or if the network supports mDNS, "https://envoy.local").
+        self.host = 'https://envoy.local' if host is None else host
+
+        # If there is a certificate file already available then we implement certificate pinning.
+        if os.path.exists(cert_file):
+            # Verify all HTTPS requests with trust for this certificate.
+            self.ssl_context = ssl.create_default_context(cafile=cert_file)
+
+            # Requests to this host will ignore the hostname in the certificate being incorrect
+            # (the same behaviour as IgnoreHostnameAdapter).
+            self.ssl_context.check_hostname = False
+        else:
+            # Perform no verification of the remote host or the security of the connection.
+            self.ssl_context = False
+
+        # The aiohttp session (which supports keep-alive) is created on first use.
+        self.session = None
+
+        # Whether expired sessions are renewed with the token from the last login.
+        self.reauthenticate = reauthenticate
+        self.token = None
+
+        # Only one task renews the session at a time (the lock is created on first use as it
+        # requires a running loop) and each login increments the generation.
+        self.login_lock = None
+        self.session_generation = 0
+
+    async def __aenter__(self):
+        """
+        Support "async with" so the session is always closed.
+
+        Returns:
+            AsyncGateway: This instance.
+        """
+
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """
+        Close the session when leaving an "async with" block.
+        """
+
+        await self.close()
+
+    def _get_session(self):
+        """
+        Get (or create) the aiohttp client session.
+
+        Returns:
+            aiohttp.ClientSession: The session shared between API calls.
+        """
+
+        # Does a usable session not already exist?
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                # The IQ Gateway is often addressed by IP address, aiohttp otherwise will not
+                # store the "sessionId" cookie.
+                cookie_jar=aiohttp.CookieJar(unsafe=True),
+                connector=aiohttp.TCPConnector(ssl=self.ssl_context),
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=AsyncGateway.CONNECT_TIMEOUT, sock_read=AsyncGateway.READ_TIMEOUT),
+                skip_auto_headers=['User-Agent']
+            )
+
+        return self.session
+
+    async def close(self):
+        """
+        Close the underlying session (and any kept-alive connections).
+        """
+
+        # Only close a session that was opened.
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def login(self, token):
+        """
+        Authenticates with the IQ Gateway (with a JWT token).
+        The IQ Gateway does not require Internet connectivity.
+
+        Args:
+            token (str): JWT token for authentication.
+
+        Returns:
+            bool: True if login is successful, False otherwise.
+        """
+
+        # Create a copy of the original header dictionary.
+        headers = AsyncGateway.HEADERS.copy()
+
+        # We append an OAuth 2.0 bearer token.
+        headers['Authorization'] = f'Bearer {token}'
+
+        # Returns a "sessionId" cookie if successful that validates access to the IQ Gateway.
+        async with self._get_session().post(
+            url=f'{self.host}/auth/check_jwt',
+            headers=headers
+        ) as response:
+            # Check the response is positive.
+            if response.status != 200 or await response.text() != '<!DOCTYPE html><h2>Valid token.</h2>\n':
+                return False
+
+        # Keep the token (to renew the session) and note there is a new session.
+        self.token = token
+        self.session_generation += 1
+
+        return True
+
+    async def _renew_session(self, session_generation):
+        """
+        Renew an expired session by logging in again with the token from the last login.
+
+        Only one task logs in at a time; a task that waited while another task renewed the session
+        uses that session rather than logging in again.
+
+        Args:
+            session_generation (int): The session generation when the failed request was made.
+
+        Returns:
+            bool: True if there is a renewed session to retry the request with, False otherwise.
+        """
+
+        # Are expired sessions not renewed (or has there never been a successful login)?
+        if not self.reauthenticate or not self.token:
+            return False
+
+        # Create the lock on first use.
+        if self.login_lock is None:
+            self.login_lock = asyncio.Lock()
+
+        async with self.login_lock:
+            # Has another task already renewed the session?
+            if self.session_generation != session_generation:
+                return True
+
+            # Log in again.
+            return await self.login(self.token)
+
+    async def login_oauth_code(self, code, code_verifier):
+        """
+        Authenticates with the IQ Gateway (with an OAuth 2.0 authorisation code).
+        The IQ Gateway will require Internet connectivity.
+
+        Args:
+            code (str): Authorisation code.
+            code_verifier (str): PKCE code verifier.
+
+        Returns:
+            bool: True if authentication is successful, False otherwise.
+        """
+
+        # Build the authorisation code request payload.
+        json_data = {
+            'client_id': 'envoy-ui-1',
+            'redirect_uri': 'https://envoy.local/auth/callback',
+            'code_verifier': code_verifier,
+            'code': code
+        }
+
+        # Exchange the authorisation code for an access token (see Gateway.login_oauth_code).
+        async with self._get_session().post(
+            url=f'{self.host}/auth/get_jwt',
+            headers=AsyncGateway.HEADERS,
+            json=json_data
+        ) as response:
+            response_json = await response.json(content_type=None)
+
+        # Did the gateway return an error?
+        if 'message' in response_json:
+            raise ValueError('Error exchanging authorisation code for an access token.') from ValueError(response_json['message'])
+
+        # Should never happen (gateway should always return an error or an access_token).
+        if 'access_token' not in response_json:
+            raise ValueError('Error exchanging authorisation code for an access token.')
+
+        # The gateway must have returned an access token.
+        return await self.login(response_json['access_token'])
+
+    async def api_call(self, path, method='GET', data=None, json=None, response_raw=False):
+        """
+        Make an API call (HTML form or JSON data) to the IQ Gateway.
+
+        Args:
+            path (str): The API endpoint path.
+            method (str, optional): The HTTP method for the request. Defaults to 'GET'.
+            data (dict, optional): HTML form data for the request body. Defaults to None.
+            json (dict, optional): JSON data for the request body. Defaults to None.
+            response_raw (bool, optional): If True, return the raw response. Defaults to False.
+
+        Returns:
+            dict or str:
+                JSON response if response_raw is False, raw response if response_raw is True.
+        """
+
+        # The request is retried once if the session expired and was renewed.
+        for attempt in range(2):
+            # Which session this request is made with.
+            session_generation = self.session_generation
+
+            # Call the IQ Gateway API endpoint (optionally with form or JSON data).
+            async with self._get_session().request(
+                method=method,
+                url=f'{self.host}{path}',
+                headers=AsyncGateway.HEADERS,
+                data=data,
+                json=json
+            ) as response:
+
+                # Has the session expired (after 10 minutes inactivity)?
+                if response.status == 401:
+                    # Can the session not be renewed (or has the renewed session also been refused)?
+                    if attempt > 0 or not await self._renew_session(session_generation):
+                        raise ValueError(response.reason)
+
+                    # Retry the request with the renewed session.
+                    continue
+
+                # Some requests might not have JSON responses.
+                if response_raw:
+                    # This is a raw response.
+                    return await response.text()
+
+                # Read the whole body (some responses are empty).
+                content = await response.read()
+
+            # Return the JSON response.
+            return json_loads(content) if len(content) > 0 else None
+
+    async def api_call_stream(self, path):
+        """
+        Make a streaming API call to the IQ Gateway.
+
+        The caller is responsible for releasing the response (e.g. "async with" or release()).
+
+        Args:
+            path (str): The API endpoint path.
+
+        Returns:
+            aiohttp.ClientResponse: Server-Sent-Events (SSE) response.
+        """
+
+        # The request is retried once if the session expired and was renewed.
+        for attempt in range(2):
+            # Which session this request is made with.
+            session_generation = self.session_generation
+
+            # Call the IQ Gateway API endpoint (expecting a stream, the session has no overall timeout).
+            response = await self._get_session().get(
+                url=f'{self.host}{path}',
+                headers=AsyncGateway.HEADERS
+            )
+
+            # Has the session not expired?
+            if response.status != 401:
+                # Return the Server-Sent-Events (SSE) response.
+                return response
+
+            # The session has expired (after 10 minutes inactivity).
+            response.release()
+
+            # Can the session not be renewed (or has the renewed session also been refused)?
+            if attempt > 0 or not await self._renew_session(session_generation):
+                raise ValueError(response.reason)
+
+    async def api_call_stream_json(self, path):
+        """
+        Make a streaming API call to the IQ Gateway and decode each Server-Sent-Event as JSON.
+
+        Args:
+            path (str): The API endpoint path.
+
+        Yields:
+            dict: Each decoded event (e.g. each meter reading from "/stream/meter").
+        """
+
+        # Decode each of the events as they arrive.
+        async for event in ServerSentEventsDecoder.aiter_json(await self.api_call_stream(path)):
+            yield event
\ No newline at end of file
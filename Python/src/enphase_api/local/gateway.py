@@ -23,12 +23,27 @@ It supports maintaining an authenticated session between API calls and handles c
 the gateway.
 """
 
+# The persisted session is stored against a hash of the token it was obtained with.
+import hashlib
+
+# The persisted session is stored as JSON (the names are aliased as "json" is a parameter name).
+from json import dump as json_dump, load as json_load
+
 # We check if a file exists and extract paths or create directories.
 import os
 
 # We optionally can download the certificate to provide security to future requests.
 import ssl
 
+# The session is written to a uniquely named temporary file (created readable only by its owner).
+import tempfile
+
+# Only one thread renews an expired session at a time.
+import threading
+
+# A persisted session is not reused after its cookie expires (and we wait between retries).
+import time
+
 # Third party library; "pip install requests" if getting import errors.
 import requests
 
@@ -39,6 +54,22 @@ import urllib3
 # (IQ Gateway is self-signed).
 import enphase_api.local.ignore_hostname_adapter
 
+# We decode responses with the fastest installed JSON decoder.
+from enphase_api.local.json_decoder import JSONDecoder
+
+# We can extract just the selected values from a response.
+from enphase_api.local.projection import Projection
+
+# We decode Server-Sent-Events (SSE) streams.
+from enphase_api.local.server_sent_events import ServerSentEventsDecoder
+
+
+class UnauthorisedError(ValueError):
+    """
+    Raised when the IQ Gateway refuses the session or token (a 401 Unauthorized response).
+    This is a ValueError so existing handling of a refused session still applies.
+    """
+
 
 class Gateway:
     """
@@ -49,13 +80,25 @@ class Gateway:
     # This is the default file path for the trusted gateway certificate.
     DEFAULT_CERT_FILE = 'configuration/gateway.cer'
 
+    # This is the default file path for a persisted session (next to the trusted certificate).
+    DEFAULT_SESSION_FILE = 'configuration/gateway.session'
+
     # This prevents the requests + urllib3 module from creating its own user-agent.
     HEADERS = {'User-Agent': urllib3.util.SKIP_HEADER, 'Accept': 'application/json'}
 
-    # This sets a 5 minute connect and read timeout.
-    TIMEOUT = 300
+    # This sets a 10 second connect timeout (the IQ Gateway is on the local network).
+    CONNECT_TIMEOUT = 10
+
+    # This sets a 5 minute read timeout (some endpoints are slow to respond).
+    READ_TIMEOUT = 300
+
+    # The (connect, read) timeout in the form Requests expects.
+    TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+    # Streams always use the long read timeout (events can be minutes apart).
+    STREAM_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
 
-    def __init__(self, host=None, cert_file=DEFAULT_CERT_FILE):
+    def __init__(self, host=None, cert_file=DEFAULT_CERT_FILE, reauthenticate=False, session_file=None, timeout=TIMEOUT, retry_policy=None, circuit_breaker=None, json_loads=None):
         """
         Initialize an Enphase® IQ Gateway instance.
 
@@ -66,6 +109,25 @@ class Gateway:
             cert_file (str, optional):
                 The file path of the trusted certificate for the Enphase® IQ Gateway.
                 Defaults to DEFAULT_CERT_FILE.
+            reauthenticate (bool, optional):
+                If True, an expired session is renewed (by logging in again with the token from
+                the last login) and the request retried once. Defaults to False.
+            session_file (str, optional):
+                The file path to persist the "sessionId" cookie in, so a restarted script can reuse
+                the session rather than logging in again (this requires reauthenticate so a session
+                that has since expired is renewed). Defaults to None (the session is not persisted).
+            timeout (float or tuple, optional):
+                The timeout in seconds (or a (connect, read) tuple) of each request (other than
+                streams, which use STREAM_TIMEOUT). Defaults to TIMEOUT.
+            retry_policy (RetryPolicy, optional):
+                Retries idempotent requests that failed to connect, timed out or returned a server
+                error. Defaults to None (requests are not retried).
+            circuit_breaker (CircuitBreaker, optional):
+                Fails requests fast (with a CircuitOpenError) whilst the IQ Gateway is unreachable.
+                Defaults to None (every request is attempted).
+            json_loads (callable, optional):
+                The function that decodes JSON responses from bytes (see JSONDecoder.get_loads()).
+                Defaults to None (the fastest installed decoder).
 
         Notes:
             - If the certificate file is available, certificate pinning is implemented.
@@ -75,6 +137,29 @@ class Gateway:
         # The IQ Gateway host (or if the network supports mDNS, "https://envoy.local").
         self.host = 'https://envoy.local' if host is None else host
 
+        # Whether expired sessions are renewed with the token from the last login.
+        self.reauthenticate = reauthenticate
+        self.token = None
+
+        # Only one thread renews the session at a time (the others wait and then use the new
+        # session), and each login increments the generation so waiting threads know it was renewed.
+        self.login_lock = threading.Lock()
+        self.session_generation = 0
+
+        # Where the session is persisted (if at all).
+        self.session_file = session_file
+
+        # How long to wait for the IQ Gateway and how to handle it being unreachable.
+        self.timeout = timeout
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+
+        # How JSON responses are decoded.
+        self.json_loads = json_loads if json_loads else JSONDecoder.get_loads()
+
+        # The compiled projections of each selection (so the paths are only parsed once).
+        self.projections = {}
+
         # Using a session means Requests supports keep-alive.
         self.session = requests.Session()
 
@@ -129,6 +214,9 @@ class Gateway:
         Authenticates with the IQ Gateway (with a JWT token).
         The IQ Gateway does not require Internet connectivity.
 
+        If a session file was provided (and expired sessions are renewed), the first login reuses
+        any session persisted with the same token rather than making a request.
+
         Args:
             token (str): JWT token for authentication.
 
@@ -136,6 +224,13 @@ class Gateway:
             bool: True if login is successful, False otherwise.
         """
 
+        # Can a persisted session be reused (it is renewed on first use if it has since expired)?
+        if self.session_generation == 0 and self.reauthenticate and self._load_session(token):
+            # Keep the token (to renew the session) and note there is a session.
+            self.token = token
+            self.session_generation += 1
+            return True
+
         # Create a copy of the original header dictionary.
         headers = Gateway.HEADERS.copy()
 
@@ -143,14 +238,136 @@ class Gateway:
         headers['Authorization'] = f'Bearer {token}'
 
         # Returns a "sessionId" cookie if successful that validates access to the IQ Gateway.
-        response = self.session.post(
-            url=f'{self.host}/auth/check_jwt',
-            headers=headers,
-            timeout=Gateway.TIMEOUT
+        response = self._request(
+            method='POST',
+            path='/auth/check_jwt',
+            headers=headers
         )
 
         # Check the response is positive.
-        return response.status_code == 200 and response.text == '<!DOCTYPE html><h2>Valid token.</h2>\n'
+        if response.status_code != 200 or response.text != '<!DOCTYPE html><h2>Valid token.</h2>\n':
+            return False
+
+        # Keep the token (to renew the session) and note there is a new session.
+        self.token = token
+        self.session_generation += 1
+
+        # Persist the new session (if requested).
+        if self.session_file:
+            self._save_session(token)
+
+        return True
+
+    def _load_session(self, token):
+        """
+        Load a persisted "sessionId" cookie into the session.
+
+        Args:
+            token (str): The JWT token the persisted session must have been obtained with.
+
+        Returns:
+            bool: True if a persisted session was loaded, False otherwise.
+        """
+
+        # Has the session not been persisted?
+        if not self.session_file or not os.path.exists(self.session_file):
+            return False
+
+        # A missing or corrupt session file just means logging in again.
+        try:
+            with open(self.session_file, mode='r', encoding='utf-8') as file:
+                saved_session = json_load(file)
+        except (OSError, ValueError):
+            return False
+
+        # Was the session obtained for a different IQ Gateway or with a different token?
+        if saved_session.get('host') != self.host or saved_session.get('token_hash') != hashlib.sha256(token.encode('utf-8')).hexdigest():
+            return False
+
+        # Has the cookie expired (the IQ Gateway may also have expired the session through inactivity)?
+        if saved_session.get('expires') is not None and saved_session['expires'] <= time.time():
+            return False
+
+        # Add the cookie (as it was originally set by the IQ Gateway) to the session.
+        self.session.cookies.set_cookie(
+            requests.cookies.create_cookie(
+                name='sessionId',
+                value=saved_session['value'],
+                domain=saved_session['domain'],
+                path=saved_session['path'],
+                secure=saved_session['secure'],
+                expires=saved_session['expires']
+            )
+        )
+
+        return True
+
+    def _save_session(self, token):
+        """
+        Persist the "sessionId" cookie of the session (readable only by the current user).
+
+        Args:
+            token (str): The JWT token the session was obtained with.
+        """
+
+        # Find the cookie the IQ Gateway set.
+        cookie = next((cookie for cookie in self.session.cookies if cookie.name == 'sessionId'), None)
+        if cookie is None:
+            return
+
+        # Create the directories for the session file (if it does not already exist).
+        session_directory = os.path.dirname(self.session_file)
+        if session_directory and not os.path.exists(session_directory):
+            os.makedirs(session_directory)
+
+        # Write to a temporary file and then replace the session file so it is never partially
+        # written (the temporary file is unique so several processes can save at the same time,
+        # and it is created with 0o600 permissions).
+        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', dir=session_directory or '.', prefix=f'{os.path.basename(self.session_file)}.', suffix='.tmp', delete=False) as file:
+            temporary_file = file.name
+
+            json_dump({
+                'host': self.host,
+                'token_hash': hashlib.sha256(token.encode('utf-8')).hexdigest(),
+                'value': cookie.value,
+                'domain': cookie.domain,
+                'path': cookie.path,
+                'secure': cookie.secure,
+                'expires': cookie.expires
+            }, file)
+
+        try:
+            os.replace(temporary_file, self.session_file)
+        except OSError:
+            # Do not leave the temporary file behind.
+            os.remove(temporary_file)
+            raise
+
+    def _renew_session(self, session_generation):
+        """
+        Renew an expired session by logging in again with the token from the last login.
+
+        Only one thread logs in at a time; a thread that waited while another thread renewed the
+        session uses that session rather than logging in again.
+
+        Args:
+            session_generation (int): The session generation when the failed request was made.
+
+        Returns:
+            bool: True if there is a renewed session to retry the request with, False otherwise.
+        """
+
+        # Are expired sessions not renewed (or has there never been a successful login)?
+        if not self.reauthenticate or not self.token:
+            return False
+
+        with self.login_lock:
+            # Has another thread already renewed the session?
+            if self.session_generation != session_generation:
+                return True
+
+            # Log in again.
+            return self.login(self.token)
 
     def login_oauth_code(self, code, code_verifier):
         """
@@ -183,11 +400,10 @@ class Gateway:
         # The IQ Gateway is a trusted application / "confidential client" capable of holding the
         # JWT itself. This call should therefore be made internally,
         # thus preventing the user from accidentally leaking the access token.
-        response = self.session.post(
-            url=f'{self.host}/auth/get_jwt',
-            headers=Gateway.HEADERS,
-            json=json,
-            timeout=Gateway.TIMEOUT
+        response = self._request(
+            method='POST',
+            path='/auth/get_jwt',
+            json=json
         ).json()
 
         # Did the gateway return an error?
@@ -202,7 +418,68 @@ class Gateway:
         # Login with the JWT (in my opinion the IQ Gateway should have internally made this call).
         return self.login(response['access_token'])
 
-    def api_call(self, path, method='GET', data=None, json=None, response_raw=False):
+    def _request(self, method, path, headers=None, timeout=None, **kwargs):
+        """
+        Make a request to the IQ Gateway (applying any retry policy and circuit breaker).
+
+        Args:
+            method (str): The HTTP method for the request.
+            path (str): The API endpoint path.
+            headers (dict, optional): The request headers. Defaults to None (HEADERS).
+            timeout (float or tuple, optional):
+                The timeout of this request. Defaults to None (the timeout of the instance).
+            **kwargs: Any other arguments for requests.Session.request().
+
+        Returns:
+            requests.Response: The response.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open.
+            requests.exceptions.ConnectionError: If the request could not connect (after any retries).
+            requests.exceptions.Timeout: If the request timed out (after any retries).
+        """
+
+        # The number of times this request has been retried.
+        attempt = 0
+
+        while True:
+            # Is the IQ Gateway known to be unreachable?
+            if self.circuit_breaker:
+                self.circuit_breaker.before_request()
+
+            try:
+                response = self.session.request(
+                    method=method,
+                    url=f'{self.host}{path}',
+                    headers=Gateway.HEADERS if headers is None else headers,
+                    timeout=self.timeout if timeout is None else timeout,
+                    **kwargs
+                )
+            # Was the IQ Gateway unreachable?
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as exception:
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_failure()
+
+                # Can the request not be retried (e.g. a read timeout may have been processed)?
+                if not (self.retry_policy and self.retry_policy.should_retry(method, attempt, exception)):
+                    raise
+            else:
+                # The IQ Gateway responded.
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_success()
+
+                # Was this not a server error that can be retried?
+                if not (self.retry_policy and response.status_code in self.retry_policy.retry_statuses and self.retry_policy.should_retry(method, attempt)):
+                    return response
+
+                # Release the failed response.
+                response.close()
+
+            # Wait before retrying.
+            time.sleep(self.retry_policy.get_delay(attempt))
+            attempt += 1
+
+    def api_call(self, path, method='GET', data=None, json=None, response_raw=False, response_bytes=False, select=None):
         """
         Make an API call (HTML form or JSON data) to the IQ Gateway.
 
@@ -212,56 +489,158 @@ class Gateway:
             data (dict, optional): HTML form data for the request body. Defaults to None.
             json (dict, optional): JSON data for the request body. Defaults to None.
             response_raw (bool, optional): If True, return the raw response. Defaults to False.
+            response_bytes (bool, optional):
+                If True, return the undecoded response body (e.g. to forward it to AMQP or disk
+                without decoding it). Defaults to False.
+            select (list, optional):
+                The paths of the values to return from the JSON response (such as
+                "production[type=eim,measurementType=production].wNow", see Projection).
+                Defaults to None (the whole JSON response is returned).
 
         Returns:
-            dict or str:
-                JSON response if response_raw is False, raw response if response_raw is True.
+            dict or str or bytes:
+                JSON response if response_raw and response_bytes are False (or the value of each
+                selected path if select is provided), raw response if response_raw is True,
+                response body if response_bytes is True.
+
+        Raises:
+            UnauthorisedError: If the session was refused and could not be renewed.
+            requests.exceptions.JSONDecodeError: If the response is not valid JSON.
+            ValueError: If a selected path cannot be parsed.
         """
 
+        # Which session this request is made with.
+        session_generation = self.session_generation
+
         # Call the IQ Gateway API endpoint (optionally with form or JSON data).
-        response = self.session.request(
+        response = self._request(
             method=method,
-            url=f'{self.host}{path}',
-            headers=Gateway.HEADERS,
+            path=path,
             data=data,
-            json=json,
-            timeout=Gateway.TIMEOUT
+            json=json
         )
 
         # Has the session expired (after 10 minutes inactivity)?
         if response.status_code == 401:
-            raise ValueError(response.reason)
+            # Can the session not be renewed?
+            if not self._renew_session(session_generation):
+                raise UnauthorisedError(response.reason)
+
+            # Retry the request once with the renewed session.
+            response = self._request(
+                method=method,
+                path=path,
+                data=data,
+                json=json
+            )
+
+            # Has the renewed session also been refused?
+            if response.status_code == 401:
+                raise UnauthorisedError(response.reason)
 
         # Some requests might not have JSON responses.
         if response_raw:
             # This is a raw response.
             return response.text
 
-        # Return the JSON response.
-        return response.json() if len(response.content) > 0 else None
+        # The response body is only read once.
+        content = response.content
+
+        # Does the caller want the undecoded body?
+        if response_bytes:
+            return content
+
+        # Some responses are empty.
+        if not content:
+            return None
+
+        # Decode the JSON response (raising the same exception as Requests would for invalid JSON).
+        try:
+            response_json = self.json_loads(content)
+        except ValueError as exception:
+            raise requests.exceptions.JSONDecodeError(str(exception), content.decode('utf-8', errors='replace'), 0) from exception
 
-    def api_call_stream(self, path):
+        # Return the whole JSON response?
+        if select is None:
+            return response_json
+
+        # Return just the selected values (compiling the selection the first time it is used).
+        selection = tuple(select)
+        projection = self.projections.get(selection)
+        if projection is None:
+            projection = self.projections[selection] = Projection(selection)
+
+        return projection.extract(response_json)
+
+    def api_call_stream(self, path, timeout=STREAM_TIMEOUT):
         """
         Make a streaming API call to the IQ Gateway.
 
         Args:
             path (str): The API endpoint path.
+            timeout (float or tuple, optional):
+                The timeout in seconds (or a (connect, read) tuple) of the stream (the read timeout
+                is the longest wait between events). Defaults to STREAM_TIMEOUT.
 
         Returns:
             requests.Response: Server-Sent-Events (SSE) response.
+
+        Raises:
+            UnauthorisedError: If the session was refused and could not be renewed.
         """
 
+        # Which session this request is made with.
+        session_generation = self.session_generation
+
         # Call the IQ Gateway API endpoint (expecting a stream).
-        response = self.session.get(
-            url=f'{self.host}{path}',
-            headers=Gateway.HEADERS,
-            stream=True,
-            timeout=Gateway.TIMEOUT
+        response = self._request(
+            method='GET',
+            path=path,
+            timeout=timeout,
+            stream=True
         )
 
         # Has the session expired (after 10 minutes inactivity)?
         if response.status_code == 401:
-            raise ValueError(response.reason)
+            # Release the refused response.
+            response.close()
+
+            # Can the session not be renewed?
+            if not self._renew_session(session_generation):
+                raise UnauthorisedError(response.reason)
+
+            # Retry the request once with the renewed session.
+            response = self._request(
+                method='GET',
+                path=path,
+                timeout=timeout,
+                stream=True
+            )
+
+            # Has the renewed session also been refused?
+            if response.status_code == 401:
+                response.close()
+                raise UnauthorisedError(response.reason)
 
         # Return the Server-Sent-Events (SSE) response.
-        return response
\ No newline at end of file
+        return response
+
+    def api_call_stream_json(self, path, chunk_size=None):
+        """
+        Make a streaming API call to the IQ Gateway and decode each Server-Sent-Event as JSON.
+
+        Args:
+            path (str): The API endpoint path.
+            chunk_size (int, optional):
+                The number of bytes to read at a time. Defaults to None which returns data as
+                it arrives from the IQ Gateway.
+
+        Yields:
+            dict: Each decoded event (e.g. each meter reading from "/stream/meter").
+        """
+
+        # Decode each of the events as they arrive.
+        yield from ServerSentEventsDecoder.iter_json(
+            response=self.api_call_stream(path),
+            chunk_size=chunk_size
+        )
\ No newline at end of file
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# This file is part of Enphase-API <https://github.com/Matthew1471/Enphase-API>
+# Copyright (C) 2023 Matthew1471!
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Enphase-API Gateway Fleet Module
+This module provides classes for polling many Enphase® IQ Gateways from a single process.
+Requests are made by a bounded pool of worker threads and each gateway keeps its own
+authenticated session (with its own short timeout, retry policy and circuit breaker), so a failing
+or slow gateway does not affect the others.
+"""
+
+# We poll the gateways using a bounded pool of worker threads.
+import concurrent.futures
+
+# We check whether a certificate file exists.
+import os
+
+# We back off gateways which are failing.
+import time
+
+# The fleet is built from individual gateways (which are logged in again if they refuse the session).
+from enphase_api.local.gateway import Gateway, UnauthorisedError
+
+
+class GatewayFleetMember:
+    """
+    A class to hold the state of a single IQ Gateway within a fleet.
+    """
+
+    def __init__(self, serial_number, token, host=None, cert_file=None, timeout=Gateway.TIMEOUT, retry_policy=None, circuit_breaker=None):
+        """
+        Initialize a fleet member.
+
+        Args:
+            serial_number (str):
+                The serial number of the IQ Gateway (this identifies the gateway in results).
+            token (str):
+                JWT token for authentication with this IQ Gateway.
+            host (str, optional):
+                The host URL of the Enphase® IQ Gateway (including the protocol).
+                Defaults to 'https://envoy.local'.
+            cert_file (str, optional):
+                The file path of the trusted certificate for this IQ Gateway.
+                Defaults to 'configuration/gateway_<serial_number>.cer'.
+            timeout (float or tuple, optional):
+                The timeout in seconds (or a (connect, read) tuple) of each request to this IQ
+                Gateway. Defaults to Gateway.TIMEOUT.
+            retry_policy (RetryPolicy, optional):
+                Retries the failed requests to this IQ Gateway. Defaults to None (no retries).
+            circuit_breaker (CircuitBreaker, optional):
+                Fails the requests to this IQ Gateway fast whilst it is unreachable (this is kept
+                if the gateway is logged in again). Defaults to None.
+        """
+
+        self.serial_number = serial_number
+        self.token = token
+        self.host = host
+        self.cert_file = cert_file if cert_file else f'configuration/gateway_{serial_number}.cer'
+        self.timeout = timeout
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+
+        # The logged in gateway (created on first use).
+        self.gateway = None
+
+        # The number of consecutive failures and when the gateway should next be tried.
+        self.failures = 0
+        self.retry_time = 0
+
+        # The exception from the most recent failure (if any).
+        self.last_exception = None
+
+        # The most recent request (a gateway is not requested again until this has finished).
+        self.future = None
+
+    def get_gateway(self):
+        """
+        Get the logged in Gateway, creating it (and logging in) if required.
+
+        Returns:
+            Gateway: The logged in Gateway.
+
+        Raises:
+            UnauthorisedError: If the gateway refused the token.
+        """
+
+        # Is there not already a logged in gateway?
+        if self.gateway is None:
+            # Download and store the certificate from the gateway so all future requests are
+            # secure.
+            if not os.path.exists(self.cert_file):
+                Gateway.trust_gateway(host=self.host, cert_file=self.cert_file)
+
+            # Each gateway keeps its own session (and therefore its own pooled connection), which
+            # is renewed with the same token if it expires.
+            gateway = Gateway(
+                host=self.host,
+                cert_file=self.cert_file,
+                reauthenticate=True,
+                timeout=self.timeout,
+                retry_policy=self.retry_policy,
+                circuit_breaker=self.circuit_breaker
+            )
+
+            # Are we not able to login to the gateway?
+            if not gateway.login(self.token):
+                raise UnauthorisedError(f'Unable to login to the gateway {self.serial_number} (bad, expired or missing token).')
+
+            self.gateway = gateway
+
+        return self.gateway
+
+class GatewayFleet:
+    """
+    A class to poll a fleet of Enphase® IQ Gateways with bounded concurrency.
+    """
+
+    # Each gateway is on the local network, so a gateway that is slow to respond should not hold
+    # one of the worker threads for long.
+    TIMEOUT = (5, 10)
+
+    def __init__(self, gateways, max_workers=4, failure_backoff=5, maximum_failure_backoff=300, timeout=TIMEOUT, retry_policy=None, circuit_breaker=None):
+        """
+        Initialize a fleet of IQ Gateways.
+
+        Args:
+            gateways (list):
+                A list of dictionaries each containing a "gateway_serial_number" and
+                "gateway_token" and optionally a "gateway_host" and "gateway_cert_file".
+            max_workers (int, optional):
+                The maximum number of gateways being requested at any one time. Defaults to 4.
+            failure_backoff (float, optional):
+                Seconds a gateway is skipped for after its first failure (this doubles for each
+                consecutive failure). Defaults to 5.
+            maximum_failure_backoff (float, optional):
+                The maximum number of seconds a failing gateway is skipped for. Defaults to 300.
+            timeout (float or tuple, optional):
+                The timeout in seconds (or a (connect, read) tuple) of each request to a gateway.
+                Defaults to TIMEOUT.
+            retry_policy (RetryPolicy, optional):
+                Retries the failed requests to each gateway. Defaults to None (no retries).
+            circuit_breaker (callable, optional):
+                Creates a CircuitBreaker for each gateway (so each gateway fails fast whilst only
+                it is unreachable), e.g. "lambda: CircuitBreaker(failure_threshold=3)".
+                Defaults to None.
+        """
+
+        # Create a member to track the state of each of the gateways.
+        self.members = [
+            GatewayFleetMember(
+                serial_number=gateway['gateway_serial_number'],
+                token=gateway['gateway_token'],
+                host=gateway.get('gateway_host'),
+                cert_file=gateway.get('gateway_cert_file'),
+                timeout=timeout,
+                retry_policy=retry_policy,
+                circuit_breaker=circuit_breaker() if circuit_breaker else None
+            ) for gateway in gateways
+        ]
+
+        self.failure_backoff = failure_backoff
+        self.maximum_failure_backoff = maximum_failure_backoff
+
+        # The worker threads are shared between all the gateways.
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='GatewayFleet'
+        )
+
+    def __enter__(self):
+        """
+        Support "with" so the worker threads are always shut down.
+
+        Returns:
+            GatewayFleet: This instance.
+        """
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Shut down the worker threads when leaving a "with" block.
+        """
+
+        self.close()
+
+    def close(self):
+        """
+        Wait for any outstanding requests and shut down the worker threads.
+        """
+
+        self.executor.shutdown(wait=True)
+
+    def _record_failure(self, member, exception):
+        """
+        Record a failure against a fleet member so it is backed off.
+
+        Args:
+            member (GatewayFleetMember): The fleet member that failed.
+            exception (Exception): The reason the fleet member failed.
+        """
+
+        # Back off this gateway (doubling each consecutive failure).
+        member.failures += 1
+        member.retry_time = time.monotonic() + min(
+            self.failure_backoff * (2 ** (member.failures - 1)),
+            self.maximum_failure_backoff
+        )
+        member.last_exception = exception
+
+    def _member_api_call(self, member, path, kwargs):
+        """
+        Make an API call to a single fleet member, recording any failure against that member.
+
+        Args:
+            member (GatewayFleetMember): The fleet member to request.
+            path (str): The API endpoint path.
+            kwargs (dict): Additional arguments for Gateway.api_call().
+
+        Returns:
+            dict or str or Exception: The response, or the exception if the request failed.
+        """
+
+        try:
+            # Get the gateway (logging in if necessary) and make the request.
+            response = member.get_gateway().api_call(path, **kwargs)
+        # Any failure (connection, timeout, bad JSON, expired session) is isolated to this gateway.
+        # pylint: disable-next=broad-exception-caught
+        except Exception as exception:
+            # Only a refused session or token requires a new login next time (not a bad response).
+            if isinstance(exception, UnauthorisedError):
+                member.gateway = None
+
+            self._record_failure(member, exception)
+
+            # Return the failure to the caller rather than raising it.
+            return exception
+
+        # This gateway is healthy.
+        member.failures = 0
+        member.last_exception = None
+
+        return response
+
+    def api_call(self, path, deadline=None, **kwargs):
+        """
+        Make the same API call to every available gateway in the fleet.
+
+        Gateways which recently failed (or are still responding to an earlier request) are skipped
+        until their back off has elapsed.
+
+        Args:
+            path (str): The API endpoint path.
+            deadline (float, optional):
+                The number of seconds to wait for all the gateways to respond, any gateways that
+                have not responded are reported as failed with a TimeoutError (and backed off).
+                Defaults to None (wait for every gateway).
+            **kwargs: Additional arguments for Gateway.api_call().
+
+        Returns:
+            dict:
+                The response (or the exception raised) for each gateway polled, keyed by the
+                gateway serial number.
+        """
+
+        # Skip any gateways that are still backing off.
+        now = time.monotonic()
+
+        # Submit each of the available gateways to the bounded pool of workers.
+        futures = {}
+
+        for member in self.members:
+            if member.retry_time <= now and (member.future is None or member.future.done()):
+                member.future = self.executor.submit(self._member_api_call, member, path, kwargs)
+                futures[member] = member.future
+
+        # Wait for the results (until the deadline).
+        concurrent.futures.wait(futures.values(), timeout=deadline)
+
+        # Take each of the results.
+        results = {}
+
+        for member, future in futures.items():
+            # Did this gateway miss the deadline? It is left to finish in the background.
+            if not future.done():
+                # A gateway still waiting for a worker is not requested at all.
+                if future.cancel():
+                    member.future = None
+
+                exception = TimeoutError(f'Gateway {member.serial_number} did not respond within {deadline} seconds.')
+                self._record_failure(member, exception)
+                results[member.serial_number] = exception
+            else:
+                results[member.serial_number] = future.result()
+
+        return results
\ No newline at end of file
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# This file is part of Enphase-API <https://github.com/Matthew1471/Enphase-API>
+# Copyright (C) 2023 Matthew1471!
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Enphase-API JSON Decoder Module
+This module provides the choice of JSON decoder used for IQ Gateway responses.
+
+The fastest installed decoder is used by default; orjson ("pip install orjson"), then simdjson
+("pip install pysimdjson"), then the standard library. Each decodes the raw response bytes directly.
+"""
+
+# The standard library decoder is always available.
+import json
+
+# Third party library; "pip install orjson" (optional, the fastest decoder).
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Third party library; "pip install pysimdjson" (optional).
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+
+class JSONDecoder:
+    """
+    A class to choose the function that decodes JSON responses.
+    """
+
+    # The names of the decoders (in order of preference).
+    ORJSON = 'orjson'
+    SIMDJSON = 'simdjson'
+    STANDARD = 'json'
+
+    @staticmethod
+    def get_decoders():
+        """
+        Get the decoders that are installed.
+
+        Returns:
+            list: The names of the installed decoders (in order of preference).
+        """
+
+        decoders = []
+
+        if orjson:
+            decoders.append(JSONDecoder.ORJSON)
+
+        if simdjson:
+            decoders.append(JSONDecoder.SIMDJSON)
+
+        decoders.append(JSONDecoder.STANDARD)
+
+        return decoders
+
+    @staticmethod
+    def get_loads(name=None):
+        """
+        Get a function that decodes JSON from bytes.
+
+        Args:
+            name (str, optional):
+                The decoder to use (ORJSON, SIMDJSON or STANDARD). Defaults to None (the fastest
+                installed decoder).
+
+        Returns:
+            callable: The function that takes bytes and returns the decoded object.
+
+        Raises:
+            ValueError: If the decoder is not recognised or not installed.
+        """
+
+        # Use the fastest installed decoder?
+        if name is None:
+            name = JSONDecoder.get_decoders()[0]
+
+        if name == JSONDecoder.ORJSON:
+            if not orjson:
+                raise ValueError('The orjson JSON decoder requires "pip install orjson".')
+
+            return orjson.loads
+
+        if name == JSONDecoder.SIMDJSON:
+            if not simdjson:
+                raise ValueError('The simdjson JSON decoder requires "pip install pysimdjson".')
+
+            return simdjson.loads
+
+        if name == JSONDecoder.STANDARD:
+            return json.loads
+
+        raise ValueError(f'Unsupported JSON decoder "{name}".')
\ No newline at end of file
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# This file is part of Enphase-API <https://github.com/Matthew1471/Enphase-API>
+# Copyright (C) 2023 Matthew1471!
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Enphase-API Meter Stream Codec Module
+This module provides the encodings of the "MeterStream" messages (the "/ivp/meters/reports"
+readings) that are published to AMQP and the decoding of them by their content type.
+
+JSON (the default) carries the whole response. The binary and MessagePack encodings only carry the
+"reportType" and the actPower, reactPwr, apprntPwr, rmsVoltage, rmsCurrent, pwrFactor and freqHz
+of the "cumulative" result and of each phase in "lines" (MessagePack requires "pip install msgpack").
+
+Either way, a decoded message is a dictionary with a "timestamp" and the "readings".
+"""
+
+# The default encoding is JSON.
+import json
+
+# The binary encoding is a fixed layout.
+import struct
+
+# Third party library; "pip install msgpack" (only required for the MessagePack encoding).
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class MeterStreamCodec:
+    """
+    A class to encode and decode the meter readings published to AMQP.
+    """
+
+    # The content type of each encoding (sent in the AMQP message properties).
+    CONTENT_TYPE_JSON = 'application/json'
+    CONTENT_TYPE_BINARY = 'application/vnd.enphase-api.meter-stream'
+    CONTENT_TYPE_MSGPACK = 'application/msgpack'
+
+    # The fields carried by the binary and MessagePack encodings (in the binary order).
+    FIELDS = ('actPower', 'reactPwr', 'apprntPwr', 'rmsVoltage', 'rmsCurrent', 'pwrFactor', 'freqHz')
+
+    # The report types the binary encoding can carry (in the order of their binary identifier).
+    REPORT_TYPES = ('production', 'net-consumption', 'total-consumption')
+
+    # Binary version, timestamp and number of meters.
+    BINARY_HEADER = struct.Struct('<BdB')
+
+    # Binary report type and number of phases in each meter.
+    BINARY_METER = struct.Struct('<BB')
+
+    # Binary fields of each result (the cumulative result then each phase).
+    BINARY_RESULT = struct.Struct(f'<{len(FIELDS)}d')
+
+    # The version of the binary layout.
+    BINARY_VERSION = 1
+
+    @staticmethod
+    def get_content_types():
+        """
+        Get the content types that can be encoded and decoded.
+
+        Returns:
+            list: The supported content types (MessagePack only if it is installed).
+        """
+
+        content_types = [MeterStreamCodec.CONTENT_TYPE_JSON, MeterStreamCodec.CONTENT_TYPE_BINARY]
+
+        if msgpack:
+            content_types.append(MeterStreamCodec.CONTENT_TYPE_MSGPACK)
+
+        return content_types
+
+    @staticmethod
+    def get_compact_readings(readings):
+        """
+        Get only the fields of the readings that are carried by the compact encodings.
+
+        Args:
+            readings (list): The "/ivp/meters/reports" response.
+
+        Returns:
+            list: The readings with only the "reportType", "cumulative" and "lines" fields.
+        """
+
+        return [
+            {
+                'reportType': meter_readings['reportType'],
+                'cumulative': {field: meter_readings['cumulative'][field] for field in MeterStreamCodec.FIELDS},
+                'lines': [{field: line[field] for field in MeterStreamCodec.FIELDS} for line in meter_readings['lines']]
+            } for meter_readings in readings
+        ]
+
+    @staticmethod
+    def encode(timestamp, readings, content_type=CONTENT_TYPE_JSON):
+        """
+        Encode a reading as a message body.
+
+        Args:
+            timestamp (float): The epoch time of the reading.
+            readings (list): The "/ivp/meters/reports" response.
+            content_type (str, optional): The encoding to use. Defaults to CONTENT_TYPE_JSON.
+
+        Returns:
+            bytes: The message body.
+
+        Raises:
+            ValueError: If the content type is not supported or a report type is not expected.
+        """
+
+        # JSON carries the whole response.
+        if content_type == MeterStreamCodec.CONTENT_TYPE_JSON:
+            return json.dumps({'timestamp': timestamp, 'readings': readings}).encode('utf-8')
+
+        # MessagePack carries the same structure (but only the compact fields).
+        if content_type == MeterStreamCodec.CONTENT_TYPE_MSGPACK:
+            if not msgpack:
+                raise ValueError('The MessagePack meter stream encoding requires "pip install msgpack".')
+
+            return msgpack.packb({'timestamp': timestamp, 'readings': MeterStreamCodec.get_compact_readings(readings)})
+
+        # Is this an unsupported content type?
+        if content_type != MeterStreamCodec.CONTENT_TYPE_BINARY:
+            raise ValueError(f'Unsupported meter stream content type "{content_type}".')
+
+        # The binary encoding starts with the header.
+        parts = [MeterStreamCodec.BINARY_HEADER.pack(MeterStreamCodec.BINARY_VERSION, timestamp, len(readings))]
+
+        # Take each of the meter types.
+        for meter_readings in readings:
+            # Get the identifier of this meter type.
+            try:
+                report_type = MeterStreamCodec.REPORT_TYPES.index(meter_readings['reportType'])
+            except ValueError as exception:
+                raise ValueError(f'Unexpected meter reading report type "{meter_readings["reportType"]}".') from exception
+
+            parts.append(MeterStreamCodec.BINARY_METER.pack(report_type, len(meter_readings['lines'])))
+
+            # The cumulative result is followed by each of the phases.
+            for result in [meter_readings['cumulative']] + meter_readings['lines']:
+                parts.append(MeterStreamCodec.BINARY_RESULT.pack(*(result[field] for field in MeterStreamCodec.FIELDS)))
+
+        return b''.join(parts)
+
+    @staticmethod
+    def decode(body, content_type=None):
+        """
+        Decode a message body.
+
+        Args:
+            body (bytes): The message body.
+            content_type (str, optional):
+                The content type from the message properties. Defaults to None, which is decoded
+                as JSON (the only encoding before content types were sent).
+
+        Returns:
+            dict: The "timestamp" and the "readings" of the message.
+
+        Raises:
+            ValueError:
+                If the content type is not supported, the binary version is not expected or the body
+                cannot be decoded.
+        """
+
+        # Messages without a content type were published as JSON.
+        if content_type is None or content_type == MeterStreamCodec.CONTENT_TYPE_JSON:
+            return json.loads(body)
+
+        # MessagePack has the same structure as JSON.
+        if content_type == MeterStreamCodec.CONTENT_TYPE_MSGPACK:
+            if not msgpack:
+                raise ValueError('The MessagePack meter stream encoding requires "pip install msgpack".')
+
+            return msgpack.unpackb(body)
+
+        # Is this an unsupported content type?
+        if content_type != MeterStreamCodec.CONTENT_TYPE_BINARY:
+            raise ValueError(f'Unsupported meter stream content type "{content_type}".')
+
+        # A truncated body or an unknown meter type is not a valid binary message.
+        try:
+            # Read the header.
+            version, timestamp, number_of_meters = MeterStreamCodec.BINARY_HEADER.unpack_from(body)
+            if version != MeterStreamCodec.BINARY_VERSION:
+                raise ValueError(f'Unexpected meter stream binary version #{version}.')
+
+            offset = MeterStreamCodec.BINARY_HEADER.size
+
+            # The readings for each meter type.
+            readings = []
+
+            for _ in range(number_of_meters):
+                # Read the meter type and number of phases.
+                report_type, number_of_lines = MeterStreamCodec.BINARY_METER.unpack_from(body, offset)
+                offset += MeterStreamCodec.BINARY_METER.size
+
+                # Read the cumulative result followed by each of the phases.
+                results = []
+                for _ in range(number_of_lines + 1):
+                    results.append(dict(zip(MeterStreamCodec.FIELDS, MeterStreamCodec.BINARY_RESULT.unpack_from(body, offset))))
+                    offset += MeterStreamCodec.BINARY_RESULT.size
+
+                readings.append({
+                    'reportType': MeterStreamCodec.REPORT_TYPES[report_type],
+                    'cumulative': results[0],
+                    'lines': results[1:]
+                })
+        except (struct.error, IndexError) as exception:
+            raise ValueError(f'Invalid meter stream binary message ({exception}).') from exception
+
+        return {'timestamp': timestamp, 'readings': readings}
\ No newline at end of file
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# This file is part of Enphase-API <https://github.com/Matthew1471/Enphase-API>
+# Copyright (C) 2023 Matthew1471!
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Enphase-API Models Module
+This module provides compact records for the IQ Gateway responses that are handled most often;
+the meter reports ("/ivp/meters/reports"), the production summaries ("/production.json") and the
+inverters ("/api/v1/production/inverters").
+
+Each record has fixed attributes (using "__slots__", so it has no per-instance dictionary) and is
+constructed from the decoded JSON with "from_json()" (or "from_json_list()" for a whole response).
+"""
+
+# A meter result is a named tuple (so it can be used directly as database parameters).
+import collections
+
+
+class MeterResult(collections.namedtuple('MeterResult', ('act_power', 'react_pwr', 'apprnt_pwr', 'rms_voltage', 'rms_current', 'pwr_factor', 'freq_hz'))):
+    """
+    A class to hold the result of a meter report (either cumulative or for a single phase).
+    The fields are in the same order as MeterStreamCodec.FIELDS.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_json(cls, result):
+        """
+        Create a meter result from the decoded JSON.
+
+        Args:
+            result (dict): The "cumulative" result or one of the "lines" of a meter report.
+
+        Returns:
+            MeterResult: The meter result.
+        """
+
+        return cls(
+            result['actPower'],
+            result['reactPwr'],
+            result['apprntPwr'],
+            result['rmsVoltage'],
+            result['rmsCurrent'],
+            result['pwrFactor'],
+            result['freqHz']
+        )
+
+
+class MeterReport:
+    """
+    A class to hold the report of a single meter type (production, net-consumption or
+    total-consumption).
+    """
+
+    __slots__ = ('report_type', 'created_at', 'cumulative', 'lines')
+
+    def __init__(self, report_type, created_at, cumulative, lines):
+        """
+        Initialize a meter report.
+
+        Args:
+            report_type (str): The meter type ("production", "net-consumption" or "total-consumption").
+            created_at (int): The epoch time of the report (or None if not known).
+            cumulative (MeterResult): The result across all the phases.
+            lines (list): The MeterResult of each phase.
+        """
+
+        self.report_type = report_type
+        self.created_at = created_at
+        self.cumulative = cumulative
+        self.lines = lines
+
+    @classmethod
+    def from_json(cls, meter_readings):
+        """
+        Create a meter report from the decoded JSON.
+
+        Args:
+            meter_readings (dict): One of the items of the "/ivp/meters/reports" response.
+
+        Returns:
+            MeterReport: The meter report.
+        """
+
+        return cls(
+            report_type=meter_readings['reportType'],
+            created_at=meter_readings.get('createdAt'),
+            cumulative=MeterResult.from_json(meter_readings['cumulative']),
+            lines=[MeterResult.from_json(line) for line in meter_readings['lines']]
+        )
+
+    @classmethod
+    def from_json_list(cls, readings):
+        """
+        Create the meter reports of a whole response from the decoded JSON.
+
+        Args:
+            readings (list): The "/ivp/meters/reports" response.
+
+        Returns:
+            list: The MeterReport of each meter type.
+        """
+
+        return [cls.from_json(meter_readings) for meter_readings in readings]
+
+
+class ProductionSummary:
+    """
+    A class to hold one of the "production" or "consumption" summaries of "/production.json".
+    """
+
+    __slots__ = ('type', 'measurement_type', 'active_count', 'reading_time', 'w_now', 'wh_lifetime', 'wh_today', 'wh_last_seven_days')
+
+    # The attribute is named "type" as it is in the JSON.
+    # pylint: disable-next=redefined-builtin
+    def __init__(self, type, measurement_type, active_count, reading_time, w_now, wh_lifetime=None, wh_today=None, wh_last_seven_days=None):
+        """
+        Initialize a production summary.
+
+        Args:
+            type (str): The type of the summary ("inverters", "eim" or "rgms").
+            measurement_type (str): The measurement type of a meter (or None for the inverters).
+            active_count (int): The number of active inverters or meters.
+            reading_time (int): The epoch time of the reading.
+            w_now (float): The current power in watts.
+            wh_lifetime (float, optional): The lifetime energy in watt hours. Defaults to None.
+            wh_today (float, optional): The energy today in watt hours. Defaults to None.
+            wh_last_seven_days (float, optional):
+                The energy over the last 7 days in watt hours. Defaults to None.
+        """
+
+        self.type = type
+        self.measurement_type = measurement_type
+        self.active_count = active_count
+        self.reading_time = reading_time
+        self.w_now = w_now
+        self.wh_lifetime = wh_lifetime
+        self.wh_today = wh_today
+        self.wh_last_seven_days = wh_last_seven_days
+
+    @classmethod
+    def from_json(cls, summary):
+        """
+        Create a production summary from the decoded JSON.
+
+        Args:
+            summary (dict): One of the "production" or "consumption" items of "/production.json".
+
+        Returns:
+            ProductionSummary: The production summary.
+        """
+
+        return cls(
+            type=summary['type'],
+            measurement_type=summary.get('measurementType'),
+            active_count=summary['activeCount'],
+            reading_time=summary['readingTime'],
+            w_now=summary['wNow'],
+            wh_lifetime=summary.get('whLifetime'),
+            wh_today=summary.get('whToday'),
+            wh_last_seven_days=summary.get('whLastSevenDays')
+        )
+
+    @classmethod
+    def from_json_list(cls, summaries):
+        """
+        Create the production summaries of a section of "/production.json" from the decoded JSON.
+
+        Args:
+            summaries (list): The "production" or "consumption" section of "/production.json".
+
+        Returns:
+            list: The ProductionSummary of each item.
+        """
+
+        return [cls.from_json(summary) for summary in summaries]
+
+
+class Inverter:
+    """
+    A class to hold the last report of a microinverter.
+    """
+
+    __slots__ = ('serial_number', 'last_report_date', 'dev_type', 'last_report_watts', 'max_report_watts')
+
+    def __init__(self, serial_number, last_report_date, dev_type, last_report_watts, max_report_watts):
+        """
+        Initialize an inverter.
+
+        Args:
+            serial_number (str): The serial number of the microinverter.
+            last_report_date (int): The epoch time of the last report.
+            dev_type (int): The device type of the microinverter.
+            last_report_watts (int): The power in watts of the last report.
+            max_report_watts (int): The maximum power in watts reported.
+        """
+
+        self.serial_number = serial_number
+        self.last_report_date = last_report_date
+        self.dev_type = dev_type
+        self.last_report_watts = last_report_watts
+        self.max_report_watts = max_report_watts
+
+    @classmethod
+    def from_json(cls, inverter):
+        """
+        Create an inverter from the decoded JSON.
+
+        Args:
+            inverter (dict): One of the items of the "/api/v1/production/inverters" response.
+
+        Returns:
+            Inverter: The inverter.
+        """
+
+        return cls(
+            serial_number=inverter['serialNumber'],
+            last_report_date=inverter['lastReportDate'],
+            dev_type=inverter.get('devType'),
+            last_report_watts=inverter['lastReportWatts'],
+            max_report_watts=inverter.get('maxReportWatts')
+        )
+
+    @classmethod
+    def from_json_list(cls, inverters):
+        """
+        Create the inverters of a whole response from the decoded JSON.
+
+        Args:
+            inverters (list): The "/api/v1/production/inverters" response.
+
+        Returns:
+            list: The Inverter of each microinverter.
+        """
+
+        return [cls.from_json(inverter) for inverter in inverters]
\ No newline at end of file
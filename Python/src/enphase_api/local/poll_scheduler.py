@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# This file is part of Enphase-API <https://github.com/Matthew1471/Enphase-API>
+# Copyright (C) 2023 Matthew1471!
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Enphase-API Poll Scheduler Module
+This module provides a scheduler for polling IQ Gateway endpoints each at their own cadence.
+
+Ticks are scheduled on the monotonic clock from when each task was added (rather than sleeping
+after each request), so the period does not drift with the request latency. Ticks missed whilst a
+request was slow are either skipped (the next tick stays on the original schedule) or caught up.
+
+A task can also derive its next refresh from its response (such as the inverters "readingTime" plus
+the 5 minute inverter reporting interval), so each endpoint is only requested when it has changed.
+"""
+
+# The next task to run is kept at the top of a heap.
+import heapq
+
+# The scheduler can be stopped from another thread.
+import threading
+
+# Ticks are scheduled on the monotonic clock.
+import time
+
+
+class PollTask:
+    """
+    A class to hold the schedule of a single task within a poll scheduler.
+    """
+
+    def __init__(self, name, interval, callback, next_refresh=None, missed=None):
+        """
+        Initialize a poll task.
+
+        Args:
+            name (str): The name of the task (such as the endpoint path).
+            interval (float): The seconds between each tick.
+            callback (callable): Called (with no arguments) on each tick; its result is the response.
+            next_refresh (callable, optional):
+                Called with the response to get the epoch time the response is next expected to
+                change (or None to use the interval). Defaults to None.
+            missed (str, optional):
+                How missed ticks are handled (MISSED_SKIP or MISSED_CATCH_UP). Defaults to None
+                (the scheduler's policy).
+        """
+
+        self.name = name
+        self.interval = interval
+        self.callback = callback
+        self.next_refresh = next_refresh
+        self.missed = missed
+
+        # When this task is next due (on the monotonic clock).
+        self.due_time = 0
+
+        # The number of ticks that have been skipped.
+        self.skipped = 0
+
+
+class PollScheduler:
+    """
+    A class to run polling tasks each at their own drift-free cadence.
+    """
+
+    # Missed ticks are dropped (the next tick is the next one on the original schedule).
+    MISSED_SKIP = 'skip'
+
+    # Missed ticks are run back to back (up to maximum_catch_up ticks behind).
+    MISSED_CATCH_UP = 'catch_up'
+
+    def __init__(self, missed=MISSED_SKIP, maximum_catch_up=10):
+        """
+        Initialize a poll scheduler.
+
+        Args:
+            missed (str, optional):
+                How missed ticks are handled (MISSED_SKIP or MISSED_CATCH_UP).
+                Defaults to MISSED_SKIP.
+            maximum_catch_up (int, optional):
+                When catching up, the most ticks a task can fall behind (any older ticks are
+                skipped). Defaults to 10.
+
+        Raises:
+            ValueError: If the missed tick policy is not recognised.
+        """
+
+        # Check the missed tick policy.
+        if missed not in (PollScheduler.MISSED_SKIP, PollScheduler.MISSED_CATCH_UP):
+            raise ValueError(f'Unexpected missed tick policy "{missed}".')
+
+        self.missed = missed
+        self.maximum_catch_up = maximum_catch_up
+
+        # The tasks ordered by when they are next due (ties are run in the order they were added).
+        self.tasks = []
+        self.sequence = 0
+
+        # Set when the scheduler should stop (this also interrupts waiting for the next task).
+        self.stopping = threading.Event()
+
+    def add(self, name, interval, callback, next_refresh=None, missed=None, delay=0):
+        """
+        Add a task to the scheduler.
+
+        Args:
+            name (str): The name of the task (such as the endpoint path).
+            interval (float): The seconds between each tick.
+            callback (callable): Called (with no arguments) on each tick; its result is the response.
+            next_refresh (callable, optional):
+                Called with the response to get the epoch time the response is next expected to
+                change; None (or a time that has already passed) uses the interval instead.
+                Defaults to None.
+            missed (str, optional):
+                How missed ticks of this task are handled (MISSED_SKIP or MISSED_CATCH_UP).
+                Defaults to None (the scheduler's policy).
+            delay (float, optional): The seconds before the first tick. Defaults to 0.
+
+        Returns:
+            PollTask: The task.
+
+        Raises:
+            ValueError: If the interval is not positive or the missed tick policy is not recognised.
+        """
+
+        # Check the interval and the missed tick policy.
+        if interval <= 0:
+            raise ValueError(f'The interval of "{name}" must be positive.')
+
+        if missed not in (None, PollScheduler.MISSED_SKIP, PollScheduler.MISSED_CATCH_UP):
+            raise ValueError(f'Unexpected missed tick policy "{missed}".')
+
+        task = PollTask(name=name, interval=interval, callback=callback, next_refresh=next_refresh, missed=missed)
+        task.due_time = time.monotonic() + delay
+
+        self._push(task)
+
+        return task
+
+    def stop(self):
+        """
+        Stop the scheduler (this can be called from another thread or from a task).
+        """
+
+        self.stopping.set()
+
+    def run(self):
+        """
+        Run the tasks (each when it is due) until the scheduler is stopped.
+
+        Any exception raised by a task stops the scheduler and is re-raised.
+        """
+
+        while self.run_once():
+            pass
+
+    def run_once(self):
+        """
+        Wait for the next task to be due and then run it.
+
+        Returns:
+            bool: True if a task was run, False if the scheduler was stopped (or has no tasks).
+        """
+
+        # Are there no tasks to run?
+        if not self.tasks:
+            return False
+
+        # Wait until the next task is due (unless the scheduler is stopped in the meantime).
+        due_time, _, task = self.tasks[0]
+        if self.stopping.wait(timeout=max(due_time - time.monotonic(), 0)):
+            return False
+
+        heapq.heappop(self.tasks)
+
+        # Run the task (it is rescheduled even if it fails so a later run can try it again).
+        response = None
+        try:
+            response = task.callback()
+        finally:
+            self._reschedule(task, response)
+
+        return True
+
+    def _push(self, task):
+        """
+        Add a task to the heap (by when it is next due).
+
+        Args:
+            task (PollTask): The task.
+        """
+
+        heapq.heappush(self.tasks, (task.due_time, self.sequence, task))
+        self.sequence += 1
+
+    def _reschedule(self, task, response=None):
+        """
+        Schedule the next tick of a task that has just run.
+
+        Args:
+            task (PollTask): The task.
+            response (object, optional): The result of the task. Defaults to None.
+        """
+
+        now = time.monotonic()
+
+        # Can the next refresh be derived from the response?
+        next_refresh = task.next_refresh(response) if task.next_refresh and response is not None else None
+        if next_refresh is not None:
+            # Convert the epoch time to the monotonic clock.
+            due_time = now + (next_refresh - time.time())
+
+            # Is the response expected to change in the future?
+            if due_time > now:
+                task.due_time = due_time
+                self._push(task)
+                return
+
+        # The next tick on the original schedule.
+        task.due_time += task.interval
+
+        # Were ticks missed whilst the task ran?
+        if task.due_time <= now:
+            # How many ticks are behind.
+            ticks_behind = int((now - task.due_time) // task.interval) + 1
+
+            # Are missed ticks dropped (or too far behind to catch up)?
+            if (task.missed or self.missed) == PollScheduler.MISSED_SKIP:
+                task.skipped += ticks_behind
+                task.due_time += ticks_behind * task.interval
+            elif ticks_behind > self.maximum_catch_up:
+                task.skipped += ticks_behind - self.maximum_catch_up
+                task.due_time += (ticks_behind - self.maximum_catch_up) * task.interval
+
+        self._push(task)
\ No newline at end of file
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# This file is part of Enphase-API <https://github.com/Matthew1471/Enphase-API>
+# Copyright (C) 2023 Matthew1471!
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Enphase-API Projection Module
+This module provides the extraction of selected values from an IQ Gateway response as a flat record.
+
+Each path is made of keys separated by dots, where a key can be followed by an index ("[0]") or by
+conditions that select the first matching element of a list ("[type=eim,measurementType=production]").
+For example, "production[type=inverters].wNow" selects the "wNow" of the "inverters" production.
+
+A path that does not match the response (such as a meter that is not installed) selects None.
+"""
+
+# We parse the paths.
+import re
+
+
+class Projection:
+    """
+    A class to extract the values of selected paths from a decoded response.
+    """
+
+    # A key (which can be empty) followed by any selectors, and then a dot or the end of the path.
+    SEGMENT_PATTERN = re.compile(r'([^.\[\]]*)((?:\[[^\]]*\])*)(?:\.|$)')
+
+    # Each of the selectors after a key.
+    SELECTOR_PATTERN = re.compile(r'\[([^\]]*)\]')
+
+    # An index selector.
+    INDEX_PATTERN = re.compile(r'-?\d+')
+
+    # The kinds of step in a compiled path.
+    STEP_KEY = 0
+    STEP_INDEX = 1
+    STEP_FILTER = 2
+
+    def __init__(self, paths):
+        """
+        Initialize a projection (compiling the paths).
+
+        Args:
+            paths (list): The paths to select.
+
+        Raises:
+            ValueError: If a path cannot be parsed.
+        """
+
+        self.paths = tuple(paths)
+        self.steps = [Projection.compile(path) for path in self.paths]
+
+    @staticmethod
+    def compile(path):
+        """
+        Compile a path into the steps that extract its value.
+
+        Args:
+            path (str): The path.
+
+        Returns:
+            list: The steps (each a tuple of the kind of step and its arguments).
+
+        Raises:
+            ValueError: If the path cannot be parsed.
+        """
+
+        steps = []
+        position = 0
+
+        while position < len(path):
+            # Get the next key and its selectors.
+            match = Projection.SEGMENT_PATTERN.match(path, position)
+            if match is None:
+                raise ValueError(f'Unable to parse the path "{path}" at position {position}.')
+
+            key, selectors = match.groups()
+            if not key and not selectors:
+                raise ValueError(f'Unable to parse the path "{path}" at position {position}.')
+
+            position = match.end()
+
+            if key:
+                steps.append((Projection.STEP_KEY, key))
+
+            for selector in Projection.SELECTOR_PATTERN.findall(selectors):
+                # Is this the index of an element?
+                if Projection.INDEX_PATTERN.fullmatch(selector):
+                    steps.append((Projection.STEP_INDEX, int(selector)))
+                    continue
+
+                # Otherwise it is the conditions an element must match.
+                conditions = []
+                for condition in selector.split(','):
+                    if '=' not in condition:
+                        raise ValueError(f'Unable to parse the condition "{condition}" in the path "{path}".')
+
+                    condition_key, condition_value = condition.split('=', 1)
+                    conditions.append((condition_key.strip(), condition_value.strip()))
+
+                steps.append((Projection.STEP_FILTER, tuple(conditions)))
+
+        return steps
+
+    @staticmethod
+    def get_text(value):
+        """
+        Get the text of a value as it appears in JSON (so it can be compared with a condition).
+
+        Args:
+            value (object): The decoded value.
+
+        Returns:
+            str: The text of the value.
+        """
+
+        if value is None:
+            return 'null'
+
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+
+        return str(value)
+
+    @staticmethod
+    def get_value(document, steps):
+        """
+        Extract the value of a compiled path.
+
+        Args:
+            document (object): The decoded response.
+            steps (list): The compiled path.
+
+        Returns:
+            object: The value (or None if the path does not match the response).
+        """
+
+        value = document
+
+        for step in steps:
+            if step[0] == Projection.STEP_KEY:
+                value = value.get(step[1]) if isinstance(value, dict) else None
+            elif step[0] == Projection.STEP_INDEX:
+                value = value[step[1]] if isinstance(value, list) and -len(value) <= step[1] < len(value) else None
+            else:
+                value = next((
+                    element for element in value
+                    if isinstance(element, dict) and all(
+                        Projection.get_text(element.get(condition_key)) == condition_value
+                        for condition_key, condition_value in step[1]
+                    )
+                ), None) if isinstance(value, list) else None
+
+            # Does the path not match the response?
+            if value is None:
+                return None
+
+        return value
+
+    def extract(self, document):
+        """
+        Extract the value of each path.
+
+        Args:
+            document (object): The decoded response.
+
+        Returns:
+            dict: The value of each path (keyed by the path).
+        """
+
+        return {path: Projection.get_value(document, steps) for path, steps in zip(self.paths, self.steps)}
\ No newline at end of file
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# This file is part of Enphase-API <https://github.com/Matthew1471/Enphase-API>
+# Copyright (C) 2023 Matthew1471!
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Enphase-API Resilience Module
+This module provides the retry and circuit breaker policies a Gateway can use when the IQ Gateway
+is unreachable or busy.
+
+A RetryPolicy retries idempotent requests (with jittered exponential backoff) that failed to
+connect, timed out or returned a server error. A CircuitBreaker fails requests fast (with a
+CircuitOpenError) once several consecutive requests have failed to connect or timed out, and then
+lets a single trial request through every reset_timeout seconds until the IQ Gateway responds.
+"""
+
+# The backoff between retries is jittered.
+import random
+
+# The circuit breaker is shared between threads.
+import threading
+
+# We time how long the circuit breaker has been open.
+import time
+
+# Third party library; "pip install requests" if getting import errors.
+import requests
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised instead of making a request while the circuit breaker is open.
+    This is a ConnectionError so existing handling of an unreachable IQ Gateway still applies.
+    """
+
+
+class RetryPolicy:
+    """
+    A class to decide whether (and when) a failed request is retried.
+    """
+
+    # Only these methods are safe to repeat.
+    IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    # The IQ Gateway returns these when it is overloaded or restarting.
+    RETRY_STATUSES = (500, 502, 503, 504)
+
+    def __init__(self, retries=3, backoff=0.5, maximum_backoff=10, retry_statuses=RETRY_STATUSES, retry_read_timeouts=True):
+        """
+        Initialize a retry policy.
+
+        Args:
+            retries (int, optional):
+                The maximum number of times a request is retried. Defaults to 3.
+            backoff (float, optional):
+                The maximum delay in seconds before the first retry (this doubles for each
+                subsequent retry). Defaults to 0.5.
+            maximum_backoff (float, optional):
+                The maximum delay in seconds before any retry. Defaults to 10.
+            retry_statuses (tuple, optional):
+                The HTTP status codes that are retried. Defaults to RETRY_STATUSES.
+            retry_read_timeouts (bool, optional):
+                If False, idempotent requests that time out waiting for the response are not
+                retried either (e.g. when the read timeout is long). Defaults to True.
+        """
+
+        self.retries = retries
+        self.backoff = backoff
+        self.maximum_backoff = maximum_backoff
+        self.retry_statuses = retry_statuses
+        self.retry_read_timeouts = retry_read_timeouts
+
+    def should_retry(self, method, attempt, exception=None):
+        """
+        Check whether a failed request can be retried.
+
+        A request that could not connect was never sent, so it can be retried whatever its method.
+        Otherwise only idempotent requests are retried (as the IQ Gateway may have processed it).
+
+        Args:
+            method (str): The HTTP method of the request.
+            attempt (int): The number of times the request has already been retried.
+            exception (Exception, optional):
+                The exception the request failed with. Defaults to None (a server error).
+
+        Returns:
+            bool: True if the request should be retried, False otherwise.
+        """
+
+        # Has the request already been retried enough?
+        if attempt >= self.retries:
+            return False
+
+        # Was the request never sent?
+        if isinstance(exception, requests.exceptions.ConnectTimeout):
+            return True
+
+        # Should a request that timed out waiting for the response not be retried?
+        if isinstance(exception, requests.exceptions.ReadTimeout) and not self.retry_read_timeouts:
+            return False
+
+        return method.upper() in RetryPolicy.IDEMPOTENT_METHODS
+
+    def get_delay(self, attempt):
+        """
+        Get the delay before a retry ("full jitter" so several pollers do not retry in step).
+
+        Args:
+            attempt (int): The number of times the request has already been retried.
+
+        Returns:
+            float: The number of seconds to wait.
+        """
+
+        return random.uniform(0, min(self.backoff * (2 ** attempt), self.maximum_backoff))
+
+
+class CircuitBreaker:
+    """
+    A class to fail requests fast while the IQ Gateway is unreachable.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=30):
+        """
+        Initialize a circuit breaker.
+
+        Args:
+            failure_threshold (int, optional):
+                The number of consecutive failures after which the circuit opens. Defaults to 3.
+            reset_timeout (float, optional):
+                The seconds the circuit stays open before a trial request is let through.
+                Defaults to 30.
+        """
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        # Protects the state below (a Gateway may be shared between threads).
+        self.lock = threading.Lock()
+
+        # The number of consecutive failures and when a trial request can next be made.
+        self.failures = 0
+        self.open_until = 0
+
+    def is_open(self):
+        """
+        Check whether requests are currently being failed fast.
+
+        Returns:
+            bool: True if the circuit is open, False otherwise.
+        """
+
+        with self.lock:
+            return self.failures >= self.failure_threshold and time.monotonic() < self.open_until
+
+    def before_request(self):
+        """
+        Check a request can be made (call this before each request).
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+        """
+
+        with self.lock:
+            # Is the circuit closed?
+            if self.failures < self.failure_threshold:
+                return
+
+            # Has the circuit not been open long enough?
+            if time.monotonic() < self.open_until:
+                raise CircuitOpenError(f'The IQ Gateway is unreachable (after {self.failures} consecutive failures).')
+
+            # Let this request through as a trial (other requests still fail fast until it completes
+            # or until another reset_timeout has passed).
+            self.open_until = time.monotonic() + self.reset_timeout
+
+    def record_success(self):
+        """
+        Record that the IQ Gateway responded (this closes the circuit).
+        """
+
+        with self.lock:
+            self.failures = 0
+
+    def record_failure(self):
+        """
+        Record that a request could not connect or timed out (this may open the circuit).
+        """
+
+        with self.lock:
+            self.failures += 1
+
+            # Has the circuit opened (or a trial request failed)?
+            if self.failures >= self.failure_threshold:
+                self.open_until = time.monotonic() + self.reset_timeout
\ No newline at end of file
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# This file is part of Enphase-API <https://github.com/Matthew1471/Enphase-API>
+# Copyright (C) 2023 Matthew1471!
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Enphase-API Response Deduplicator Module
+This module provides change detection of IQ Gateway responses, so consecutive responses that have
+not changed (such as "/production.json" between inverter reports) need not be stored or published.
+
+Each endpoint's response is compared against the last response of that endpoint; either by a hash
+of the raw response body, by the fields selected for that endpoint or by the whole decoded response.
+"""
+
+# Raw response bodies are compared by their hash.
+import hashlib
+
+# We time how long since a response was last let through.
+import time
+
+
+class ResponseDeduplicator:
+    """
+    A class to detect whether an IQ Gateway response has changed since the last response.
+    """
+
+    def __init__(self, fields=None, maximum_age=None):
+        """
+        Initialize a response deduplicator.
+
+        Args:
+            fields (dict, optional):
+                The function for each endpoint that selects the values to compare from its decoded
+                response (e.g. to ignore a timestamp that changes every response). Defaults to None
+                (the whole response is compared).
+            maximum_age (float, optional):
+                The seconds after which an unchanged response is treated as changed anyway (so a
+                sink still receives a periodic sample). Defaults to None (unchanged responses are
+                never treated as changed).
+        """
+
+        self.fields = fields if fields else {}
+        self.maximum_age = maximum_age
+
+        # The last compared value of each endpoint and when a response was last treated as changed.
+        self.last_values = {}
+        self.last_changed_times = {}
+
+        # The number of unchanged responses of each endpoint.
+        self.unchanged = {}
+
+    def is_changed(self, endpoint, response=None, content=None):
+        """
+        Check whether a response has changed since the last response of the same endpoint.
+
+        Args:
+            endpoint (str): The endpoint (or any other key) the response is compared within.
+            response (object, optional): The decoded response. Defaults to None.
+            content (bytes or str, optional):
+                The raw response body (this is hashed instead of comparing the decoded response).
+                Defaults to None.
+
+        Returns:
+            bool: True if the response has changed (or is the first of this endpoint), False otherwise.
+        """
+
+        # Get the value to compare.
+        if content is not None:
+            value = hashlib.blake2b(content.encode('utf-8') if isinstance(content, str) else content, digest_size=16).digest()
+        elif endpoint in self.fields:
+            value = self.fields[endpoint](response)
+        else:
+            value = response
+
+        now = time.monotonic()
+
+        # Is this the same as the last response (and was a response let through recently enough)?
+        if endpoint in self.last_values and self.last_values[endpoint] == value and (
+                self.maximum_age is None or now - self.last_changed_times[endpoint] < self.maximum_age):
+            self.unchanged[endpoint] = self.unchanged.get(endpoint, 0) + 1
+            return False
+
+        self.last_values[endpoint] = value
+        self.last_changed_times[endpoint] = now
+
+        return True
+
+    def reset(self, endpoint=None):
+        """
+        Forget the last response (so the next response is treated as changed).
+
+        Args:
+            endpoint (str, optional): The endpoint to forget. Defaults to None (every endpoint).
+        """
+
+        if endpoint is None:
+            self.last_values.clear()
+            self.last_changed_times.clear()
+        else:
+            self.last_values.pop(endpoint, None)
+            self.last_changed_times.pop(endpoint, None)
\ No newline at end of file
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# This file is part of Enphase-API <https://github.com/Matthew1471/Enphase-API>
+# Copyright (C) 2023 Matthew1471!
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+This module provides an incremental decoder for Server-Sent Events (SSE) streams such as the
+IQ Gateway's "/stream/meter" endpoint.
+
+Data is fed to the decoder in whatever sized chunks arrive from the socket; a chunk may contain
+several events (older firmware buffers 16 KB of events before sending them) or only part of an
+event. Each byte is only scanned for a line ending once.
+
+Classes:
+    ServerSentEventsDecoder:
+        Frames the "data:" fields of an SSE stream into complete events.
+
+Usage Example:
+    from enphase_api.local.gateway import Gateway
+    from enphase_api.local.server_sent_events import ServerSentEventsDecoder
+
+    response = gateway.api_call_stream('/stream/meter')
+
+    for meter_readings in ServerSentEventsDecoder.iter_json(response):
+        print(meter_readings['production']['ph-a']['p'])
+"""
+
+# Each event's data is JSON.
+import json
+
+
+class ServerSentEventsDecoder:
+    """
+    An incremental decoder for Server-Sent Events (SSE).
+
+    Only the "data" field is interpreted, comments and other fields ("event", "id" and "retry")
+    are ignored. Lines may end in either "\\n" or "\\r\\n".
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty decoder.
+        """
+
+        # Bytes which have not yet formed a complete line.
+        self.buffer = bytearray()
+
+        # The position in the buffer that has already been searched for a line ending.
+        self.search_position = 0
+
+        # The "data" lines of the event currently being received.
+        self.data_lines = []
+
+    def feed(self, chunk):
+        """
+        Add a chunk of the stream to the decoder.
+
+        Args:
+            chunk (bytes): The next chunk of bytes received from the stream.
+
+        Returns:
+            list: The data (str) of each event completed by this chunk.
+        """
+
+        # Add the new bytes to any incomplete line from the previous chunk.
+        self.buffer += chunk
+
+        # The events that this chunk completes.
+        events = []
+
+        # Where the next line starts.
+        line_start = 0
+
+        # Look for each line ending (skipping bytes already searched).
+        line_end = self.buffer.find(b'\n', self.search_position)
+
+        while line_end != -1:
+            # Take the line (without the line ending).
+            line = self.buffer[line_start:line_end]
+
+            # Lines may also end in a carriage return.
+            if line.endswith(b'\r'):
+                line = line[:-1]
+
+            # A blank line dispatches the event.
+            if not line:
+                if self.data_lines:
+                    events.append('\n'.join(self.data_lines))
+                    self.data_lines = []
+            # A data field (a single leading space after the colon is not part of the value).
+            elif line.startswith(b'data:'):
+                value = line[6:] if line.startswith(b'data: ') else line[5:]
+                self.data_lines.append(value.decode('utf-8'))
+            # A line that is just "data" is a data field with an empty value.
+            elif line == b'data':
+                self.data_lines.append('')
+
+            # The next line starts after this line ending.
+            line_start = line_end + 1
+            line_end = self.buffer.find(b'\n', line_start)
+
+        # Discard the complete lines (what remains has already been searched).
+        del self.buffer[:line_start]
+        self.search_position = len(self.buffer)
+
+        return events
+
+    @staticmethod
+    def iter_json(response, chunk_size=None):
+        """
+        Decode each event of a streaming requests response as JSON.
+
+        Args:
+            response (requests.Response):
+                A streaming response (such as from Gateway.api_call_stream()).
+            chunk_size (int, optional):
+                The number of bytes to read at a time. Defaults to None which returns data as
+                it arrives from the IQ Gateway.
+
+        Yields:
+            dict: Each decoded event.
+        """
+
+        decoder = ServerSentEventsDecoder()
+
+        # Make sure the connection is released if the caller stops iterating.
+        with response:
+            # Take each chunk of data as it arrives.
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                # Decode any events that this chunk completed.
+                for data in decoder.feed(chunk):
+                    yield json.loads(data)
+
+    @staticmethod
+    async def aiter_json(response):
+        """
+        Decode each event of a streaming aiohttp response as JSON.
+
+        Args:
+            response (aiohttp.ClientResponse):
+                A streaming response (such as from AsyncGateway.api_call_stream()).
+
+        Yields:
+            dict: Each decoded event.
+        """
+
+        decoder = ServerSentEventsDecoder()
+
+        # Make sure the connection is released if the caller stops iterating.
+        async with response:
+            # Take each chunk of data as it arrives.
+            async for chunk in response.content.iter_any():
+                # Decode any events that this chunk completed.
+                for data in decoder.feed(chunk):
+                    yield json.loads(data)
\ No newline at end of file
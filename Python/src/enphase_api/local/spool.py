@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# This file is part of Enphase-API <https://github.com/Matthew1471/Enphase-API>
+# Copyright (C) 2023 Matthew1471!
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Enphase-API Spool Module
+This module provides a durable spool between a poller and a sink (such as a database or an AMQP
+broker) so that readings are not lost (and polling does not stall) while the sink is unavailable.
+
+Records are handed to the sink in batches by a background drainer thread. If the sink fails, the
+records are appended to segment files on disk (one JSON record per line) and the drainer replays
+them in bulk once the sink recovers. Segments left over from a previous run are replayed on start.
+
+Delivery is at-least-once; if the process stops after a batch is delivered but before its segment
+is deleted, that batch is delivered again on the next start.
+
+A batch the sink can never accept (it raises one of the permanent errors, or has failed too many
+times) is moved to a dead-letter file in the same format (so it can be inspected and replayed by
+renaming it to a segment) and the rest of the backlog keeps draining.
+"""
+
+# Records waiting in memory are held in a double-ended queue.
+import collections
+
+# Records are written to disk as JSON.
+import json
+
+# We create, list and delete segment files.
+import os
+
+# The drainer runs in its own thread.
+import threading
+
+# We wait for batches to fill and between retries.
+import time
+
+
+class Spool:
+    """
+    A class to spool records to disk while a sink is unavailable and replay them in bulk.
+    """
+
+    # Segment files are fsynced after every record (slowest, survives a power cut).
+    FSYNC_ALWAYS = 'always'
+
+    # Segment files are fsynced when they are closed (a power cut may lose the open segment).
+    FSYNC_SEGMENT = 'segment'
+
+    # Segment files are left for the operating system to write (survives the process stopping).
+    FSYNC_NEVER = 'never'
+
+    def __init__(self, directory, sink, batch_size=100, batch_interval=0, segment_size=1048576, fsync=FSYNC_SEGMENT, retry_interval=5, maximum_memory_records=10000, error_callback=None, permanent_errors=(), maximum_attempts=None, close_timeout=None):
+        """
+        Initialize a spool (and start its drainer thread).
+
+        Args:
+            directory (str):
+                The directory holding the segment files (this is created if it does not exist).
+            sink (callable):
+                Called by the drainer thread with a list of records to deliver; it should raise
+                an exception if the records could not be delivered.
+            batch_size (int, optional):
+                The maximum number of records passed to the sink at once. Defaults to 100.
+            batch_interval (float, optional):
+                Seconds to wait for a batch to fill before passing a partial batch to the sink.
+                Defaults to 0 (records are passed to the sink as soon as it is free).
+            segment_size (int, optional):
+                The size in bytes after which a new segment file is started. Defaults to 1 MB.
+            fsync (str, optional):
+                When segment files are fsynced (FSYNC_ALWAYS, FSYNC_SEGMENT or FSYNC_NEVER).
+                Defaults to FSYNC_SEGMENT.
+            retry_interval (float, optional):
+                Seconds to wait after the sink fails before trying it again. Defaults to 5.
+            maximum_memory_records (int, optional):
+                The number of records waiting in memory after which they are spooled to disk
+                (if the sink is slow rather than failing). Defaults to 10000.
+            error_callback (callable, optional):
+                Called by the drainer thread with the exception each time the sink fails (or the
+                spool itself fails, such as when the disk is full). Defaults to None.
+            permanent_errors (tuple, optional):
+                The exception types that mean the sink can never accept a batch (such as a
+                record it cannot parse), so the batch is dead-lettered rather than retried.
+                Defaults to () (every failure is retried).
+            maximum_attempts (int, optional):
+                The number of times a batch is passed to the sink before it is dead-lettered.
+                Defaults to None (a batch is retried until it is accepted).
+            close_timeout (float, optional):
+                Seconds to wait for the drainer thread when leaving a "with" block.
+                Defaults to None (wait for the sink to return).
+
+        Raises:
+            ValueError: If the fsync policy is not recognised.
+        """
+
+        # Check the fsync policy.
+        if fsync not in (Spool.FSYNC_ALWAYS, Spool.FSYNC_SEGMENT, Spool.FSYNC_NEVER):
+            raise ValueError(f'Unexpected fsync policy "{fsync}".')
+
+        self.directory = directory
+        self.sink = sink
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self.retry_interval = retry_interval
+        self.maximum_memory_records = maximum_memory_records
+        self.error_callback = error_callback
+        self.permanent_errors = tuple(permanent_errors)
+        self.maximum_attempts = maximum_attempts
+        self.close_timeout = close_timeout
+
+        # Create the spool directory if it does not already exist.
+        os.makedirs(directory, exist_ok=True)
+
+        # Protects all the state below (shared between the poller and the drainer thread).
+        self.condition = threading.Condition()
+
+        # The records waiting in memory (while the sink is healthy) and when the oldest arrived.
+        self.records = collections.deque()
+        self.batch_start_time = None
+
+        # The segment file currently being appended to (opened on first use).
+        self.segment_file = None
+
+        # Any segments from a previous run are replayed before any new records.
+        segments = self._get_segments()
+        self.segment_number = int(segments[-1][8:-6]) + 1 if segments else 0
+
+        # Whilst spilling, new records are appended to disk (after the records already there).
+        self.spilling = bool(segments)
+
+        # How many records of the oldest segment have already been delivered.
+        self.segment_offset = 0
+
+        # How many times the sink has failed the current batch.
+        self.attempts = 0
+
+        # The number of records moved to a dead-letter file.
+        self.dead_lettered = 0
+
+        # Set when the spool is being closed (and once it has been closed, no segment is opened).
+        self.closing = False
+        self.closed = False
+
+        # The exception from the sink's most recent failure (if any).
+        self.last_exception = None
+
+        # Start the drainer thread.
+        self.thread = threading.Thread(target=self._drain, name='Spool', daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        """
+        Support "with" so the spool is always closed.
+
+        Returns:
+            Spool: This instance.
+        """
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Close the spool when leaving a "with" block.
+        """
+
+        self.close(timeout=self.close_timeout)
+
+    def close(self, timeout=None):
+        """
+        Stop the drainer thread.
+
+        Records waiting in memory are passed to the sink one last time (or written to disk if
+        the sink fails), any records already on disk are left to be replayed on the next start.
+
+        Args:
+            timeout (float, optional):
+                Seconds to wait for the drainer thread (if the sink has not returned by then, the
+                records in memory are written to disk and the batch being delivered is left to the
+                drainer thread). Defaults to None (wait for the sink to return).
+
+        Returns:
+            bool: True if the drainer thread stopped, False if the timeout was reached.
+        """
+
+        # Ask the drainer thread to stop (waking it if it is waiting).
+        with self.condition:
+            self.closing = True
+            self.condition.notify_all()
+
+        self.thread.join(timeout)
+
+        # Anything still in memory is written to disk.
+        with self.condition:
+            if self.records:
+                self._write_records(self.records)
+                self.records.clear()
+
+            self._close_segment()
+
+            # A drainer thread that is still running cannot open a new segment.
+            self.closed = True
+
+        return not self.thread.is_alive()
+
+    def submit(self, record):
+        """
+        Add a record to the spool (this does not wait for the sink).
+
+        Args:
+            record (object): The record (this must be able to be serialised as JSON).
+
+        Raises:
+            ValueError: If the spool has been closed.
+        """
+
+        with self.condition:
+            # Has the spool been closed?
+            if self.closing:
+                raise ValueError('The spool has been closed.')
+
+            # Is the sink unavailable (or is there already a backlog on disk)?
+            if self.spilling:
+                self._write_records((record,))
+                return
+
+            # Start timing the batch from its first record.
+            if not self.records:
+                self.batch_start_time = time.monotonic()
+
+            self.records.append(record)
+
+            # Is the sink not keeping up? The records are moved to disk rather than memory.
+            if len(self.records) > self.maximum_memory_records:
+                self._write_records(self.records)
+                self.records.clear()
+                self.spilling = True
+
+            # Wake the drainer thread.
+            self.condition.notify()
+
+    def _get_segments(self):
+        """
+        Get the filenames of the segments on disk (oldest first).
+
+        Returns:
+            list: The segment filenames.
+        """
+
+        return sorted(filename for filename in os.listdir(self.directory) if filename.startswith('segment_') and filename.endswith('.jsonl'))
+
+    def _write_records(self, records):
+        """
+        Append records to the current segment file (the lock must be held).
+
+        Args:
+            records (iterable): The records to append.
+
+        Raises:
+            ValueError: If the spool has been closed.
+        """
+
+        # Has the spool been closed?
+        if self.closed:
+            raise ValueError('The spool has been closed.')
+
+        # Open a new segment if there is not one already open.
+        if self.segment_file is None:
+            self.segment_file = open(os.path.join(self.directory, f'segment_{self.segment_number:012d}.jsonl'), mode='ab')
+
+        # Each record is a single line.
+        self.segment_file.write(b''.join(json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n' for record in records))
+        self.segment_file.flush()
+
+        # Should every record be flushed to the disk?
+        if self.fsync == Spool.FSYNC_ALWAYS:
+            os.fsync(self.segment_file.fileno())
+
+        # Is this segment full?
+        if self.segment_file.tell() >= self.segment_size:
+            self._close_segment()
+
+    def _write_dead_letter(self, records):
+        """
+        Append records the sink can never accept to today's dead-letter file.
+
+        Args:
+            records (list): The records to dead-letter.
+        """
+
+        path = os.path.join(self.directory, f'deadletter_{time.strftime("%Y%m%d")}.jsonl')
+
+        with open(path, mode='ab') as dead_letter_file:
+            dead_letter_file.write(b''.join(json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n' for record in records))
+            dead_letter_file.flush()
+
+            # Should the dead letters be flushed to the disk?
+            if self.fsync != Spool.FSYNC_NEVER:
+                os.fsync(dead_letter_file.fileno())
+
+        self.dead_lettered += len(records)
+
+    def _close_segment(self):
+        """
+        Close the current segment file (the lock must be held) so new records go to a new segment.
+        """
+
+        # Is there not a segment open?
+        if self.segment_file is None:
+            return
+
+        # Should the segment be flushed to the disk?
+        if self.fsync != Spool.FSYNC_NEVER:
+            os.fsync(self.segment_file.fileno())
+
+        self.segment_file.close()
+        self.segment_file = None
+        self.segment_number += 1
+
+    def _deliver(self, records):
+        """
+        Pass records to the sink.
+
+        Args:
+            records (list): The records to deliver.
+
+        Returns:
+            bool:
+                True if the sink accepted the records (or they were dead-lettered as the sink can
+                never accept them), False if they should be retried.
+        """
+
+        try:
+            self.sink(records)
+        # The sink could fail for any reason (connection, timeout, constraint).
+        # pylint: disable-next=broad-exception-caught
+        except Exception as exception:
+            self.last_exception = exception
+            self.attempts += 1
+
+            # Let the caller know.
+            if self.error_callback:
+                self.error_callback(exception)
+
+            # Can the sink never accept these records (or has it failed them too many times)?
+            if isinstance(exception, self.permanent_errors) or (self.maximum_attempts is not None and self.attempts >= self.maximum_attempts):
+                self._write_dead_letter(records)
+                self.attempts = 0
+                return True
+
+            return False
+
+        self.last_exception = None
+        self.attempts = 0
+        return True
+
+    def _wait_to_retry(self):
+        """
+        Wait before retrying the sink (unless the spool is closed in the meantime).
+        """
+
+        with self.condition:
+            self.condition.wait_for(lambda: self.closing, timeout=self.retry_interval)
+
+    def _drain_segment(self):
+        """
+        Replay the oldest segment on disk to the sink.
+        """
+
+        with self.condition:
+            segments = self._get_segments()
+
+            # Has the backlog been fully replayed? New records can go to memory again.
+            if not segments:
+                self.spilling = False
+                return
+
+            # The segment currently being appended to is closed so it can be replayed.
+            filename = segments[0]
+            if self.segment_file is not None and len(segments) == 1:
+                self._close_segment()
+
+        path = os.path.join(self.directory, filename)
+
+        # Read the records in this segment.
+        records = []
+        with open(path, mode='rb') as segment_file:
+            for line in segment_file:
+                try:
+                    records.append(json.loads(line))
+                # A partially written last line (e.g. after a power cut) is skipped.
+                except ValueError:
+                    continue
+
+        # Deliver the records (skipping any already delivered) in batches.
+        while self.segment_offset < len(records):
+            batch = records[self.segment_offset:self.segment_offset+self.batch_size]
+
+            # Did the sink fail? The rest of the segment is retried later.
+            if not self._deliver(batch):
+                self._wait_to_retry()
+                return
+
+            self.segment_offset += len(batch)
+
+            # Stop replaying if the spool is being closed.
+            if self.closing:
+                return
+
+        # This segment has been fully delivered.
+        os.remove(path)
+        self.segment_offset = 0
+
+    def _drain_batch(self):
+        """
+        Pass the next batch to the sink (replaying any backlog on disk first).
+
+        Returns:
+            bool: True if there may be more to drain, False if the drainer thread should stop.
+        """
+
+        with self.condition:
+            # Wait for a full batch (or for a partial batch to have waited long enough).
+            while not (self.closing or self.spilling):
+                if self.records:
+                    remaining = self.batch_start_time + self.batch_interval - time.monotonic()
+                    if len(self.records) >= self.batch_size or remaining <= 0:
+                        break
+                else:
+                    remaining = None
+
+                self.condition.wait(timeout=remaining)
+
+            # Is there a backlog on disk to replay?
+            if self.spilling:
+                # Any backlog is left for the next start if the spool is being closed.
+                if self.closing:
+                    return False
+
+                batch = None
+            else:
+                # Has everything in memory been delivered?
+                if not self.records:
+                    return False
+
+                # Take the next batch from memory.
+                batch = [self.records.popleft() for _ in range(min(self.batch_size, len(self.records)))]
+                self.batch_start_time = time.monotonic()
+
+        # Replay the backlog on disk.
+        if batch is None:
+            self._drain_segment()
+            return True
+
+        # Did the sink fail?
+        if not self._deliver(batch):
+            with self.condition:
+                # This batch (and anything that arrived since) goes to disk in order (the records
+                # stay in memory if they cannot be written).
+                self.records.extendleft(reversed(batch))
+                self._write_records(self.records)
+                self.records.clear()
+                self.spilling = True
+
+            self._wait_to_retry()
+
+        return True
+
+    def _drain(self):
+        """
+        The drainer thread; passes records to the sink until the spool is closed.
+        """
+
+        while True:
+            try:
+                if not self._drain_batch():
+                    return
+            # The spool itself could fail (a full disk or a record that cannot be serialised), this
+            # must not stop the drainer thread.
+            # pylint: disable-next=broad-exception-caught
+            except Exception as exception:
+                self.last_exception = exception
+
+                # Let the caller know.
+                if self.error_callback:
+                    self.error_callback(exception)
+
+                # Is the spool being closed? Anything left in memory is written to disk by close().
+                if self.closing:
+                    return
+
+                self._wait_to_retry()
\ No newline at end of file